@@ -1,50 +1,81 @@
+// Generated by lookup_table_compiler.py from the CHARMM .rtf/.prm -- do not edit by hand.
 `default_nettype none
 
 module atom_type_table (
     input  wire [15:0] type_id,     // From your Residue DB
-    output reg  [31:0] sigma_q16,   // Atomic Radius (Angstroms) in Q16.16
-    output reg  [31:0] epsilon_q16  // Energy Well Depth (kcal/mol) in Q16.16
+    output reg  [31:0] sigma_q16,   // Sigma^2 (A^2) in Q16.16
+    output reg  [31:0] epsilon_q16  // 24 * Well Depth (kcal/mol) in Q16.16
 );
 
-    // Using standard CHARMM/AMBER force field values as referenced in the spec [cite: 29, 30]
+    // CHARMM36 Lennard-Jones parameters as the non-bonded pipeline consumes them:
+    // sigma_q16 = sigma^2 with sigma = Rmin / 2^(1/6), epsilon_q16 = 24 * |Emin|
     always @(*) begin
         case (type_id)
-            // --- Carbon Types ---
-            16'h0001: begin // C (Carbonyl)
-                sigma_q16   = 32'h0001B333; // 1.700 A
-                epsilon_q16 = 32'h00001C28; // 0.110 kcal/mol
+            16'h0010: begin // C
+                sigma_q16   = 32'h000CB2FF; // sigma^2 = 12.699 A^2
+                epsilon_q16 = 32'h0002A3D7; // 24 * eps = 2.6400 kcal/mol
             end
-            16'h0009, 16'h000A: begin // CT1/CT2 (Aliphatic Carbon)
-                sigma_q16   = 32'h0001E8F5; // 1.910 A
-                epsilon_q16 = 32'h00000E14; // 0.055 kcal/mol
+            16'h0011: begin // CA
+                sigma_q16   = 32'h000C9A56; // sigma^2 = 12.603 A^2
+                epsilon_q16 = 32'h0001AE14; // 24 * eps = 1.6800 kcal/mol
             end
-
-            // --- Nitrogen Types ---
-            16'h0010: begin // NH1 (Peptide Nitrogen)
-                sigma_q16   = 32'h0001D1EB; // 1.820 A
-                epsilon_q16 = 32'h00002B02; // 0.170 kcal/mol
+            16'h0013: begin // CT1
+                sigma_q16   = 32'h000CB2FF; // sigma^2 = 12.699 A^2
+                epsilon_q16 = 32'h0000C49B; // 24 * eps = 0.7680 kcal/mol
             end
-
-            // --- Oxygen Types ---
-            16'h0014: begin // O (Carbonyl Oxygen)
-                sigma_q16   = 32'h0001B333; // 1.700 A
-                epsilon_q16 = 32'h00001EB8; // 0.120 kcal/mol
+            16'h0014, 16'h0015: begin // CT2/CT2A
+                sigma_q16   = 32'h000CD396; // sigma^2 = 12.827 A^2
+                epsilon_q16 = 32'h00015810; // 24 * eps = 1.3440 kcal/mol
             end
-            16'h0016: begin // OH1 (Hydroxyl Oxygen)
-                sigma_q16   = 32'h00019EB8; // 1.620 A
-                epsilon_q16 = 32'h000028F5; // 0.160 kcal/mol
+            16'h0016: begin // CT3
+                sigma_q16   = 32'h000D3656; // sigma^2 = 13.212 A^2
+                epsilon_q16 = 32'h0001DF3B; // 24 * eps = 1.8720 kcal/mol
             end
-
-            // --- Sulfur Types ---
-            16'h0017: begin // S (Sulfur)
-                sigma_q16   = 32'h00020000; // 2.000 A
-                epsilon_q16 = 32'h00003AE1; // 0.230 kcal/mol
+            16'h0017, 16'h0018: begin // CPH1/CPH2
+                sigma_q16   = 32'h000A494E; // sigma^2 = 10.286 A^2
+                epsilon_q16 = 32'h00013333; // 24 * eps = 1.2000 kcal/mol
+            end
+            16'h0019: begin // CPT
+                sigma_q16   = 32'h000AFBC9; // sigma^2 = 10.984 A^2
+                epsilon_q16 = 32'h00026041; // 24 * eps = 2.3760 kcal/mol
+            end
+            16'h001A, 16'h0023: begin // CY/CAI
+                sigma_q16   = 32'h000C9291; // sigma^2 = 12.573 A^2
+                epsilon_q16 = 32'h0001C083; // 24 * eps = 1.7520 kcal/mol
+            end
+            16'h001B: begin // CP1
+                sigma_q16   = 32'h00106E7C; // sigma^2 = 16.432 A^2
+                epsilon_q16 = 32'h00007AE1; // 24 * eps = 0.4800 kcal/mol
+            end
+            16'h001C, 16'h001D: begin // CP2/CP3
+                sigma_q16   = 32'h000F04CF; // sigma^2 = 15.019 A^2
+                epsilon_q16 = 32'h000151EB; // 24 * eps = 1.3200 kcal/mol
+            end
+            16'h001E: begin // CC
+                sigma_q16   = 32'h000CB2FF; // sigma^2 = 12.699 A^2
+                epsilon_q16 = 32'h0001AE14; // 24 * eps = 1.6800 kcal/mol
+            end
+            16'h0025, 16'h0026, 16'h0027, 16'h0029, 16'h002A, 16'h002B, 16'h002C, 16'h002D: begin // N/NR1/NR2/NH1/NH2/NH3/NC2/NY
+                sigma_q16   = 32'h000ADDA2; // sigma^2 = 10.866 A^2
+                epsilon_q16 = 32'h0004CCCC; // 24 * eps = 4.8000 kcal/mol
+            end
+            16'h002F, 16'h0031: begin // O/OC
+                sigma_q16   = 32'h00092CD8; // sigma^2 = 9.175 A^2
+                epsilon_q16 = 32'h0002E147; // 24 * eps = 2.8800 kcal/mol
+            end
+            16'h0032: begin // OH1
+                sigma_q16   = 32'h0009F243; // sigma^2 = 9.946 A^2
+                epsilon_q16 = 32'h0003A680; // 24 * eps = 3.6504 kcal/mol
+            end
+            16'h0034: begin // S
+                sigma_q16   = 32'h000CB2FF; // sigma^2 = 12.699 A^2
+                epsilon_q16 = 32'h000ACCCC; // 24 * eps = 10.8000 kcal/mol
             end
 
             default: begin
-                sigma_q16   = 32'h00018000; // 1.500 A (Default)
+                sigma_q16   = 32'h00018000; // 1.500 (Default)
                 epsilon_q16 = 32'h00001999; // 0.100 (Default)
             end
         endcase
     end
-endmodule
\ No newline at end of file
+endmodule
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from golden_model import (CLAMP_LIMIT, COOLING_FACTOR, INITIAL_STEP, ONE, MDSystemTop, clamp_move, from_q16, qmult,
+                          to_q16, wrap32)
+from md_engine import ForceTerms, build_coordinates, relax
+from minimizers import hardware_starts, schedule_rank, score_schedule, write_md_system_top
+from topology import Topology
+
+# ==============================================================================
+# 1. SEARCH SPACE (INITIAL_STEP, COOLING_FACTOR, clamp_move LIMIT Words)
+# ==============================================================================
+# A setting is the three Q16.16 words md_system_top hard-codes. The grid is
+# log-spaced in the step and the limit; cooling is listed by hand because
+# the interesting values crowd towards 1.0 (0x10000 = no cooling).
+RTL_SETTING = (INITIAL_STEP, COOLING_FACTOR, CLAMP_LIMIT)
+
+STEP_GRID = tuple(int(round(0x10 * 2 ** (k / 2))) for k in range(13))    # 0x10 .. 0x400
+COOLING_GRID = (0xE000, 0xF000, 0xF800, 0xFC00, 0xFE00, 0xFF00, ONE)
+LIMIT_GRID = (0x0800, 0x1000, 0x2000, 0x4000, 0x8000, 0x10000)           # 1/32 .. 1 A
+
+DEFAULT_CORPUS = ("ALA", "GLY,SER", "SER,GLU", "ALA,GLY,SER", "LEU,LYS,VAL", "ALA,GLY,SER,LEU,LYS")
+
+def grid_settings(steps=STEP_GRID, coolings=COOLING_GRID, limits=LIMIT_GRID):
+    return np.array([(s, c, l) for s in steps for c in coolings for l in limits], dtype=np.int64)
+
+def refine_settings(setting):
+    """Neighbours of one setting at a finer spacing than the grid (step / limit x 2^(+-1/4), cooling half-way to 1)."""
+    step, cooling, limit = setting
+    steps = {max(int(round(step * 2 ** (k / 4))), 1) for k in (-1, 0, 1)}
+    delta = max((ONE - cooling) // 2, 0x80)
+    coolings = {cooling - delta, cooling, min(cooling + delta, ONE)}
+    limits = {int(round(limit * 2 ** (k / 4))) for k in (-1, 0, 1)}
+    return np.array(sorted((s, c, l) for s in steps for c in coolings for l in limits), dtype=np.int64)
+
+# ==============================================================================
+# 2. MINIMIZER MODEL (S_APPLY_UPDATE on Real Fragments, Batched Over Settings)
+# ==============================================================================
+# md_system_top's update in Q16.16 words: pos += clamp_move(qmult(F, step),
+# LIMIT), step = qmult(step, COOLING_FACTOR), with F from md_engine.ForceTerms
+# in q16 mode (word-truncated terms in wrapping accumulators) on the real
+# CHARMM topology of each fragment. Every setting of a fragment advances as
+# one batch through ForceTerms; settings drop out of the batch once they
+# converge (GRMS <= target) or diverge (non-finite energy, energy above the
+# starting energy, or a coordinate leaving +-1024 A), and once cooling has
+# truncated their step to 0 (the loop is frozen there, unconverged).
+def run_settings(terms, x0, settings, max_iters=1000, target=1.0):
+    """
+    settings: (S, 3) words. Returns per setting the iterations to convergence
+    (-1 if never), a divergence flag, and the final energy and GRMS.
+    """
+    settings = np.asarray(settings, dtype=np.int64)
+    count = len(settings)
+    pos = np.repeat(to_q16(x0)[None], count, axis=0)
+    step, cooling, limit = (settings[:, k].copy() for k in range(3))
+    iterations = np.full(count, -1, dtype=np.int64)
+    diverged = np.zeros(count, dtype=bool)
+    energy, force_rms = np.full(count, np.nan), np.full(count, np.nan)
+    e_start = None
+    active = np.arange(count)
+    for it in range(max_iters + 1):
+        terms_e, forces = terms.energy_forces(from_q16(pos[active]))
+        e = sum(terms_e.values())
+        g = np.sqrt(np.mean(from_q16(forces) ** 2, axis=(1, 2)))
+        if e_start is None: e_start = e[0]
+        energy[active], force_rms[active] = e, g
+
+        bad = ~np.isfinite(e) | (e > e_start) | (np.abs(pos[active]).max(axis=(1, 2)) > 1024 * ONE)
+        done = g <= target
+        diverged[active[bad]] = True
+        iterations[active[done & ~bad]] = it
+        keep = ~bad & ~done & (step[active] != 0)
+        if it == max_iters or not keep.any(): break
+        active, forces = active[keep], forces[keep]
+
+        pos[active] = wrap32(pos[active] + clamp_move(qmult(forces, step[active, None, None]),
+                                                      limit[active, None, None]))
+        step[active] = qmult(step[active], cooling[active])
+    return {'iterations': iterations, 'diverged': diverged, 'energy': energy, 'grms': force_rms,
+            'start_energy': float(e_start)}
+
+# ==============================================================================
+# 3. CORPUS SWEEP (Process Pool Over Fragments)
+# ==============================================================================
+_FF = None
+
+def _forcefield():
+    """One parsed force field per worker process."""
+    global _FF
+    if _FF is None:
+        from ff_cache import load_cached
+        from forcefield import ForceField
+        _FF = ForceField()
+        load_cached(_FF, "top_all36_prot.rtf", "par_all36_prot.prm")
+    return _FF
+
+def fragment(sequence, seed, relax_steps=20):
+    """
+    (ForceTerms in q16 mode, starting coordinates) of a residue sequence. The
+    built coordinates get relax_steps of md_engine.relax first, like the
+    benchmark starts there: it separates overlapping atoms without
+    minimizing, so the tuned loop starts from strained but physical geometries.
+    """
+    ff = _forcefield()
+    topo = Topology.from_residues(ff, sequence.split(","))
+    x0 = build_coordinates(topo, np.random.default_rng(seed))
+    if relax_steps: x0 = relax(ForceTerms(ff, topo), x0, steps=relax_steps)
+    return ForceTerms(ff, topo, q16=True), x0
+
+def _sweep_fragment(args):
+    sequence, seed, settings, max_iters, target = args
+    terms, x0 = fragment(sequence, seed)
+    t0 = time.perf_counter()
+    result = run_settings(terms, x0, settings, max_iters, target)
+    result.update(sequence=sequence, atoms=terms.n, seconds=time.perf_counter() - t0)
+    return result
+
+def sweep(corpus, settings, max_iters=1000, target=1.0, seed=0, workers=1):
+    """run_settings for every fragment of the corpus; workers > 1 spreads fragments over a process pool."""
+    tasks = [(sequence, seed + k, settings, max_iters, target) for k, sequence in enumerate(corpus)]
+    if workers <= 1 or len(tasks) < 2:
+        return [_sweep_fragment(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        return list(pool.map(_sweep_fragment, tasks))
+
+def score(results, settings, max_iters):
+    """
+    Per setting over the corpus: divergences, fragments left unconverged and
+    mean iterations (unconverged fragments count as max_iters). Ranked by
+    (divergences, unconverged, mean iterations).
+    """
+    iters = np.array([r['iterations'] for r in results])
+    diverged = np.array([r['diverged'] for r in results])
+    unconverged = (iters < 0) & ~diverged
+    mean_iters = np.where(iters < 0, max_iters, iters).mean(axis=0)
+    order = np.lexsort((mean_iters, unconverged.sum(axis=0), diverged.sum(axis=0)))
+    return [{'initial_step': int(settings[k, 0]), 'cooling': int(settings[k, 1]), 'limit': int(settings[k, 2]),
+             'diverged': int(diverged[:, k].sum()), 'unconverged': int(unconverged[:, k].sum()),
+             'mean_iterations': float(mean_iters[k]), 'index': int(k)} for k in order]
+
+def per_molecule(results, index):
+    return [{'sequence': r['sequence'], 'atoms': r['atoms'], 'start_energy': r['start_energy'],
+             'iterations': int(r['iterations'][index]), 'diverged': bool(r['diverged'][index]),
+             'energy': float(r['energy'][index]), 'grms': float(r['grms'][index])} for r in results]
+
+# ==============================================================================
+# 4. HARDWARE CHECK (Bit-Exact MDSystemTop Before Export)
+# ==============================================================================
+# The sweep scores settings on CHARMM forces, but md_system_top descends its
+# own sliding-window force field. Before a setting goes into md_system_top.v
+# it is replayed on golden_model.MDSystemTop from the minimizers.py hardware
+# starts and ranked like minimizers.score_schedule ranks schedules (median
+# GRMS, then median energy); a setting that does worse there than the RTL
+# constants is not exported.
+def hardware_check(settings, hw_iters=100, target=1.0, chains=31, seed=0):
+    model = MDSystemTop(10)
+    starts = np.array([x for _, x in hardware_starts(chains=chains, rng=np.random.default_rng(seed))])
+    return [dict(score_schedule(model, starts, step, cooling, hw_iters, target, clamp_limit=limit), limit=int(limit))
+            for step, cooling, limit in settings]
+
+def print_hardware(rows):
+    print(f"  {'':<16} {'step':>7} {'cooling':>9} {'limit':>9} {'E median':>11} {'GRMS median':>12} {'converged':>10}")
+    for label, row in rows:
+        print(f"  {label:<16} {row['initial_step']:#7x} {row['cooling']:#9x} {row['limit']:#9x} "
+              f"{row['energy']:11.3f} {row['grms']:12.3f} {row['converged']:10.0%}")
+
+# ==============================================================================
+# 5. REPORT
+# ==============================================================================
+def _setting(row):
+    return f"{row['initial_step']:#7x} {row['cooling']:#9x} {row['limit']:#9x}"
+
+def print_ranking(ranking, top=10):
+    print(f"  {'step':>7} {'cooling':>9} {'limit':>9} {'diverged':>9} {'unconv':>7} {'mean iters':>11}")
+    for row in ranking[:top]:
+        print(f"  {_setting(row)} {row['diverged']:9d} {row['unconverged']:7d} {row['mean_iterations']:11.1f}")
+
+def print_molecules(label, rows):
+    print(f"{label}:")
+    print(f"  {'fragment':<24} {'atoms':>5} {'E start':>11} {'iters':>6} {'E final':>11} {'GRMS':>8}  status")
+    for r in rows:
+        status = "diverged" if r['diverged'] else ("converged" if r['iterations'] >= 0 else "unconverged")
+        print(f"  {r['sequence']:<24} {r['atoms']:5d} {r['start_energy']:11.2f} {r['iterations']:6d} "
+              f"{r['energy']:11.2f} {r['grms']:8.3f}  {status}")
+
+# ==============================================================================
+# 6. EXECUTION
+# ==============================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune INITIAL_STEP / COOLING_FACTOR / clamp_move LIMIT of "
+                                                 "md_system_top over a corpus of peptide fragments.")
+    parser.add_argument("--corpus", default=";".join(DEFAULT_CORPUS), help="';'-separated residue sequences")
+    parser.add_argument("--target", type=float, default=1.0, help="convergence GRMS (kcal/mol/A)")
+    parser.add_argument("--max-iters", type=int, default=1000)
+    parser.add_argument("--refine", type=int, default=2, help="local refinement rounds around the best setting")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=10, help="settings shown in the ranking")
+    parser.add_argument("--export", help="write md_system_top.v with the best setting to this directory "
+                                         "(only if it does no worse than the RTL on MDSystemTop)")
+    parser.add_argument("--hw-iters", type=int, default=100, help="MDSystemTop iterations for the hardware check")
+    parser.add_argument("--json", help="write the report as JSON")
+    args = parser.parse_args()
+
+    t_start = time.perf_counter()
+    corpus = args.corpus.split(";")
+    settings = np.vstack([np.array([RTL_SETTING], dtype=np.int64), grid_settings()])
+    print(f"Sweeping {len(settings)} settings over {len(corpus)} fragments "
+          f"(target GRMS {args.target:g}, {args.max_iters} iterations, {args.workers} workers)")
+    results = sweep(corpus, settings, args.max_iters, args.target, args.seed, args.workers)
+    ranking = score(results, settings, args.max_iters)
+
+    for round_ in range(args.refine):
+        best = ranking[0]
+        extra = refine_settings((best['initial_step'], best['cooling'], best['limit']))
+        extra = np.array([s for s in extra if not (settings == s).all(axis=1).any()], dtype=np.int64)
+        if not len(extra): break
+        print(f"  refinement {round_ + 1}: {len(extra)} settings around {_setting(best)}")
+        more = sweep(corpus, extra, args.max_iters, args.target, args.seed, args.workers)
+        for r, m in zip(results, more):
+            for key in ('iterations', 'diverged', 'energy', 'grms'):
+                r[key] = np.concatenate([r[key], m[key]])
+        settings = np.vstack([settings, extra])
+        ranking = score(results, settings, args.max_iters)
+
+    print(f"\nBest settings ({time.perf_counter() - t_start:.1f} s):")
+    print_ranking(ranking, args.top)
+    rtl = next(row for row in ranking if row['index'] == 0)
+    best = ranking[0]
+    print(f"  md_system_top.v now: {_setting(rtl)}  diverged {rtl['diverged']}, unconverged {rtl['unconverged']}, "
+          f"mean iterations {rtl['mean_iterations']:.1f}\n")
+    print_molecules(f"Per fragment, best {_setting(best)}", per_molecule(results, best['index']))
+    print_molecules(f"Per fragment, md_system_top.v {_setting(rtl)}", per_molecule(results, 0))
+
+    print(f"\nHardware check on MDSystemTop ({args.hw_iters} iterations, bit-exact):")
+    hw_rtl, hw_best = hardware_check([RTL_SETTING, (best['initial_step'], best['cooling'], best['limit'])],
+                                     args.hw_iters, args.target, seed=args.seed)
+    print_hardware([("md_system_top.v", hw_rtl), ("best", hw_best)])
+    hw_ok = schedule_rank(hw_best) <= schedule_rank(hw_rtl)
+    if not hw_ok: print("  best setting does worse than the RTL constants on MDSystemTop")
+
+    if args.export:
+        if hw_ok:
+            os.makedirs(args.export, exist_ok=True)
+            write_md_system_top(best['initial_step'], best['cooling'], os.path.join(args.export, "md_system_top.v"),
+                                clamp_limit=best['limit'])
+        else:
+            print(f"  not exporting to {args.export}/")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'corpus': corpus, 'target_grms': args.target, 'max_iters': args.max_iters,
+                       'ranking': ranking, 'rtl': rtl, 'hardware': {'rtl': hw_rtl, 'best': hw_best},
+                       'best_molecules': per_molecule(results, best['index']),
+                       'rtl_molecules': per_molecule(results, 0)}, f, indent=1)
+        print(f"Wrote {args.json}")
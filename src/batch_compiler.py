@@ -0,0 +1,210 @@
+import argparse
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext, redirect_stdout
+
+import numpy as np
+
+from ff_cache import load_cached
+from forcefield import ForceField
+from lookup_table_compiler import RESIDUES
+from parameter_compiler import compile_hex_file
+from parameter_compiler_2d import compile_hardware_assets
+from parameter_compiler_new import compile_nonbonded_lut
+from parameter_packer import compile_packed_hex
+from topology import Topology, compile_bonded_tables, compile_nonbonded_exclusions
+
+# ==============================================================================
+# 1. SEQUENCES AND RESIDUE TEMPLATES
+# ==============================================================================
+# One-letter codes map onto the residue_id set of lookup_table_compiler
+# (HIS is the neutral HSD tautomer there as well). A template is the RTF atom
+# order of one residue as (ResName, AtomName) tuples, the entry format every
+# compiler takes; each worker expands a residue once and reuses it for every
+# variant it compiles.
+ONE_LETTER = {'G': 'GLY', 'A': 'ALA', 'V': 'VAL', 'L': 'LEU', 'I': 'ILE', 'S': 'SER', 'T': 'THR',
+              'C': 'CYS', 'M': 'MET', 'D': 'ASP', 'E': 'GLU', 'N': 'ASN', 'Q': 'GLN', 'K': 'LYS',
+              'R': 'ARG', 'F': 'PHE', 'Y': 'TYR', 'H': 'HSD', 'W': 'TRP', 'P': 'PRO'}
+if sorted(ONE_LETTER.values()) != sorted(RESIDUES):
+    raise RuntimeError("ONE_LETTER is out of step with lookup_table_compiler.RESIDUES")
+
+class ResidueTemplates:
+    def __init__(self, ff):
+        self.ff = ff
+        self.templates = {}
+
+    def residue(self, res):
+        template = self.templates.get(res)
+        if template is None:
+            template = self.templates[res] = tuple((res, name) for name in self.ff.residues[res])
+        return template
+
+    def expand(self, sequence):
+        """One-letter sequence -> (atom_list, residue_index) in RTF atom order."""
+        atoms, residue_index = [], []
+        for r, code in enumerate(sequence.upper()):
+            if code not in ONE_LETTER: raise ValueError(f"unknown residue code {code!r} in {sequence}")
+            template = self.residue(ONE_LETTER[code])
+            atoms.extend(template)
+            residue_index.extend([r] * len(template))
+        return atoms, residue_index
+
+def read_sequences(filename):
+    """One variant per line, 'sequence' or 'name sequence'; blank lines and '#' comments are skipped."""
+    variants = []
+    with open(filename, 'r') as f:
+        for line in f:
+            parts = line.split('#')[0].split()
+            if parts: variants.append((parts[0], parts[1]) if len(parts) > 1 else (None, parts[0]))
+    return variants
+
+def random_sequences(count, length, rng):
+    codes = np.array(sorted(ONE_LETTER))
+    return [(None, "".join(rng.choice(codes, length))) for _ in range(count)]
+
+# ==============================================================================
+# 2. PER-VARIANT COMPILATION (Every Image Into Its Own Directory)
+# ==============================================================================
+# Same compilers and file names as the single-sequence scripts, pointed at
+# <out_dir>/<variant>/ instead of the working directory.
+def _param_ram(ff, atoms, topo, directory):
+    compile_hex_file(ff, atoms, os.path.join(directory, "forcefield_init.hex"))
+
+def _identity(ff, atoms, topo, directory):
+    compile_hardware_assets(ff, atoms, identity_filename=os.path.join(directory, "atom_identity.hex"),
+                            mixing_filename=os.path.join(directory, "mixing_matrix.hex"))
+
+def _nonbonded(ff, atoms, topo, directory):
+    compile_nonbonded_lut(ff, atoms, os.path.join(directory, "nonbonded_lut.hex"), pairs='all',
+                          pair_filename=os.path.join(directory, "nonbonded_pair_lut.hex"))
+
+def _bonded(ff, atoms, topo, directory):
+    compile_bonded_tables(ff, topo, prefix=os.path.join(directory, ""))
+
+def _exclusions(ff, atoms, topo, directory):
+    compile_nonbonded_exclusions(ff, topo, prefix=os.path.join(directory, ""))
+
+def _packed(ff, atoms, topo, directory):
+    compile_packed_hex(ff, atoms, prefix=os.path.join(directory, "forcefield"))
+
+IMAGES = {'param_ram': _param_ram, 'identity': _identity, 'nonbonded': _nonbonded, 'bonded': _bonded,
+          'exclusions': _exclusions, 'packed': _packed}
+
+_FF = None
+_TEMPLATES = None
+
+def _init_worker(rtf_file, prm_file):
+    """Loads the force field (ff_cache index) and an empty template cache once per process."""
+    global _FF, _TEMPLATES
+    _FF = ForceField()
+    load_cached(_FF, rtf_file, prm_file)
+    _TEMPLATES = ResidueTemplates(_FF)
+
+def compile_variant(task):
+    """
+    Compiles one variant. An image the variant does not fit (ValueError from
+    its compiler, e.g. more windows than parameter_ram_packed holds) is
+    skipped and its message recorded in 'errors'; the other images are kept.
+    """
+    name, sequence, directory, images, verbose = task
+    t0 = time.perf_counter()
+    atoms, residue_index = _TEMPLATES.expand(sequence)
+    os.makedirs(directory, exist_ok=True)
+    errors = {}
+    with nullcontext() if verbose else redirect_stdout(io.StringIO()):
+        topo = Topology(_FF, atoms, residue_index)
+        for image in images:
+            try:
+                IMAGES[image](_FF, atoms, topo, directory)
+            except ValueError as e:
+                errors[image] = str(e)
+    files = sorted(os.listdir(directory))
+    return {'name': name, 'sequence': sequence, 'atoms': len(atoms), 'directory': directory, 'files': files,
+            'skipped': list(errors), 'errors': errors,
+            'bytes': sum(os.path.getsize(os.path.join(directory, f)) for f in files),
+            'seconds': time.perf_counter() - t0, 'pid': os.getpid()}
+
+def variant_name(index, name, sequence):
+    """
+    Output directory name of a variant. Names from a --file list are reduced
+    to [A-Za-z0-9._-] without leading dots (no '..', no hidden directories),
+    so every variant stays one directory directly under out_dir.
+    """
+    if not name: return f"{index:05d}_{sequence[:24]}"
+    safe = re.sub(r"[^A-Za-z0-9._-]", "_", name).lstrip(".")
+    if not safe: raise ValueError(f"variant name {name!r} is not a usable directory name")
+    return safe
+
+def compile_batch(variants, out_dir="batch_out", images=tuple(IMAGES), workers=1,
+                  rtf_file="top_all36_prot.rtf", prm_file="par_all36_prot.prm", verbose=False):
+    """
+    Compiles every (name, one-letter sequence) variant into out_dir/<name>/ and
+    writes out_dir/manifest.json. workers > 1 uses a process pool (force field
+    and templates loaded once per worker). Returns (per-variant rows, seconds).
+    """
+    for image in images:
+        if image not in IMAGES: raise ValueError(f"unknown image {image!r} (choose from {', '.join(IMAGES)})")
+    tasks = [(n, s, os.path.join(out_dir, n), tuple(images), verbose)
+             for n, s in ((variant_name(k, name, seq), seq) for k, (name, seq) in enumerate(variants))]
+    if len({t[0] for t in tasks}) != len(tasks): raise ValueError("variant names must be unique")
+
+    t0 = time.perf_counter()
+    if workers <= 1 or len(tasks) < 2:
+        _init_worker(rtf_file, prm_file)
+        rows = [compile_variant(t) for t in tasks]
+    else:
+        chunk = max(1, len(tasks) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(rtf_file, prm_file)) as pool:
+            rows = list(pool.map(compile_variant, tasks, chunksize=chunk))
+    seconds = time.perf_counter() - t0
+
+    with open(os.path.join(out_dir, "manifest.json"), 'w') as f:
+        json.dump({'images': list(images), 'seconds': seconds, 'variants': rows}, f, indent=1)
+    return rows, seconds
+
+# ==============================================================================
+# 3. EXECUTION
+# ==============================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the parameter images of many peptide variants in parallel.")
+    parser.add_argument("sequences", nargs="*", help="one-letter sequences, e.g. AGSLK")
+    parser.add_argument("-f", "--file", help="variant list: 'sequence' or 'name sequence' per line")
+    parser.add_argument("--random", type=int, default=0, help="add this many random variants")
+    parser.add_argument("--length", type=int, default=10, help="residues per random variant")
+    parser.add_argument("--images", default=",".join(IMAGES), help=f"comma-separated subset of {','.join(IMAGES)}")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("-o", "--out-dir", default="batch_out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-v", "--verbose", action="store_true", help="keep the compilers' progress output")
+    args = parser.parse_args()
+
+    variants = [(None, s) for s in args.sequences]
+    if args.file: variants += read_sequences(args.file)
+    if args.random: variants += random_sequences(args.random, args.length, np.random.default_rng(args.seed))
+    if not variants: parser.error("no sequences (give them as arguments, with --file or --random)")
+
+    images = args.images.split(",")
+    print(f"Compiling {len(variants)} variants ({', '.join(images)}) into {args.out_dir}/ "
+          f"with {args.workers} worker(s)...")
+    rows, seconds = compile_batch(variants, args.out_dir, images, args.workers, verbose=args.verbose)
+
+    atoms = sum(r['atoms'] for r in rows)
+    files = sum(len(r['files']) for r in rows)
+    size = sum(r['bytes'] for r in rows)
+    busy = sum(r['seconds'] for r in rows)
+    print(f"  {len(rows)} variants, {atoms} atoms, {files} files, {size / 2 ** 20:.1f} MiB in {seconds:.2f} s")
+    print(f"  {len(rows) / seconds:.1f} variants/s ({atoms / seconds:.0f} atoms/s), "
+          f"{busy / len(rows) * 1e3:.1f} ms per variant in the workers, "
+          f"{len({r['pid'] for r in rows})} process(es)")
+    failed = [r for r in rows if r['errors']]
+    if failed:
+        print(f"  {len(failed)} variant(s) with skipped images:")
+        for r in failed:
+            for image, message in r['errors'].items():
+                print(f"    {r['name']}: {image}: {message}")
+    print(f"  manifest: {os.path.join(args.out_dir, 'manifest.json')}")
@@ -0,0 +1,162 @@
+import time
+
+import numpy as np
+
+# ==============================================================================
+# 1. COMPILED DIHEDRAL INDEX
+# ==============================================================================
+# Built once after load: every type quadruple the topology needs is resolved
+# (exact -> reverse -> X-wildcard) to its full Fourier series up front. A quad
+# is stored under one canonical orientation (A-B-C-D == D-C-B-A) as a single
+# int64 key, and the terms live in flat CSR arrays:
+#   keys[s]                    sorted canonical quad keys
+#   offsets[s]:offsets[s + 1]  slice of k / n / delta holding the terms of slot s
+# so looking up thousands of torsions is one searchsorted + one gather.
+
+class DihedralIndex:
+    def __init__(self, ff, type_quads):
+        """type_quads: iterable of (t1, t2, t3, t4) CHARMM type names."""
+        quads = {tuple(q) for q in type_quads}
+        names = sorted({t for q in quads for t in q})
+        self.type_ids = {t: i for i, t in enumerate(names)}
+        self.base = max(len(names), 1)
+
+        # Canonical orientation first, so both directions share one slot
+        canon = {}
+        for q in quads:
+            ids = self._canonical(self._ids(q))
+            canon[self._key(ids)] = tuple(names[i] for i in ids)
+        self.keys = np.array(sorted(canon), dtype=np.int64)
+
+        k, n, delta, offsets = [], [], [], [0]
+        for key in self.keys:
+            for kchi, period, phase in ff.get_dihedral_terms(*canon[key]):
+                k.append(kchi); n.append(period); delta.append(phase)
+            offsets.append(len(k))
+        self.k = np.array(k, dtype=np.float64)
+        self.n = np.array(n, dtype=np.int32)
+        self.delta = np.array(delta, dtype=np.float64)
+        self.offsets = np.array(offsets, dtype=np.int64)
+
+    # --- Key encoding -------------------------------------------------------
+    def _ids(self, quad):
+        return tuple(self.type_ids[t] for t in quad)
+
+    @staticmethod
+    def _canonical(ids):
+        return min(ids, ids[::-1])
+
+    def _key(self, ids):
+        a, b, c, d = ids
+        return ((a * self.base + b) * self.base + c) * self.base + d
+
+    def encode(self, type_ids):
+        """(M, 4) int type-id array -> (M,) canonical int64 keys."""
+        ids = np.asarray(type_ids, dtype=np.int64).reshape(-1, 4)
+        rev = ids[:, ::-1]
+        # Lexicographic min of the two orientations, column by column
+        use_rev = np.zeros(len(ids), dtype=bool)
+        decided = np.zeros(len(ids), dtype=bool)
+        for col in range(4):
+            lt = ~decided & (rev[:, col] < ids[:, col])
+            gt = ~decided & (rev[:, col] > ids[:, col])
+            use_rev |= lt
+            decided |= lt | gt
+        canon = np.where(use_rev[:, None], rev, ids)
+        b = self.base
+        return ((canon[:, 0] * b + canon[:, 1]) * b + canon[:, 2]) * b + canon[:, 3]
+
+    # --- Lookup -------------------------------------------------------------
+    def slots(self, type_ids):
+        """(M, 4) type ids -> (M,) slot numbers. Raises KeyError for unindexed quads."""
+        keys = self.encode(type_ids)
+        slots = np.searchsorted(self.keys, keys)
+        slots = np.minimum(slots, len(self.keys) - 1)
+        if len(keys) and not np.array_equal(self.keys[slots], keys):
+            raise KeyError("type quadruple missing from the dihedral index")
+        return slots
+
+    def terms(self, t1, t2, t3, t4):
+        """All Fourier terms of one quad: [(kchi, n, delta), ...]."""
+        s = self.slots([self._ids((t1, t2, t3, t4))])[0]
+        lo, hi = self.offsets[s], self.offsets[s + 1]
+        return list(zip(self.k[lo:hi].tolist(), self.n[lo:hi].tolist(), self.delta[lo:hi].tolist()))
+
+    def gather(self, type_ids):
+        """
+        Expands M torsions into their flat term list in one pass.
+        Returns (torsion, k, n, delta): torsion[i] is the row in type_ids that
+        term i belongs to, so multi-term torsions appear once per term.
+        """
+        slots = self.slots(type_ids)
+        counts = self.offsets[slots + 1] - self.offsets[slots]
+        torsion = np.repeat(np.arange(len(slots)), counts)
+        # Position of each term inside its torsion's CSR slice
+        first = np.repeat(self.offsets[slots], counts)
+        within = np.arange(len(torsion)) - np.repeat(np.cumsum(counts) - counts, counts)
+        term_idx = first + within
+        return torsion, self.k[term_idx], self.n[term_idx], self.delta[term_idx]
+
+    def last_term(self, type_ids):
+        """
+        (k, n, delta) arrays holding the final term of each torsion's
+        get_dihedral_terms series, for the single-term parameter_ram row that
+        compile_hex_file writes. get_dihedral_params probes the same keys but
+        returns the last .prm line, which differs only when a repeated n
+        replaced an earlier term in place.
+        """
+        slots = self.slots(type_ids)
+        t = self.offsets[slots + 1] - 1
+        return self.k[t], self.n[t], self.delta[t]
+
+    @classmethod
+    def from_atom_list(cls, ff, atom_list):
+        """Index for the linear 4-atom sliding windows compile_hex_file walks."""
+        types = [ff.atom_types[a][0] for a in atom_list]
+        return cls(ff, (tuple(types[i:i + 4]) for i in range(len(types) - 3)))
+
+def sliding_window_dihedrals(ff, atom_list):
+    """
+    (k, n, delta) arrays for every atom_list[i:i+4] window, one entry per
+    window, resolved through a DihedralIndex instead of per-window dict probes.
+    """
+    index = DihedralIndex.from_atom_list(ff, atom_list)
+    ids = np.array([index.type_ids[ff.atom_types[a][0]] for a in atom_list], dtype=np.int64)
+    return index.last_term(np.lib.stride_tricks.sliding_window_view(ids, 4))
+
+# ==============================================================================
+# 2. BENCHMARK (Per-Window Dict Probes vs Index Gather)
+# ==============================================================================
+if __name__ == "__main__":
+    from ff_cache import load_cached
+    from forcefield import ForceField
+
+    ff = ForceField()
+    load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
+
+    # Synthetic large protein: residues in RTF atom order, repeated to ~200k atoms
+    rng = np.random.default_rng(0)
+    residues = ['ALA', 'GLY', 'SER', 'LEU', 'LYS', 'GLU', 'PHE', 'VAL']
+    chain = [residues[i] for i in rng.integers(0, len(residues), 15000)]
+    types = [t for r in chain for (res, _), (t, _) in ff.atom_types.items() if res == r]
+    quads = [tuple(types[i:i + 4]) for i in range(len(types) - 3)]
+
+    t0 = time.perf_counter()
+    probe = [ff.get_dihedral_terms(*q) for q in quads]
+    t_probe = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = DihedralIndex(ff, quads)
+    t_build = time.perf_counter() - t0
+    type_ids = np.array([index.type_ids[t] for t in types])
+    windows = np.lib.stride_tricks.sliding_window_view(type_ids, 4)
+
+    t0 = time.perf_counter()
+    torsion, k, n, delta = index.gather(windows)
+    t_gather = time.perf_counter() - t0
+
+    assert len(torsion) == sum(len(p) for p in probe)
+    print(f"{len(quads)} torsions, {len(index.keys)} unique quads, {len(torsion)} Fourier terms")
+    print(f"dict probes   : {1000 * t_probe:8.1f} ms")
+    print(f"index build   : {1000 * t_build:8.1f} ms (once per topology)")
+    print(f"index gather  : {1000 * t_gather:8.1f} ms")
@@ -0,0 +1,240 @@
+import hashlib
+import marshal
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+# ==============================================================================
+# 1. CACHE FORMAT
+# ==============================================================================
+# Binary layout (little endian):
+#   header  : MAGIC, version u32, n_strings u32, n_tables u32
+#   strings : n_strings x (u8 length, utf-8 bytes)   <- every type/residue/atom name
+#   tables  : per table (u8 len + name, u8 key arity, u8 multi, u8 len + value fmt,
+#             u32 n_keys, u32 n_values, key block, value block)
+# The key block is n_keys x {string ids (u16 each), u32 item count} and the value
+# block is n_values fixed-width records, so both are flat arrays that struct can
+# walk straight out of the memory map.
+MAGIC = b"FFIX"
+VERSION = 3
+CACHE_DIRNAME = ".ffcache"
+
+# Value codes: 'd' float64, 'i' int32, 'S' string-table id (stored as u16)
+# Single-code fmts hold bare scalars instead of 1-tuples. multi=True tables map
+# one key to a list of values (one record per item).
+SCHEMA = [
+    # (attribute,    key arity, value fmt, multi)
+    ("masses",       1, "d",   False),  # Type             -> mass
+    ("bonds",        2, "dd",  False),  # (T1, T2)         -> (kb, r0)
+    ("angles",       3, "dd",  False),  # (T1, T2, T3)     -> (ktheta, theta0)
+    ("dihedrals",    4, "did", False),  # (T1, T2, T3, T4) -> (kchi, n, delta)
+    ("dihedral_terms", 4, "did", True), # (T1, T2, T3, T4) -> [(kchi, n, delta), ...]
+    ("impropers",    4, "dd",  False),  # (T1, T2, T3, T4) -> (kpsi, psi0)
+    ("cmap",         8, "d",   True),   # (8 Types)        -> [grid values]
+    ("nonbonded",    1, "dd",  False),  # Type             -> (epsilon, rmin/2)
+    ("nonbonded14",  1, "dd",  False),  # Type             -> (epsilon, rmin/2)
+    ("nbfix",        2, "dd",  False),  # (T1, T2)         -> (emin, rmin)
+    ("atom_types",   2, "Sd",  False),  # (Res, AtomName)  -> (AtomType, charge)
+    ("residues",     1, "S",   True),   # Res              -> [AtomName, ...]
+    ("residue_bonds", 1, "SS", True),   # Res              -> [(AtomName, AtomName), ...]
+]
+
+def _key_struct(arity):
+    return struct.Struct("<" + "H" * arity + "I")
+
+def _value_struct(fmt, count=1):
+    return struct.Struct("<" + fmt.replace("S", "H") * count)
+
+# ==============================================================================
+# 2. CACHE KEY (Content Hash of the Sources + the Parser)
+# ==============================================================================
+def cache_key(ff, rtf_file, prm_file):
+    """SHA-256 over the CHARMM files and the ForceField loaders that parse them."""
+    h = hashlib.sha256(MAGIC + struct.pack("<I", VERSION))
+    # Each compiler carries its own parser, so its bytecode is part of the key:
+    # editing a load_* method invalidates the cache just like editing the .prm.
+    for name in ("load_rtf", "load_prm"):
+        h.update(marshal.dumps(getattr(type(ff), name).__code__))
+    # The loaders also read module globals (forcefield.PRM_SECTIONS, helpers),
+    # which the bytecode only names, so the defining module's source goes in too.
+    source = getattr(sys.modules.get(type(ff).__module__), "__file__", None)
+    if source is not None and os.path.isfile(source):
+        with open(source, 'rb') as f:
+            h.update(f.read())
+    for filename in (rtf_file, prm_file):
+        with open(filename, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+# ==============================================================================
+# 3. SERIALIZE / DESERIALIZE
+# ==============================================================================
+def save_index(ff, path):
+    """Writes every SCHEMA table present on ff into one binary index file."""
+    strings = {}
+    def sid(s):
+        if s not in strings: strings[s] = len(strings)
+        return strings[s]
+
+    blocks = []
+    for attr, arity, fmt, multi in SCHEMA:
+        table = getattr(ff, attr, None)
+        if table is None: continue
+        krec, vrec = _key_struct(arity), _value_struct(fmt)
+        keys, values = bytearray(), bytearray()
+        n_values = 0
+        for key, value in table.items():
+            items = value if multi else (value,)
+            keys += krec.pack(*[sid(k) for k in (key if isinstance(key, tuple) else (key,))], len(items))
+            for item in items:
+                if not isinstance(item, tuple): item = (item,)
+                values += vrec.pack(*[sid(v) if c == 'S' else v for c, v in zip(fmt, item)])
+            n_values += len(items)
+        head = bytes([len(attr)]) + attr.encode() + bytes([arity, multi, len(fmt)]) + fmt.encode()
+        blocks.append(head + struct.pack("<II", len(table), n_values) + bytes(keys) + bytes(values))
+
+    out = bytearray(MAGIC + struct.pack("<III", VERSION, len(strings), len(blocks)))
+    for s in strings:
+        raw = s.encode('utf-8')
+        out += bytes([len(raw)]) + raw
+    for block in blocks:
+        out += block
+
+    # Write-then-rename so concurrent sweep jobs never see a half-written index
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(out)
+    os.replace(tmp, path)
+
+def load_index(ff, path):
+    """Memory-maps an index file and restores its tables onto ff."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            if bytes(view[:4]) != MAGIC:
+                raise ValueError(f"{path} is not a force-field index")
+            version, n_strings, n_tables = struct.unpack_from("<III", view, 4)
+            if version != VERSION:
+                raise ValueError(f"{path} has index version {version}, expected {VERSION}")
+            pos = 16
+
+            strings = []
+            for _ in range(n_strings):
+                n = view[pos]
+                strings.append(str(view[pos + 1:pos + 1 + n], 'utf-8'))
+                pos += 1 + n
+
+            for _ in range(n_tables):
+                n = view[pos]; attr = str(view[pos + 1:pos + 1 + n], 'ascii'); pos += 1 + n
+                arity, multi, n = view[pos], view[pos + 1], view[pos + 2]; pos += 3
+                fmt = str(view[pos:pos + n], 'ascii'); pos += n
+                n_keys, n_values = struct.unpack_from("<II", view, pos); pos += 8
+                krec = _key_struct(arity)
+                key_rows = list(krec.iter_unpack(view[pos:pos + n_keys * krec.size]))
+                pos += n_keys * krec.size
+
+                # Pull the whole value block in one unpack, then regroup per record
+                width = len(fmt)
+                flat = _value_struct(fmt, n_values).unpack_from(view, pos)
+                pos += n_values * _value_struct(fmt).size
+                if 'S' in fmt:
+                    flat = [strings[v] if fmt[i % width] == 'S' else v for i, v in enumerate(flat)]
+                values = flat if width == 1 else [tuple(flat[i:i + width]) for i in range(0, len(flat), width)]
+
+                table = {}
+                start = 0
+                for row in key_rows:
+                    key = tuple([strings[k] for k in row[:arity]])
+                    if arity == 1: key = key[0]
+                    count = row[arity]
+                    table[key] = list(values[start:start + count]) if multi else values[start]
+                    start += count
+                setattr(ff, attr, table)
+        finally:
+            view.release()
+
+# ==============================================================================
+# 4. TRANSPARENT LOADER (Drop-in for ff.load_rtf + ff.load_prm)
+# ==============================================================================
+def load_cached(ff, rtf_file, prm_file, cache_dir=None):
+    """
+    Fills ff from the binary index when the .rtf/.prm are unchanged, otherwise
+    parses them with ff.load_rtf/ff.load_prm and writes a fresh index.
+    The cache lives next to the .prm (in .ffcache/) unless cache_dir is given.
+    Returns True on a cache hit.
+    """
+    try:
+        key = cache_key(ff, rtf_file, prm_file)
+    except FileNotFoundError:
+        # Let the compiler's own loaders report the missing file their usual way
+        ff.load_rtf(rtf_file)
+        ff.load_prm(prm_file)
+        return False
+
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(prm_file)), CACHE_DIRNAME)
+    path = os.path.join(cache_dir, f"{key[:32]}.ffidx")
+
+    if os.path.exists(path):
+        try:
+            load_index(ff, path)
+            return True
+        except (ValueError, struct.error, IndexError, UnicodeDecodeError):
+            pass # Corrupt/stale index: fall through and rebuild it
+
+    ff.load_rtf(rtf_file)
+    ff.load_prm(prm_file)
+    try:
+        save_index(ff, path)
+    except (OSError, UnicodeError, ValueError) as e:
+        # Unwritable cache dir, a path the filesystem encoding cannot represent,
+        # or a name too long for the u8 length field: the parse above still stands
+        print(f"Warning: could not write force-field cache ({e}).")
+    return False
+
+# ==============================================================================
+# 5. BENCHMARK (Cold Parse vs Warm Index Load)
+# ==============================================================================
+def benchmark(ff_class, rtf_file="top_all36_prot.rtf", prm_file="par_all36_prot.prm", repeats=20):
+    cache_dir = tempfile.mkdtemp(prefix="ffcache_bench_")
+    try:
+        cold = []
+        for _ in range(repeats):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            t0 = time.perf_counter()
+            load_cached(ff_class(), rtf_file, prm_file, cache_dir)
+            cold.append(time.perf_counter() - t0)
+
+        warm = []
+        for _ in range(repeats):
+            ff = ff_class()
+            t0 = time.perf_counter()
+            hit = load_cached(ff, rtf_file, prm_file, cache_dir)
+            warm.append(time.perf_counter() - t0)
+            assert hit, "warm load missed the cache"
+
+        # Sanity check: the cached tables must match a fresh parse exactly
+        ref = ff_class()
+        ref.load_rtf(rtf_file)
+        ref.load_prm(prm_file)
+        for attr, *_ in SCHEMA:
+            assert getattr(ref, attr, None) == getattr(ff, attr, None), f"{attr} differs after reload"
+
+        size = sum(os.path.getsize(os.path.join(cache_dir, n)) for n in os.listdir(cache_dir))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    cold_ms, warm_ms = 1000 * min(cold), 1000 * min(warm)
+    print(f"{ff_class.__module__}.{ff_class.__name__}: "
+          f"cold {cold_ms:7.2f} ms | warm {warm_ms:7.2f} ms | "
+          f"speedup {cold_ms / warm_ms:5.1f}x | index {size / 1024:.1f} KB")
+
+if __name__ == "__main__":
+    from forcefield import ForceField
+
+    benchmark(ForceField)
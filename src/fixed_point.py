@@ -0,0 +1,129 @@
+import time
+
+import numpy as np
+
+# ==============================================================================
+# 1. SCALAR CONVERTER (Reference Path)
+# ==============================================================================
+def to_q16_16(value):
+    """Converts a float to a 32-bit Q16.16 hex string."""
+    if value is None: return "00000000"
+
+    # Handle constants (like periodicity n) that are integers
+    if isinstance(value, int):
+        return f"{value:x}"
+
+    # Fixed-Point Math: Multiply by 2^16 (65536)
+    fixed_val = int(value * 65536)
+
+    # Handle negative numbers (Two's Complement)
+    if fixed_val < 0:
+        fixed_val = (1 << 32) + fixed_val
+
+    return f"{fixed_val:08X}" # Returns 8-char hex string (e.g., "00018000")
+
+# ==============================================================================
+# 2. BATCHED CONVERTER (NumPy)
+# ==============================================================================
+Q16_MIN = -(1 << 31)
+Q16_MAX = (1 << 31) - 1
+
+# Column kinds for encode_rows(): 'q' = Q16.16 word (8 hex chars),
+# 'n' = 4-bit integer field (1 hex char, e.g. the dihedral periodicity),
+# 'h' = 16-bit unsigned index field (4 hex chars, e.g. an atom or table index)
+PARAM_RAM_ROW = "qqqqqqnqq"  # {r0, kb, theta0, k_theta, phi0, k_phi, n, q_a, q_d}
+NONBONDED_ROW = "qqq"        # {Q, Sigma^2, 24*Epsilon}
+NONBONDED_PAIR_ROW = "qqq"   # {KC*Q_i*Q_j, Sigma^2 (or Sigma^6), 24*Epsilon}, pair-mixed
+KC = 0x014C1000              # Coulomb constant 332.06 in Q16.16 (coulombic_core_stream.v)
+
+_HEX_UPPER = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+_HEX_LOWER = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+def encode_q16_16(values, rounding="trunc", saturate=True):
+    """
+    Converts an array of floats to Q16.16 two's-complement words (uint32).
+    rounding='trunc' matches int(value * 65536) in to_q16_16; 'nearest' rounds
+    half up. With saturate=True out-of-range values clamp to the int32 limits
+    (the scalar path would emit a >8-digit string there instead).
+    """
+    scaled = np.asarray(values, dtype=np.float64) * 65536.0
+    if rounding == "trunc":
+        scaled = np.trunc(scaled)
+    elif rounding == "nearest":
+        scaled = np.floor(scaled + 0.5)
+    else:
+        raise ValueError(f"Unknown rounding mode '{rounding}'")
+    scaled = np.nan_to_num(scaled, nan=0.0)
+    if saturate:
+        scaled = np.clip(scaled, Q16_MIN, Q16_MAX)
+    return scaled.astype(np.int64).astype(np.uint32)
+
+def _nibbles(words, digits, table):
+    """(rows,) uint32 -> (rows, digits) ASCII hex codes, most significant nibble first."""
+    shifts = np.arange(4 * (digits - 1), -1, -4, dtype=np.uint32)
+    return table[(words[:, None] >> shifts) & 0xF]
+
+def encode_rows(rows, layout, rounding="trunc", saturate=True):
+    """
+    Encodes a (rows, columns) parameter table into hex lines in one shot.
+    layout is a string of column kinds (see PARAM_RAM_ROW). Returns a list of
+    strings, byte-identical to concatenating to_q16_16() per column.
+    """
+    table = np.asarray(rows, dtype=np.float64).reshape(-1, len(layout))
+    pieces = []
+    for col, kind in enumerate(layout):
+        if kind == 'q':
+            words = encode_q16_16(table[:, col], rounding, saturate)
+            pieces.append(_nibbles(words, 8, _HEX_UPPER))
+        elif kind == 'n':
+            # f"{n:1x}" in the scalar path: lowercase, 4 bits wide
+            words = table[:, col].astype(np.int64).astype(np.uint32) & 0xF
+            pieces.append(_nibbles(words, 1, _HEX_LOWER))
+        elif kind == 'h':
+            words = table[:, col].astype(np.int64).astype(np.uint32) & 0xFFFF
+            pieces.append(_nibbles(words, 4, _HEX_UPPER))
+        else:
+            raise ValueError(f"Unknown column kind '{kind}'")
+
+    pieces.append(np.full((len(table), 1), ord('\n'), dtype=np.uint8))
+    return np.hstack(pieces).tobytes().decode('ascii').splitlines()
+
+# ==============================================================================
+# 3. BENCHMARK (Scalar vs Batched, rows/sec)
+# ==============================================================================
+def _scalar_rows(rows):
+    return [f"{to_q16_16(r0)}{to_q16_16(kb)}{to_q16_16(th0)}{to_q16_16(kth)}"
+            f"{to_q16_16(phi0)}{to_q16_16(kphi)}{int(n):1x}{to_q16_16(qa)}{to_q16_16(qd)}"
+            for r0, kb, th0, kth, phi0, kphi, n, qa, qd in rows]
+
+def benchmark(sizes=(1024, 16384, 262144), seed=0):
+    rng = np.random.default_rng(seed)
+    for n_rows in sizes:
+        # Parameter ranges typical of CHARMM after compile_hex_file's conversions
+        table = np.column_stack([
+            rng.uniform(0.9, 2.0, n_rows),       # r0 (A)
+            rng.uniform(0.0, 700.0, n_rows),     # kb
+            rng.uniform(1.5, 3.2, n_rows),       # theta0 (rad)
+            rng.uniform(0.0, 150.0, n_rows),     # k_theta
+            rng.uniform(-3.2, 3.2, n_rows),      # phi0 (rad)
+            rng.uniform(-5.0, 5.0, n_rows),      # k_phi
+            rng.integers(1, 7, n_rows),          # n
+            rng.uniform(-1.0, 1.0, n_rows),      # q_a
+            rng.uniform(-1.0, 1.0, n_rows),      # q_d
+        ])
+        rows = [tuple(r) for r in table.tolist()]
+
+        t0 = time.perf_counter()
+        scalar = _scalar_rows(rows)
+        t_scalar = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batched = encode_rows(table, PARAM_RAM_ROW)
+        t_batched = time.perf_counter() - t0
+
+        assert scalar == batched, "batched encoder diverged from to_q16_16"
+        print(f"{n_rows:7d} rows | scalar {n_rows / t_scalar:12,.0f} rows/s | "
+              f"batched {n_rows / t_batched:12,.0f} rows/s | speedup {t_scalar / t_batched:5.1f}x")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,322 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from fixed_point import KC
+from golden_model import (ONE, acos_poly, angle_force_core, cordic_atan2, dihedral_force_core,
+                          inv_sqrt_direct, non_bonded_pipeline, norm_seed_lut, reciprocal_unit,
+                          reciprocal_wrapper, to_q16, wrap32)
+
+# ==============================================================================
+# 1. ERROR METRICS (1 ULP = 1 LSB of Q16.16 = 2^-16)
+# ==============================================================================
+# Each unit runs through golden_model's bit-exact model and is compared with
+# float64 evaluated on the exact input words, so only the unit's own error is
+# counted. References are clipped to the int32 range the RTL saturates to.
+INT32_MIN, INT32_MAX = -2.0 ** 31, 2.0 ** 31 - 1
+ERROR_BUCKETS = (0.5, 1, 2, 4, 16, 256, 4096, 65536) # Upper edges of the |ULP| histogram buckets
+
+def ulp_error(out, ref):
+    """Signed error in LSBs of output words against real-valued references (in LSBs)."""
+    return np.asarray(out, dtype=np.float64) - np.clip(ref, INT32_MIN, INT32_MAX)
+
+def error_stats(err, ref):
+    a = np.abs(err)
+    rel = a / np.maximum(np.abs(np.clip(ref, INT32_MIN, INT32_MAX)), 1.0)
+    return {'samples': int(a.size), 'max_ulp': float(a.max()), 'mean_ulp': float(a.mean()),
+            'bias_ulp': float(err.mean()), 'p99_ulp': float(np.percentile(a, 99)),
+            'max_rel': float(rel.max()), 'mean_rel': float(rel.mean())}
+
+def error_histogram(err, buckets=ERROR_BUCKETS):
+    """Sample counts per |error| bucket: <= 0.5, (0.5, 1], ... , > 65536 ULP."""
+    counts = np.bincount(np.searchsorted(buckets, np.abs(err), side='left'), minlength=len(buckets) + 1)
+    labels = [f"<={b:g}" for b in buckets] + [f">{buckets[-1]:g}"]
+    return dict(zip(labels, counts.tolist()))
+
+def domain_profile(coord, err, edges):
+    """Max / mean |error| per input-domain bin [edges[k], edges[k + 1])."""
+    bins = len(edges) - 1
+    idx = np.clip(np.searchsorted(edges, coord, side='right') - 1, 0, bins - 1)
+    a = np.abs(err)
+    count = np.bincount(idx, minlength=bins)
+    total = np.bincount(idx, weights=a, minlength=bins)
+    worst = np.zeros(bins)
+    np.maximum.at(worst, idx, a)
+    return [{'lo': float(edges[k]), 'hi': float(edges[k + 1]), 'samples': int(count[k]),
+             'max_ulp': float(worst[k]), 'mean_ulp': float(total[k] / count[k]) if count[k] else 0.0}
+            for k in range(bins)]
+
+def _result(unit, variant, domain, inputs, out, ref, coord, edges, regions=None):
+    err = ulp_error(out, ref)
+    result = {'unit': unit, 'variant': variant, 'domain': domain, **error_stats(err, ref)}
+    worst = int(np.argmax(np.abs(err)))
+    result['worst_input'] = [int(w[worst]) for w in inputs]
+    result['histogram'] = error_histogram(err)
+    result['profile'] = domain_profile(coord, err, edges)
+    if regions:
+        result['regions'] = {name: error_stats(err[mask], ref[mask]) for name, mask in regions.items() if mask.any()}
+    return result
+
+def _log_uniform(rng, n, lo_bits, hi_bits):
+    """Positive words spread evenly over the octaves 2^lo_bits .. 2^hi_bits (in LSBs)."""
+    return np.floor(2.0 ** rng.uniform(lo_bits, hi_bits, n)).astype(np.int64)
+
+# ==============================================================================
+# 2. UNIT SWEEPS (Exhaustive Where the Domain Allows, Sampled Otherwise)
+# ==============================================================================
+def sweep_norm_seed_lut():
+    """Seed 1/x over every Q16.16 word in [1, 2), one profile bin per LUT entry."""
+    x = np.arange(ONE, 2 * ONE, dtype=np.int64)
+    return [_result('norm_seed_lut', '32 entries (RTL)', '[1, 2) exhaustive', [x], norm_seed_lut(x),
+                    2.0 ** 32 / x, x / ONE, np.linspace(1.0, 2.0, 33))]
+
+def sweep_reciprocal_unit(steps=(1, 2, 3, 4, 5, 6)):
+    """reciprocal_unit over every word in [1, 2) for each Newton step count."""
+    x = np.arange(ONE, 2 * ONE, dtype=np.int64)
+    return [_result('reciprocal_unit', f"{s} steps{' (RTL)' if s == 6 else ''}", '[1, 2) exhaustive', [x],
+                    reciprocal_unit(x, s), 2.0 ** 32 / x, x / ONE, np.linspace(1.0, 2.0, 33))
+            for s in steps]
+
+def sweep_reciprocal_wrapper(n, rng, steps=(3, 6)):
+    """Signed words with |x| log-uniform over all 31 magnitude bits (profile per octave)."""
+    x = _log_uniform(rng, n, 0, 31) * rng.choice([-1, 1], n)
+    coord = np.log2(np.abs(x) / ONE)
+    return [_result('reciprocal_wrapper', f"{s} steps{' (RTL)' if s == 6 else ''}", '|x| in 2^-16 .. 2^15',
+                    [x], reciprocal_wrapper(x, s), 2.0 ** 32 / x, coord, np.arange(-16, 16))
+            for s in steps]
+
+def sweep_inv_sqrt_direct(n, rng, steps=(1, 2)):
+    """Positive words log-uniform over all 31 magnitude bits (profile per octave)."""
+    x = _log_uniform(rng, n, 0, 31)
+    coord = np.log2(x / ONE)
+    return [_result('inv_sqrt_direct', f"{s} Newton step{'s' if s > 1 else ''}{' (RTL)' if s == 1 else ''}",
+                    'x in 2^-16 .. 2^15', [x], inv_sqrt_direct(x, s), 2.0 ** 24 / np.sqrt(x), coord,
+                    np.arange(-16, 16))
+            for s in steps]
+
+def sweep_acos_poly():
+    """Every word in [-1, 1], split into the clamp / shoulder / Maclaurin regions of the router."""
+    x = np.arange(-ONE, ONE + 1, dtype=np.int64)
+    a = np.abs(x)
+    regions = {'center |x|<=0.75': a <= 0xC000, 'shoulder 0.75<|x|<0.9375': (a > 0xC000) & (a < 0xF000),
+               'clamp |x|>=0.9375': a >= 0xF000}
+    return [_result('acos_poly', 'Horner cubic + linear shoulders (RTL)', '[-1, 1] exhaustive', [x],
+                    acos_poly(wrap32(x)), np.arccos(x / ONE) * ONE, x / ONE, np.linspace(-1.0, 1.0, 17), regions)]
+
+def sweep_cordic_atan2(n, rng, steps=(8, 10, 12, 14, 15, 16)):
+    """
+    Uniform angles at log-uniform radii 2^-6 .. 2 (the dihedral core feeds
+    dot products of unit vectors). Errors are wrapped to (-pi, pi]; the
+    profile is over the angle, the regions over the radius.
+    """
+    theta = rng.uniform(-np.pi, np.pi, n)
+    r = 2.0 ** rng.uniform(-6, 1, n)
+    x = np.trunc(r * np.cos(theta) * ONE).astype(np.int64)
+    y = np.trunc(r * np.sin(theta) * ONE).astype(np.int64)
+    ref = np.arctan2(y, x) * ONE
+    radius = np.hypot(x, y) / ONE
+    regions = {f"r<{hi:g}" if lo == 0 else f"{lo:g}<=r<{hi:g}": (radius >= lo) & (radius < hi)
+               for lo, hi in ((0, 2 ** -4), (2 ** -4, 2 ** -2), (2 ** -2, 1), (1, 4))}
+    results = []
+    for s in steps:
+        out = cordic_atan2(wrap32(x), wrap32(y), s).astype(np.float64)
+        wrapped = ref + np.round((out - ref) / (2 * np.pi * ONE)) * 2 * np.pi * ONE
+        results.append(_result('cordic_atan2', f"{s} steps{' (RTL)' if s == 16 else ''}",
+                               'angle (-pi, pi], r in 2^-6 .. 2', [x, y], out, wrapped, theta,
+                               np.linspace(-np.pi, np.pi, 17), regions))
+    return results
+
+# ==============================================================================
+# 3. FORCE ERROR (Bit-Exact Cores vs float64 of the Same Formulas)
+# ==============================================================================
+# The float references mirror the RTL formulas term for term (including the
+# unnormalised angle-plane normal and the unwrapped dihedral d_phi), so the
+# difference is arithmetic error only. 'units' re-runs the float reference
+# with just the approximating unit's output substituted, which splits the
+# total into what the unit contributes and what qmult truncation adds.
+def _unit(rng, n):
+    v = rng.normal(size=(n, 3))
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+def _value(words):
+    return np.asarray(words, dtype=np.float64) / ONE
+
+def _force_stats(core, fixed, exact, units, dropped=0):
+    err = np.linalg.norm(_value(fixed) - exact, axis=-1).ravel()
+    unit_err = np.linalg.norm(units - exact, axis=-1).ravel()
+    mag = np.linalg.norm(exact, axis=-1).ravel()
+    rel = err[mag > 1e-3] / mag[mag > 1e-3]
+    return {'core': core, 'forces': int(err.size), 'dropped': dropped,
+            'max_abs': float(err.max()), 'mean_abs': float(err.mean()), 'p99_abs': float(np.percentile(err, 99)),
+            'median_rel': float(np.median(rel)), 'p99_rel': float(np.percentile(rel, 99)),
+            'units_max_abs': float(unit_err.max()), 'units_mean_abs': float(unit_err.mean())}
+
+def _nb_float(d, qq, sigma_sq, eps_x24, kc, r2_inv, inv_r):
+    sr2 = sigma_sq * r2_inv
+    sr6 = sr2 ** 3
+    f = qq * r2_inv * kc + (2.0 * sr6 * sr6 - sr6) * eps_x24 * r2_inv
+    return -(f * inv_r)[:, None] * d
+
+def nonbonded_force_error(n, rng):
+    """Pairs 2.5-12 A apart; reciprocal_wrapper and inv_sqrt_direct are the approximating units."""
+    pi = rng.uniform(-10.0, 10.0, (n, 3))
+    pj = pi + _unit(rng, n) * rng.uniform(2.5, 12.0, n)[:, None]
+    wi, wj = to_q16(pi), to_q16(pj)
+    q_i, q_j = to_q16(rng.uniform(-0.8, 0.8, n)), to_q16(rng.uniform(-0.8, 0.8, n))
+    sigma_sq = to_q16(rng.uniform(2.5, 3.8, n) ** 2)
+    eps_x24 = to_q16(24.0 * rng.uniform(0.02, 0.2, n))
+    fixed = non_bonded_pipeline(wi, wj, q_i, q_j, sigma_sq, eps_x24)
+
+    d = _value(wi) - _value(wj)
+    r2 = (d * d).sum(axis=1)
+    args = (d, _value(q_i) * _value(q_j), _value(sigma_sq), _value(eps_x24), KC / ONE)
+    exact = _nb_float(*args, 1.0 / r2, 1.0 / np.sqrt(r2))
+    d64 = (wi.astype(np.int64) - wj)
+    r2_word = wrap32((d64 * d64).sum(axis=1) >> 16)
+    units = _nb_float(*args, _value(reciprocal_wrapper(r2_word)), _value(inv_sqrt_direct(r2_word)))
+    return _force_stats('non_bonded_pipeline', fixed, exact, units)
+
+def _angle_float(pa, pb, pc, theta0, k_theta, theta=None):
+    ba, bc = pa - pb, pc - pb
+    l_ba, l_bc = np.linalg.norm(ba, axis=1), np.linalg.norm(bc, axis=1)
+    u_ba, u_bc = ba / l_ba[:, None], bc / l_bc[:, None]
+    if theta is None: theta = np.arccos(np.clip((u_ba * u_bc).sum(axis=1), -1.0, 1.0))
+    normal = np.cross(u_ba, u_bc)
+    scale = (k_theta * (theta0 - theta))[:, None]
+    fa = scale * np.cross(normal, u_ba) / l_ba[:, None]
+    fc = scale * np.cross(u_bc, normal) / l_bc[:, None]
+    return np.stack([fa, -(fa + fc), fc], axis=1), (u_ba * u_bc).sum(axis=1)
+
+def angle_force_error(n, rng):
+    """Angles 20-160 degrees on 1.0-1.6 A bonds; acos_poly is the approximating unit."""
+    theta = rng.uniform(0.35, np.pi - 0.35, n)
+    u1 = _unit(rng, n)
+    w = _unit(rng, n)
+    w -= (w * u1).sum(axis=1, keepdims=True) * u1
+    w /= np.linalg.norm(w, axis=1, keepdims=True)
+    pb = rng.uniform(-10.0, 10.0, (n, 3))
+    pa = pb + u1 * rng.uniform(1.0, 1.6, n)[:, None]
+    pc = pb + (np.cos(theta)[:, None] * u1 + np.sin(theta)[:, None] * w) * rng.uniform(1.0, 1.6, n)[:, None]
+    wa, wb, wc = to_q16(pa), to_q16(pb), to_q16(pc)
+    theta0, k_theta = to_q16(rng.uniform(1.6, 2.2, n)), to_q16(rng.uniform(30.0, 120.0, n))
+    fixed = np.stack(angle_force_core(wa, wb, wc, theta0, k_theta), axis=1)
+
+    geometry = (_value(wa), _value(wb), _value(wc), _value(theta0), _value(k_theta))
+    exact, cos = _angle_float(*geometry)
+    units, _ = _angle_float(*geometry, theta=_value(acos_poly(to_q16(cos))))
+    return _force_stats('angle_force_core', fixed, exact, units)
+
+def _dihedral_float(pa, pb, pc, pd, phi0, k_phi, phi=None):
+    b1, b2, b3 = pb - pa, pc - pb, pd - pc
+    n1, n2 = np.cross(b1, b2), np.cross(b2, b3)
+    l_b2, l_n1, l_n2 = (np.linalg.norm(v, axis=1) for v in (b2, n1, n2))
+    u_b2, u_n1, u_n2 = b2 / l_b2[:, None], n1 / l_n1[:, None], n2 / l_n2[:, None]
+    cos, sin = (u_n1 * u_n2).sum(axis=1), (np.cross(u_n1, u_b2) * u_n2).sum(axis=1)
+    if phi is None: phi = np.arctan2(sin, cos)
+    torque = k_phi * (phi - phi0)
+    fa = (torque * l_b2 / l_n1)[:, None] * u_n1
+    fd = -(torque * l_b2 / l_n2)[:, None] * u_n2
+    return np.stack([fa, -fa, -fd, fd], axis=1), cos, sin
+
+def _random_rotations(rng, n):
+    q, r = np.linalg.qr(rng.normal(size=(n, 3, 3)))
+    return q * np.sign(np.diagonal(r, axis1=1, axis2=2))[:, None, :]
+
+def dihedral_force_error(n, rng):
+    """
+    1.3-1.6 A bonds, 100-125 degree angles, any torsion; cordic_atan2 is the
+    approximating unit. Torsions within 0.05 rad of +/-pi are dropped: the RTL
+    does not wrap d_phi, so a 2 pi branch flip there is a formula artefact.
+    """
+    l1, l2, l3 = (rng.uniform(1.3, 1.6, n) for _ in range(3))
+    t1, t2 = (rng.uniform(np.radians(100), np.radians(125), n) for _ in range(2))
+    tor = rng.uniform(-np.pi, np.pi, n)
+    zero = np.zeros(n)
+    local = np.stack([np.column_stack([l1 * np.cos(t1), l1 * np.sin(t1), zero]),
+                      np.zeros((n, 3)),
+                      np.column_stack([l2, zero, zero]),
+                      np.column_stack([l2 - l3 * np.cos(t2), l3 * np.sin(t2) * np.cos(tor),
+                                       l3 * np.sin(t2) * np.sin(tor)])], axis=1)
+    pos = np.einsum('nij,nkj->nki', _random_rotations(rng, n), local) + rng.uniform(-10.0, 10.0, (n, 1, 3))
+    words = to_q16(pos)
+    phi0, k_phi = to_q16(rng.uniform(-np.pi, np.pi, n)), to_q16(rng.uniform(0.2, 3.0, n))
+
+    geometry = tuple(_value(words[:, k]) for k in range(4)) + (_value(phi0), _value(k_phi))
+    exact, cos, sin = _dihedral_float(*geometry)
+    keep = np.abs(np.arctan2(sin, cos)) < np.pi - 0.05
+    fixed = np.stack(dihedral_force_core(*(words[keep, k] for k in range(4)), phi0[keep], k_phi[keep]), axis=1)
+    units, _, _ = _dihedral_float(*(g[keep] for g in geometry),
+                                  phi=_value(cordic_atan2(to_q16(cos[keep]), to_q16(sin[keep]))))
+    return _force_stats('dihedral_force_core', fixed, exact[keep], units, dropped=int((~keep).sum()))
+
+# ==============================================================================
+# 4. ANALYSIS DRIVER AND REPORT
+# ==============================================================================
+def run_analysis(samples=1 << 22, geometries=100_000, seed=0):
+    """All unit sweeps (exhaustive domains ignore `samples`) and the three force cores."""
+    rng = np.random.default_rng(seed)
+    units = (sweep_norm_seed_lut() + sweep_reciprocal_unit() + sweep_reciprocal_wrapper(samples, rng)
+             + sweep_inv_sqrt_direct(samples, rng) + sweep_acos_poly() + sweep_cordic_atan2(samples, rng))
+    forces = [nonbonded_force_error(geometries, rng), angle_force_error(geometries, rng),
+              dihedral_force_error(geometries, rng)]
+    return {'samples': samples, 'geometries': geometries, 'seed': seed, 'units': units, 'forces': forces}
+
+def print_report(report):
+    print(f"{'unit':<19} {'variant':<38} {'max ULP':>11} {'mean ULP':>10} {'bias':>9} {'p99':>9} {'max rel':>9}")
+    for r in report['units']:
+        print(f"{r['unit']:<19} {r['variant']:<38} {r['max_ulp']:11.1f} {r['mean_ulp']:10.2f} "
+              f"{r['bias_ulp']:9.2f} {r['p99_ulp']:9.1f} {r['max_rel']:9.2e}")
+        for name, s in r.get('regions', {}).items():
+            print(f"{'':<19}   {name:<36} {s['max_ulp']:11.1f} {s['mean_ulp']:10.2f} {s['bias_ulp']:9.2f}")
+
+    print("\n|error| histograms of the RTL configurations (sample counts per ULP bucket):")
+    for r in report['units']:
+        if 'RTL' not in r['variant']: continue
+        print(f"  {r['unit']:<19} " + " ".join(f"{k}:{v}" for k, v in r['histogram'].items() if v))
+
+    print("\nForce error vs float64 of the same formulas (kcal/mol/A; 1 ULP = 1.5e-5):")
+    print(f"{'core':<21} {'forces':>8} {'max':>10} {'mean':>10} {'p99':>10} {'median rel':>11} "
+          f"{'units max':>10} {'units mean':>11}")
+    for f in report['forces']:
+        print(f"{f['core']:<21} {f['forces']:8d} {f['max_abs']:10.2e} {f['mean_abs']:10.2e} {f['p99_abs']:10.2e} "
+              f"{f['median_rel']:11.2e} {f['units_max_abs']:10.2e} {f['units_mean_abs']:11.2e}"
+              + (f"  ({f['dropped']} near +/-pi dropped)" if f['dropped'] else ""))
+
+def plot_profiles(report, filename):
+    """Max and mean |ULP| per input-domain bin, one panel per unit (needs matplotlib)."""
+    import matplotlib.pyplot as plt
+
+    names = list(dict.fromkeys(r['unit'] for r in report['units']))
+    fig, axes = plt.subplots(len(names), 1, figsize=(8, 2.6 * len(names)))
+    for ax, name in zip(np.atleast_1d(axes), names):
+        for r in (r for r in report['units'] if r['unit'] == name):
+            mid = [(b['lo'] + b['hi']) / 2 for b in r['profile']]
+            ax.semilogy(mid, [max(b['max_ulp'], 1e-2) for b in r['profile']], marker='.', label=r['variant'])
+        ax.set_title(f"{name}: max |error| per bin, {r['domain']}", fontsize=9)
+        ax.set_ylabel("ULP")
+        ax.legend(fontsize=7)
+    fig.tight_layout()
+    fig.savefig(filename, dpi=120)
+    print(f"Saved {filename}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ULP and force error of the Q16.16 arithmetic units.")
+    parser.add_argument("-n", "--samples", type=int, default=1 << 22, help="inputs per sampled sweep")
+    parser.add_argument("--geometries", type=int, default=100_000, help="pairs / angles / dihedrals per force core")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the full report (histograms and profiles) here")
+    parser.add_argument("--plot", help="save the per-bin error profiles to this image")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    report = run_analysis(args.samples, args.geometries, args.seed)
+    print_report(report)
+    print(f"\nAnalysed in {time.perf_counter() - t0:.1f} s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"Wrote {args.json}")
+    if args.plot:
+        plot_profiles(report, args.plot)
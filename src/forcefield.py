@@ -0,0 +1,186 @@
+# ==============================================================================
+# SHARED CHARMM FORCE FIELD (Single-Pass .prm / .rtf Loader)
+# ==============================================================================
+# Every parameter compiler imports this one ForceField, so one streaming read of
+# the .prm fills all sections at once and the ff_cache index is shared by all of
+# them (forcefield_init.hex, nonbonded_lut.hex and the mixing matrix alike).
+
+PRM_SECTIONS = ('ATOMS', 'BONDS', 'ANGLES', 'DIHEDRALS', 'IMPROPER', 'CMAP',
+                'NONBONDED', 'NBFIX', 'HBOND', 'END')
+
+class ForceField:
+    def __init__(self):
+        self.masses = {}       # Key: AtomType -> mass
+        self.bonds = {}        # Key: (Type1, Type2) -> (kb, r0)
+        self.angles = {}       # Key: (Type1, Type2, Type3) -> (ktheta, theta0)
+        self.dihedrals = {}    # Key: (Type1, Type2, Type3, Type4) -> (kchi, n, delta), last term
+        self.dihedral_terms = {} # Key: (Type1, Type2, Type3, Type4) -> [(kchi, n, delta), ...]
+        self.impropers = {}    # Key: (Type1, Type2, Type3, Type4) -> (kpsi, psi0)
+        self.cmap = {}         # Key: (8 Types) -> [grid values], row-major (phi, psi)
+        self.nonbonded = {}    # Key: AtomType -> (Epsilon, Rmin/2)
+        self.nonbonded14 = {}  # Key: AtomType -> (Epsilon, Rmin/2) for 1-4 pairs
+        self.nbfix = {}        # Key: (Type1, Type2) -> (Emin, Rmin)
+        self.atom_types = {}   # Key: (ResName, AtomName) -> (AtomType, Charge)
+        self.residues = {}     # Key: ResName -> [AtomName, ...] in topology order
+        self.residue_bonds = {} # Key: ResName -> [(AtomName, AtomName), ...], '+N'/'-C' = next/previous residue
+
+    # ==========================================================================
+    # 1. PARAMETER FILE (.prm)
+    # ==========================================================================
+    def load_prm(self, filename):
+        """Parses every section of the .prm parameter file in one pass."""
+        section = None
+        cmap_key, cmap_left = None, 0
+        with open(filename, 'r') as f:
+            for line in f:
+                # 1. Strip inline comments and whitespace safely
+                line = line.split('!')[0].strip()
+                if not line: continue
+
+                # 2. Detect ALL possible CHARMM Sections to prevent bleed-over
+                head = line.split(None, 1)[0]
+                if head in PRM_SECTIONS:
+                    section = head
+                    continue
+                if section == 'END': break
+
+                parts = line.split()
+
+                # 3. Safe Parsing: check column counts, skip header/flag lines
+                try:
+                    if section == 'ATOMS' and parts[0] == 'MASS' and len(parts) >= 4:
+                        # Format: MASS Index Type Mass
+                        self.masses[parts[2]] = float(parts[3])
+
+                    elif section == 'BONDS' and len(parts) >= 4:
+                        # Format: Atom1 Atom2 Kb r0
+                        key = tuple(sorted((parts[0], parts[1])))
+                        self.bonds[key] = (float(parts[2]), float(parts[3]))
+
+                    elif section == 'ANGLES' and len(parts) >= 5:
+                        # Format: Atom1 Atom2 Atom3 Ktheta Theta0 [Kub S0]
+                        key = (min(parts[0], parts[2]), parts[1], max(parts[0], parts[2]))
+                        self.angles[key] = (float(parts[3]), float(parts[4]))
+
+                    elif section == 'DIHEDRALS' and len(parts) >= 7:
+                        # Format: A B C D Kchi n delta
+                        key = tuple(parts[0:4])
+                        term = (float(parts[4]), int(parts[5]), float(parts[6]))
+                        self.dihedrals[key] = term
+                        # Multi-term torsions repeat the key once per multiplicity n;
+                        # a repeated n replaces the earlier term (CHARMM semantics)
+                        terms = self.dihedral_terms.setdefault(key, [])
+                        terms[:] = [t for t in terms if t[1] != term[1]] + [term]
+
+                    elif section == 'IMPROPER' and len(parts) >= 7:
+                        # Format: A B C D Kpsi 0 psi0
+                        key = tuple(parts[0:4])
+                        self.impropers[key] = (float(parts[4]), float(parts[6]))
+
+                    elif section == 'CMAP':
+                        # Header: 8 atom types + grid resolution, then resolution^2 values
+                        if cmap_left == 0 and len(parts) == 9:
+                            cmap_key = tuple(parts[0:8])
+                            cmap_left = int(parts[8]) ** 2
+                            self.cmap[cmap_key] = []
+                        elif cmap_left > 0:
+                            values = [float(v) for v in parts]
+                            self.cmap[cmap_key].extend(values)
+                            cmap_left -= len(values)
+
+                    elif section == 'NONBONDED' and len(parts) >= 4:
+                        # Format: AtomType Ignored Epsilon Rmin/2 [Ignored Eps14 Rmin14/2]
+                        # Header lines ('cutnb 14.0 ctofnb ...') fail the float() and are skipped
+                        epsilon, rmin_half = abs(float(parts[2])), float(parts[3])
+                        self.nonbonded[parts[0]] = (epsilon, rmin_half)
+                        if len(parts) >= 7:
+                            self.nonbonded14[parts[0]] = (abs(float(parts[5])), float(parts[6]))
+
+                    elif section == 'NBFIX' and len(parts) >= 4:
+                        # Format: Atom1 Atom2 Emin Rmin [Emin14 Rmin14]
+                        key = tuple(sorted((parts[0], parts[1])))
+                        self.nbfix[key] = (abs(float(parts[2])), float(parts[3]))
+                except ValueError:
+                    continue
+
+    # ==========================================================================
+    # 2. TOPOLOGY FILE (.rtf)
+    # ==========================================================================
+    def load_rtf(self, filename):
+        """Parses the .rtf topology file to get Atom Types, Charges and Bonds."""
+        current_residue = None
+        with open(filename, 'r') as f:
+            for line in f:
+                parts = line.split('!')[0].split()
+                if not parts: continue
+
+                # Patches (PRES) get their own entries instead of overwriting the last RESI
+                if parts[0] in ('RESI', 'PRES'):
+                    current_residue = parts[1]
+                    self.residues[current_residue] = []
+                    self.residue_bonds[current_residue] = []
+
+                elif parts[0] == 'ATOM' and current_residue:
+                    # Format: ATOM Name Type Charge
+                    # Map: (Residue, AtomName) -> (AtomType, Charge)
+                    self.atom_types[(current_residue, parts[1])] = (parts[2], float(parts[3]))
+                    self.residues[current_residue].append(parts[1])
+
+                elif parts[0] in ('BOND', 'DOUBLE', 'TRIPLE') and current_residue:
+                    # Format: BOND A1 A2 [A3 A4 ...] -> pairs (A1-A2), (A3-A4), ...
+                    names = parts[1:]
+                    self.residue_bonds[current_residue].extend(zip(names[0::2], names[1::2]))
+
+    # ==========================================================================
+    # 3. PARAMETER LOOKUP LOGIC
+    # ==========================================================================
+    def get_bond_params(self, t1, t2):
+        key = tuple(sorted((t1, t2)))
+        params = self.bonds.get(key)
+        if params: return params # (kb, r0)
+        return (0.0, 0.0) # Default if not found
+
+    def get_angle_params(self, t1, t2, t3):
+        # Center atom (t2) must match. Outer atoms (t1, t3) can swap.
+        key = (min(t1, t3), t2, max(t1, t3))
+        params = self.angles.get(key)
+        if params: return params # (ktheta, theta0)
+        return (0.0, 90.0)
+
+    @staticmethod
+    def dihedral_keys(t1, t2, t3, t4):
+        """Search order of both dihedral lookups: exact, reversed, then the (X, t2, t3, X) wildcard both ways."""
+        return ((t1, t2, t3, t4), (t4, t3, t2, t1), ('X', t2, t3, 'X'), ('X', t3, t2, 'X'))
+
+    def get_dihedral_params(self, t1, t2, t3, t4):
+        """Last .prm line of the torsion (a single term)."""
+        for key in self.dihedral_keys(t1, t2, t3, t4):
+            if key in self.dihedrals: return self.dihedrals[key]
+        return (0.0, 1, 180.0) # Default: No barrier, Trans conformation
+
+    def get_dihedral_terms(self, t1, t2, t3, t4):
+        """Full Fourier series for a torsion: [(kchi, n, delta), ...]."""
+        for key in self.dihedral_keys(t1, t2, t3, t4):
+            if key in self.dihedral_terms: return self.dihedral_terms[key]
+        return [(0.0, 1, 180.0)]
+
+    # ==========================================================================
+    # 4. NON-BONDED LOOKUP & MATH CONVERSION
+    # ==========================================================================
+    def get_nonbonded_hardware_params(self, res_name, atom_name):
+        """Fetches and converts parameters to hardware-ready formats."""
+        # 1. Get Type and Charge
+        atom_type, q = self.atom_types.get((res_name, atom_name), ("UNKNOWN", 0.0))
+
+        # 2. Get VDW params
+        epsilon, rmin_half = self.nonbonded.get(atom_type, (0.0, 0.0))
+
+        # 3. Math Conversions for Hardware
+        # Sigma = Rmin / (2^(1/6)) = (2 * Rmin_half) / 1.122462
+        sigma = (2.0 * rmin_half) / 1.12246204831
+        sigma_sq = sigma * sigma
+
+        # Epsilon scaled by 24 for the derivative calculation in hardware
+        eps_x24 = epsilon * 24.0
+
+        return q, sigma_sq, eps_x24, atom_type
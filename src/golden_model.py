@@ -0,0 +1,741 @@
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fixed_point import KC
+
+# ==============================================================================
+# 1. Q16.16 DATAPATH PRIMITIVES (Bit-Accurate)
+# ==============================================================================
+# Words live in int32 arrays, so sums and differences wrap exactly like the
+# 32-bit registers; only products are widened to int64 (the 64-bit temp of the
+# Verilog qmult). The helpers mirror the Verilog functions of the same name.
+MASK32 = 0xFFFFFFFF
+ONE = 0x00010000
+
+def wrap32(x):
+    """Two's-complement truncation to 32 bits (what assigning to a [31:0] reg does)."""
+    return np.asarray(x).astype(np.int64).astype(np.int32)
+
+def qmult(a, b):
+    """qmult() of md_system_top and the cores: bits [47:16] of the 64-bit product."""
+    return ((np.asarray(a, dtype=np.int64) * b) >> 16).astype(np.int32)
+
+def qmult_round(a, b):
+    """reciprocal_unit's qmult: adds 0.5 LSB (0x8000) before taking bits [47:16]."""
+    return ((np.asarray(a, dtype=np.int64) * b + 0x8000) >> 16).astype(np.int32)
+
+CLAMP_LIMIT = 0x00008000 # clamp_move LIMIT localparam (0.5 A)
+
+def clamp_move(move, limit=CLAMP_LIMIT):
+    """Per-iteration move limit of S_APPLY_UPDATE (0.5 A)."""
+    return np.clip(move, -limit, limit)
+
+def _bit_length(u):
+    """Bit length of non-negative integers below 2^53 (exact through float64)."""
+    return np.frexp(np.asarray(u, dtype=np.float64))[1].astype(np.int64)
+
+def isqrt64(s):
+    """
+    floor(sqrt(s)) of a uint64 sum of squares: the digit-by-digit loop of
+    bonded_force_core / vector_normalizer (curr_bit from 2^62 down to 1).
+    float64 gets within one of the root; two correction passes make it exact.
+    """
+    s = np.asarray(s, dtype=np.uint64)
+    r = np.floor(np.sqrt(s.astype(np.float64))).astype(np.uint64)
+    for _ in range(2):
+        r = np.where(r * r > s, r - np.uint64(1), r)
+        r = np.where((r + np.uint64(1)) * (r + np.uint64(1)) <= s, r + np.uint64(1), r)
+    return r
+
+def _sum_sq(v):
+    """(..., 3) words -> uint64 sum of the three 64-bit squares."""
+    v = np.asarray(v, dtype=np.int64)
+    return (v * v).astype(np.uint64).sum(axis=-1, dtype=np.uint64)
+
+def _recip64(res):
+    """64'h1_0000_0000 / res into a 32-bit reg (0 when res == 0)."""
+    safe = np.where(res == 0, np.uint64(1), res)
+    return np.where(res == 0, 0, (np.uint64(1 << 32) // safe).astype(np.int64)).astype(np.int32)
+
+def cross(a, b):
+    """vector_cross_product: qmult-based cross product over the last axis."""
+    ax, ay, az = a[..., 0], a[..., 1], a[..., 2]
+    bx, by, bz = b[..., 0], b[..., 1], b[..., 2]
+    return np.stack([qmult(ay, bz) - qmult(az, by),
+                     qmult(az, bx) - qmult(ax, bz),
+                     qmult(ax, by) - qmult(ay, bx)], axis=-1)
+
+def qdot(a, b):
+    """Sum of three qmult terms, as in the angle/dihedral dot products."""
+    p = qmult(a, b)
+    return p[..., 0] + p[..., 1] + p[..., 2]
+
+# --- 16-bit LFSR of the symmetry breaker (seed 0xACE1, taps 15^13^12^10) ---
+LFSR_SEED = 0xACE1
+LFSR_PERIOD = 65535
+
+def _lfsr_sequence():
+    states = np.empty(LFSR_PERIOD, dtype=np.int64)
+    s = LFSR_SEED
+    for k in range(LFSR_PERIOD):
+        states[k] = s
+        s = ((s << 1) & 0xFFFF) | (((s >> 15) ^ (s >> 13) ^ (s >> 12) ^ (s >> 10)) & 1)
+    return states
+
+LFSR_STATES = _lfsr_sequence()
+LFSR_INDEX = {int(s): k for k, s in enumerate(LFSR_STATES)}
+
+def lfsr_after(cycles, start=LFSR_SEED):
+    """LFSR value `cycles` clocks after it held `start` (it shifts every clock)."""
+    return int(LFSR_STATES[(LFSR_INDEX[start] + cycles) % LFSR_PERIOD])
+
+# ==============================================================================
+# 2. PARAMETER SOURCES (parameter_ram / residue_database / atom_type_table)
+# ==============================================================================
+# parameter_ram row layout, most significant field first (260 bits):
+#   {r0, kb, theta0, k_theta, phi0, k_phi, n[3:0], q_a, q_d}
+PARAM_FIELDS = ('r0', 'kb', 'theta0', 'k_theta', 'phi0', 'k_phi', 'n', 'q_a', 'q_d')
+PARAM_WIDTHS = (32, 32, 32, 32, 32, 32, 4, 32, 32)
+
+def load_parameter_ram(filename="forcefield_init.hex", depth=1024):
+    """
+    $readmemh of parameter_ram: one 260-bit word per line, '//' comments
+    skipped, unlisted rows left at zero. Returns a (depth, 9) int64 array of
+    signed fields in PARAM_FIELDS order (n is the unsigned 4-bit period).
+    """
+    rows = np.zeros((depth, len(PARAM_FIELDS)), dtype=np.int64)
+    addr = 0
+    with open(filename, 'r') as f:
+        for line in f:
+            for token in line.split('//')[0].split():
+                if token.startswith('@'):
+                    addr = int(token[1:], 16)
+                    continue
+                rows[addr] = decode_parameter_word(int(token, 16))
+                addr += 1
+    return rows
+
+def decode_parameter_word(word):
+    """One 260-bit parameter_ram word -> signed fields in PARAM_FIELDS order."""
+    fields, shift = [], sum(PARAM_WIDTHS)
+    for width in PARAM_WIDTHS:
+        shift -= width
+        field = (word >> shift) & ((1 << width) - 1)
+        fields.append(field - (1 << 32) if width == 32 and field >> 31 else field)
+    return fields
+
+# atom_type_table default entry: what an unknown type id (or an undriven
+# res_id / atom_idx on the regfile, as in project.v) resolves to
+DEFAULT_SIGMA, DEFAULT_EPSILON = 0x00018000, 0x00001999
+
+def _readmemh_image(text, verilog_file):
+    """Words of the ROM image a generated module $readmemh's, or None for a case table."""
+    m = re.search(r'\$readmemh\s*\(\s*"([^"]+)"', text)
+    if m is None: return None
+    with open(os.path.join(os.path.dirname(verilog_file), m.group(1)), 'r') as f:
+        return [int(w, 16) for line in f for w in line.split('//')[0].split()]
+
+def load_type_tables(rdb_file="residue_database.v", att_file="atom_type_table.v"):
+    """
+    Reads the two lookup ROMs straight from their Verilog case statements (or
+    from the $readmemh images of lookup_table_compiler.py --rom). Returns
+    ({(res_id, atom_idx): type_id}, {type_id: (sigma, eps)}, (default_sigma, default_eps)).
+    """
+    type_ids, res = {}, None
+    with open(rdb_file, 'r') as f:
+        text = f.read()
+    image = _readmemh_image(text, rdb_file)
+    if image is not None:
+        # {is_last_atom, is_backbone, param_out} at address {residue_id, atom_index}
+        type_ids = {(addr >> 4, addr & 15): word & 0xFFFF for addr, word in enumerate(image)}
+    for line in text.splitlines() if image is None else []:
+        m = re.match(r"\s*5'd(\d+)\s*:\s*begin", line)
+        if m: res = int(m.group(1))
+        m = re.match(r"\s*4'd(\d+)\s*:.*param_out\s*=\s*\{.*16'h([0-9A-Fa-f]+)\s*\}", line)
+        if m and res is not None:
+            type_ids[(res, int(m.group(1)))] = int(m.group(2), 16)
+
+    lj, default = {}, (DEFAULT_SIGMA, DEFAULT_EPSILON)
+    with open(att_file, 'r') as f:
+        text = f.read()
+    image = _readmemh_image(text, att_file)
+    if image is not None:
+        # {sigma_q16, epsilon_q16} per type id; ids past the image read the default
+        lj = {tid: (word >> 32, word & MASK32) for tid, word in enumerate(image)}
+        default = tuple(int(v, 16) for v in re.search(
+            r"else\s*\{sigma_q16,\s*epsilon_q16\}\s*=\s*\{32'h([0-9A-Fa-f]+),\s*32'h([0-9A-Fa-f]+)\}", text).groups())
+        return type_ids, lj, default
+    for labels, body in re.findall(r"((?:16'h[0-9A-Fa-f]+\s*,?\s*)+|default)\s*:\s*begin(.*?)end", text, re.S):
+        sigma = int(re.search(r"sigma_q16\s*=\s*32'h([0-9A-Fa-f_]+)", body).group(1).replace('_', ''), 16)
+        eps = int(re.search(r"epsilon_q16\s*=\s*32'h([0-9A-Fa-f_]+)", body).group(1).replace('_', ''), 16)
+        if labels == 'default':
+            default = (sigma, eps)
+        else:
+            for tid in re.findall(r"16'h([0-9A-Fa-f]+)", labels):
+                lj[int(tid, 16)] = (sigma, eps)
+    return type_ids, lj, default
+
+# ==============================================================================
+# 3. PHYSICS CORE MODELS
+# ==============================================================================
+def vector_normalizer(v):
+    """(..., 3) -> (unit vector, inv_mag) exactly as vector_normalizer.v."""
+    res = isqrt64(_sum_sq(v))
+    inv_mag = _recip64(res)
+    return qmult(v, inv_mag[..., None]), inv_mag
+
+def bonded_force_core(p1, p2, r0, k):
+    """Force on atom 1 (atom 2 receives the negation)."""
+    d = p2 - p1
+    r_res = isqrt64(_sum_sq(d))
+    r = wrap32(r_res.astype(np.int64))
+    inv_r = _recip64(r_res)
+    f_scalar = qmult(k << 1, r - r0)
+    return qmult(f_scalar[..., None], qmult(d, inv_r[..., None]))
+
+# acos_poly coefficients / thresholds (signed Q16.16)
+MAC_C0, MAC_C1, MAC_C2, MAC_C3 = 0x0001921F, -0x0000FCF6, 0, -0x00002AAB
+EDGE_C1, EDGE_POS_C0, EDGE_NEG_C0 = -0x0002170A, 0x000250A3, 0x0000D374
+UPPER_CLAMP, UPPER_SHOULDER = 0x0000F000, 0x0000C000
+LOWER_SHOULDER, LOWER_CLAMP = -0x0000C000, -0x0000F000
+PI_RADS = 0x0003243F
+ACOS_CENTER = (MAC_C0, MAC_C1, MAC_C2, MAC_C3)     # c0 first
+ACOS_POS_EDGE = (EDGE_POS_C0, EDGE_C1, 0, 0)
+ACOS_NEG_EDGE = (EDGE_NEG_C0, EDGE_C1, 0, 0)
+
+def acos_poly(x, center=ACOS_CENTER, pos_edge=ACOS_POS_EDGE, neg_edge=ACOS_NEG_EDGE,
+              shoulder=UPPER_SHOULDER, clamp=UPPER_CLAMP):
+    """
+    Horner evaluation with the zero-cycle clamp/shoulder router (thresholds
+    are symmetric, +/-shoulder and +/-clamp). The RTL runs three Horner steps
+    on four coefficients; longer tuples model deeper polynomials.
+    """
+    pos = x > shoulder
+    neg = x < -shoulder
+    depth = max(len(center), len(pos_edge), len(neg_edge))
+    pad = lambda c: tuple(c) + (0,) * (depth - len(c))
+    coeffs = [wrap32(np.where(pos, p, np.where(neg, n, c)))
+              for c, p, n in zip(pad(center), pad(pos_edge), pad(neg_edge))]
+    acc = coeffs[-1]
+    for c in reversed(coeffs[:-1]):
+        acc = c + qmult(x, acc)
+    theta = np.where(x <= -clamp, PI_RADS, acc)
+    return np.where(x >= clamp, 0, theta)
+
+def angle_force_core(pa, pb, pc, theta0, k_theta):
+    """Returns (fa, fb, fc) for the A-B-C angle (B is the vertex)."""
+    u_ba, inv_ba = vector_normalizer(pa - pb)
+    u_bc, inv_bc = vector_normalizer(pc - pb)
+    d_theta = theta0 - acos_poly(qdot(u_ba, u_bc))
+
+    # Plane normal; collinear atoms get an invented normal (Y if BA lies on Z, else Z)
+    normal = cross(u_ba, u_bc)
+    flat = np.all(normal == 0, axis=-1)
+    on_z = (u_ba[..., 0] == 0) & (u_ba[..., 1] == 0)
+    invented = np.zeros_like(normal)
+    invented[..., 1] = np.where(on_z, ONE, 0)
+    invented[..., 2] = np.where(on_z, 0, ONE)
+    normal = np.where(flat[..., None], invented, normal)
+
+    scale = lambda dirn, inv_len: qmult(inv_len[..., None], qmult(k_theta[..., None],
+                                        qmult(d_theta[..., None], dirn)))
+    fa = scale(cross(normal, u_ba), inv_ba)
+    fc = scale(cross(u_bc, normal), inv_bc)
+    fb = -(fa + fc)
+    return fa, fb, fc
+
+CORDIC_LUT = (0xC90F, 0x76B1, 0x3EB6, 0x1FD5, 0x0FFA, 0x07FF, 0x0400, 0x0200,
+              0x0100, 0x0080, 0x0040, 0x0020, 0x0010, 0x0008, 0x0004, 0x0002)
+PI_OVER_2 = 0x0001921F
+
+def cordic_atan2(x, y, steps=16, lut=CORDIC_LUT):
+    """
+    Vectoring CORDIC with the +/-90 degree pre-rotation of cordic_atan2.v
+    (16 steps in the RTL; fewer use the first `steps` entries of lut).
+    """
+    q1 = x >= 0
+    q2 = ~q1 & (y >= 0)
+    xr = np.where(q1, x, np.where(q2, y, -y))
+    yr = np.where(q1, y, np.where(q2, -x, x))
+    z = wrap32(np.where(q1, 0, np.where(q2, PI_OVER_2, -PI_OVER_2)))
+    for step, angle in enumerate(lut[:steps]):
+        xs, ys = xr >> step, yr >> step
+        up = yr >= 0
+        xr, yr = np.where(up, xr + ys, xr - ys), np.where(up, yr - xs, yr + xs)
+        z = np.where(up, z + angle, z - angle)
+    return z
+
+def dihedral_force_core(pa, pb, pc, pd, phi0, k_phi):
+    """Returns (fa, fb, fc, fd); the RTL ignores n_period and uses a harmonic d_phi."""
+    b1, b2, b3 = pb - pa, pc - pb, pd - pc
+    n1, n2 = cross(b1, b2), cross(b2, b3)
+
+    u_b2, inv_b2 = vector_normalizer(b2)
+    mag_sq_b2 = qdot(b2, b2)
+    unit_x = np.zeros_like(n1)
+    unit_x[..., 0] = ONE
+    u_n1, inv_n1 = vector_normalizer(n1)
+    u_n2, inv_n2 = vector_normalizer(n2)
+    u_n1 = np.where(np.all(n1 == 0, axis=-1)[..., None], unit_x, u_n1)
+    u_n2 = np.where(np.all(n2 == 0, axis=-1)[..., None], unit_x, u_n2)
+
+    m1 = cross(u_n1, u_b2)
+    phi = cordic_atan2(qdot(u_n1, u_n2), qdot(m1, u_n2))
+
+    d_phi = phi - phi0
+    mag_b2 = qmult(mag_sq_b2, inv_b2)
+    torque = qmult(k_phi, d_phi)
+    coeff_a = qmult(torque, qmult(mag_b2, inv_n1))
+    coeff_d = -qmult(torque, qmult(mag_b2, inv_n2))
+
+    fa = qmult(coeff_a[..., None], u_n1)
+    fd = qmult(coeff_d[..., None], u_n2)
+    return fa, -fa, -fd, fd
+
+# norm_seed_lut: 1/x seeds for x in [1, 2), indexed by fraction bits [15:11]
+NORM_SEED_LUT = np.array([
+    0xFE00, 0xF400, 0xEB00, 0xE200, 0xDA00, 0xD200, 0xCB00, 0xC400,
+    0xBE00, 0xB800, 0xB200, 0xAC00, 0xA700, 0xA200, 0x9E00, 0x9900,
+    0x9500, 0x9100, 0x8D00, 0x8900, 0x8600, 0x8300, 0x8000, 0x7D00,
+    0x7A00, 0x7800, 0x7500, 0x7300, 0x7100, 0x6E00, 0x6C00, 0x6A00], dtype=np.int32)
+
+def norm_seed_lut(d_in, lut=NORM_SEED_LUT):
+    """1/x seed for d_in in [1, 2) from the top log2(len(lut)) fraction bits ([15:11] in the RTL)."""
+    bits = len(lut).bit_length() - 1
+    return lut[(np.asarray(d_in, dtype=np.int64) >> (16 - bits)) & (len(lut) - 1)]
+
+def reciprocal_unit(x_norm, steps=6, seed_lut=NORM_SEED_LUT):
+    """Newton steps y <- y * (2 - x * y) with the rounded qmult (six in the RTL)."""
+    y = norm_seed_lut(x_norm, seed_lut)
+    for _ in range(steps):
+        y = qmult_round(y, 2 * ONE - qmult_round(x_norm, y))
+    return y
+
+def reciprocal_wrapper(x, steps=6, seed_lut=NORM_SEED_LUT):
+    """Normalise to [1, 2), reciprocal_unit, denormalise, saturate."""
+    x = np.asarray(x, dtype=np.int64)
+    sign = x < 0
+    abs_x = np.where(sign, -x, x) & MASK32
+    lz = 31 - _bit_length(abs_x & 0x7FFFFFFF)   # leading one among bits [30:0]; 31 if none
+    lz = lz.astype(np.uint64)
+    x_norm = ((abs_x.astype(np.uint64) << lz) & np.uint64(MASK32)) >> np.uint64(14)
+    x_norm = x_norm.astype(np.int64)
+
+    y = reciprocal_unit(x_norm, steps, seed_lut)
+
+    shifted = ((y.astype(np.int64) & MASK32).astype(np.uint64) << lz) >> np.uint64(14)
+    y_unsigned = np.minimum(shifted, np.uint64(0x7FFFFFFF)).astype(np.int64)
+    return wrap32(np.where(sign, -y_unsigned, y_unsigned))
+
+# inv_sqrt_direct seed LUT for x_norm in [1, 4), indexed by bits [17:13] (8..31)
+INV_SQRT_LUT = np.full(32, ONE, dtype=np.int32)
+INV_SQRT_LUT[8:] = [
+    0xF858, 0xEAE7, 0xDF7A, 0xD57A, 0xCCCD, 0xC511, 0xBE22, 0xB7E8,
+    0xB241, 0xAD15, 0xA853, 0xA3F0, 0x9FE9, 0x9C25, 0x98A2, 0x955B,
+    0x924D, 0x8F6B, 0x8CBA, 0x8A23, 0x87A8, 0x8559, 0x831F, 0x8100]
+
+def inv_sqrt_direct(x, steps=1, lut=INV_SQRT_LUT):
+    """Even-shift normalisation, LUT seed and Newton-Raphson steps (one in the RTL)."""
+    ux = np.asarray(x, dtype=np.int64) & MASK32
+    msb = _bit_length(ux) - 1
+    p = np.where(msb >= 2, msb // 2, 0)
+    k = 8 - p
+    up = k >= 0
+    x_norm = np.where(up, (ux << np.where(up, 2 * k, 0)) & MASK32, ux >> np.where(up, 0, -2 * k))
+    y1 = lut[(x_norm >> 13) & 0x1F]
+    for _ in range(steps):
+        x_y_sq = qmult(wrap32(x_norm), qmult(y1, y1))
+        y1 = qmult(y1, 0x00018000 - (x_y_sq >> 1))
+    y1 = y1.astype(np.int64)
+    return wrap32(np.where(up, y1 << np.where(up, k, 0), (y1 & MASK32) >> np.where(up, 0, -k)))
+
+def non_bonded_pipeline(pi, pj, q_i, q_j, sigma_sq, eps_x24):
+    """Force on atom i for one streamed pair (atom j receives the negation)."""
+    d = pi - pj
+    d64 = d.astype(np.int64)
+    r2 = wrap32((d64 * d64).sum(axis=-1) >> 16)
+    r2_inv = reciprocal_wrapper(r2)
+    inv_r = inv_sqrt_direct(r2)
+
+    f_coulomb = qmult(qmult(qmult(q_i, q_j), r2_inv), KC)
+
+    sr2 = qmult(sigma_sq, r2_inv)
+    sr6 = qmult(qmult(sr2, sr2), sr2)
+    sr12 = qmult(sr6, sr6)
+    f_lj = qmult(qmult((sr12 << 1) - sr6, eps_x24), r2_inv)
+
+    f_norm = qmult(f_coulomb + f_lj, inv_r)
+    return -qmult(f_norm[..., None], d)
+
+# ==============================================================================
+# 4. FSM SCHEDULE (Cycle Counts Per Iteration)
+# ==============================================================================
+# The symmetry breaker samples the free-running LFSR in S_BND_ACCUM, so the
+# model needs the cycle of every accumulate. All cores have data-independent
+# latency: S_BND_WAIT lasts 153 cycles (set by dihedral_force_core: three
+# normalizer passes of 37 cycles plus the 16-step CORDIC), giving
+#   S_BND_FETCH, S_BND_LOOKUP, S_BND_EVAL, 153 x S_BND_WAIT, S_BND_ACCUM, S_BND_NEXT
+BND_WAIT_CYCLES = 153
+BND_WINDOW_CYCLES = 3 + BND_WAIT_CYCLES + 2
+NB_LATENCY = 18         # valid_in -> valid_out of non_bonded_pipeline
+APPLY_CYCLES = 3        # S_APPLY_FETCH, S_APPLY_UPDATE, S_APPLY_NEXT
+
+def nb_feed_schedule(num_atoms):
+    """
+    Walks S_NB_START .. S_NB_DRAIN cycle by cycle and returns (cycles, fed
+    (nb_i, nb_j) pairs). nb_i / nb_j are 6-bit registers, so with 63 atoms
+    nb_i + 4 wraps to 0 and a second sweep of (61, j < 61 + 3) pairs starts.
+    nb_inflight is decremented by the accumulate block but S_NB_FEED's
+    increment is the later non-blocking assignment, so a result landing on a
+    FEED cycle is never counted down and S_NB_DRAIN would wait forever; that
+    case raises instead of hanging.
+    """
+    t, state = 0, 'START'
+    nb_i = nb_j = inflight = 0
+    feeds, pairs = set(), []
+    while True:
+        valid_out = (t - 1 - NB_LATENCY) in feeds   # valid_in is registered one cycle after FEED
+        next_inflight = inflight - 1 if valid_out else inflight
+        if state == 'START':
+            nb_i, nb_j, next_inflight, state = 0, 3, 0, 'INNER'
+        elif state == 'INNER':
+            if nb_i >= num_atoms - 1:
+                state = 'DRAIN'
+            elif nb_j >= num_atoms:
+                nb_i, nb_j = nb_i + 1, (nb_i + 4) & 63
+            else:
+                state = 'FETCH'
+        elif state == 'FETCH':
+            state = 'LOOKUP'
+        elif state == 'LOOKUP':
+            state = 'FEED'
+        elif state == 'FEED':
+            feeds.add(t)
+            pairs.append((nb_i, nb_j))
+            next_inflight = inflight + 1
+            nb_j = (nb_j + 1) & 63
+            state = 'INNER'
+        elif state == 'DRAIN':
+            if inflight == 0 and not valid_out:
+                return t + 1, pairs
+            if t > max(feeds, default=0) + 2 * NB_LATENCY:
+                raise RuntimeError(f"num_atoms={num_atoms}: S_NB_DRAIN never sees nb_inflight == 0")
+        inflight = next_inflight
+        t += 1
+
+def iteration_schedule(num_atoms):
+    """(cycle offsets of each S_BND_ACCUM from S_ITER_START, cycles per iteration)."""
+    windows = max(num_atoms - 3, 1)
+    accum = 1 + np.arange(windows) * BND_WINDOW_CYCLES + 3 + BND_WAIT_CYCLES
+    length = 1 + windows * BND_WINDOW_CYCLES + nb_feed_schedule(num_atoms)[0] + APPLY_CYCLES * num_atoms
+    return accum, length
+
+def phase_schedule(num_atoms):
+    """
+    Cycles of one iteration split by phase (S_ITER_START, S_BND_*, S_NB_*,
+    S_APPLY_*) and non_bonded_pipeline use during S_NB_*. nb_valid_in is high
+    for one cycle per pair, and nb_inflight counts each pair from the cycle
+    after its FEED until the cycle after its valid_out (NB_LATENCY + 1 cycles).
+    """
+    nb_cycles, pairs = nb_feed_schedule(num_atoms)
+    phases = {'iter_start': 1, 'bonded': max(num_atoms - 3, 1) * BND_WINDOW_CYCLES,
+              'nonbonded': nb_cycles, 'apply': APPLY_CYCLES * num_atoms}
+    phases['total'] = sum(phases.values())
+    phases['nb_pairs'] = len(pairs)
+    phases['nb_valid_in_cycles'] = len(pairs)
+    phases['nb_inflight_sum'] = len(pairs) * (NB_LATENCY + 1)
+    return phases
+
+# ==============================================================================
+# 5. md_system_top MODEL
+# ==============================================================================
+INITIAL_STEP = 0x00000200
+COOLING_FACTOR = 0x0000F000
+# Convergence criterion of run() (the RTL has none and always runs max_iters):
+# RMS of the accumulated force over all coordinates, Q16.16 kcal/mol/A
+FORCE_RMS_TOL = 0x00050000
+
+class MDSystemTop:
+    def __init__(self, num_atoms, param_rows=None, load_identity=None, pin_identity=None,
+                 lfsr_start=LFSR_SEED, type_tables=None):
+        """
+        num_atoms     : value on the num_atoms port (4..62; 63 hangs in S_NB_DRAIN)
+        param_rows    : load_parameter_ram() array (default: forcefield_init.hex)
+        load_identity : per-atom (res_id, atom_idx) written with the coordinates,
+                        or None when load_res_id / load_atom_idx are undriven
+        pin_identity  : (res_id, atom_idx) on those pins during the run; S_APPLY
+                        rewrites every atom's identity with it (None = undriven)
+        lfsr_start    : LFSR value in the first S_ITER_START cycle
+        """
+        if not 4 <= num_atoms <= 63:
+            raise ValueError("num_atoms must be in 4..63 (6-bit port, 4-atom window)")
+        self.num_atoms = num_atoms
+        self.params = load_parameter_ram() if param_rows is None else np.asarray(param_rows, dtype=np.int64)
+        type_ids, lj, default = type_tables or load_type_tables()
+
+        def sigma_eps(identity):
+            if identity is None: return default
+            return lj.get(type_ids.get(tuple(identity), 0), default)
+
+        if load_identity is None:
+            load_identity = [None] * num_atoms
+        # NB parameters come from atom i's identity: (iteration 0, later iterations)
+        self.lj_first = wrap32([sigma_eps(ident) for ident in load_identity])
+        self.lj_after = wrap32([sigma_eps(pin_identity)] * num_atoms)
+
+        # Bonded windows: scan_idx = 0 .. num_atoms-4, parameter_ram address scan_idx[2:0]
+        self.windows = np.arange(num_atoms - 3)
+        self.rows = wrap32(self.params[self.windows & 7])
+        # The NB loop never moves scan_idx, so every pair sees the last window's charges
+        self.q_a, self.q_d = wrap32(self.params[(num_atoms - 4) & 7, 7:9])
+
+        # Streamed pairs in feed order: i = 0 .. n-4, j = i+3 .. n-1 (plus the wrapped extras)
+        self.pair_i, self.pair_j = np.array(nb_feed_schedule(num_atoms)[1], dtype=np.int64).T
+        self.pair_starts = np.flatnonzero(np.r_[True, self.pair_i[1:] != self.pair_i[:-1]])
+        self.pair_atoms = self.pair_i[self.pair_starts]
+        # Reaction side grouped by receiving atom for reduceat
+        self.react_order = np.argsort(self.pair_j, kind='stable')
+        react_j = self.pair_j[self.react_order]
+        self.react_starts = np.flatnonzero(np.r_[True, react_j[1:] != react_j[:-1]])
+        self.react_atoms = react_j[self.react_starts] + 1
+
+        self.accum_offsets, self.cycles_per_iter = iteration_schedule(num_atoms)
+        self.lfsr_start = lfsr_start
+
+    # --- Phase 1: bonded sliding window ------------------------------------
+    def bonded_forces(self, pos, iteration):
+        n, w = self.num_atoms, len(self.windows)
+        a, b, c, d = (pos[:, k:k + w] for k in range(4))
+        r0, kb, th0, kth, phi0, kphi = (self.rows[:, col] for col in range(6))
+
+        f_bond = bonded_force_core(a, b, r0, kb)
+        fa_ang, fb_ang, fc_ang = angle_force_core(a, b, c, th0, kth)
+        fa_dih, fb_dih, fc_dih, _ = dihedral_force_core(a, b, c, d, phi0, kphi)
+
+        fa = f_bond + fa_ang + fa_dih
+        fb = -f_bond + fb_ang + fb_dih
+        fc = fc_ang + fc_dih
+
+        # Symmetry breaker: its later non-blocking write to acc_fz[r_b] replaces
+        # the window's own z contribution to atom B with the LFSR kick
+        flat = (a[..., 2] == 0) & (b[..., 2] == 0) & (c[..., 2] == 0)
+        cycles = iteration * self.cycles_per_iter + self.accum_offsets
+        lfsr = LFSR_STATES[(LFSR_INDEX[self.lfsr_start] + cycles) % LFSR_PERIOD]
+        kick = (lfsr - ((lfsr >> 15) << 16)) >> 10   # {{16{lfsr[15]}}, lfsr} >>> 10
+        fb[..., 2] = np.where(flat, kick, fb[..., 2])
+
+        acc = np.zeros((len(pos), n, 3), dtype=np.int32)
+        acc[:, 0:w] += fa
+        acc[:, 1:w + 1] += fb
+        acc[:, 2:w + 2] += fc
+        return acc
+
+    # --- Phase 2: non-bonded cloud (j >= i + 3, Newton's third law) ---------
+    def nonbonded_forces(self, pos, iteration):
+        """
+        nb_j_sr[0] samples nb_j in the cycle after S_NB_FEED has already
+        incremented it, so the reaction force of pair (i, j) lands on atom
+        j + 1 (and on the unused accumulator slot num_atoms for the last j).
+        """
+        n = self.num_atoms
+        lj = (self.lj_first if iteration == 0 else self.lj_after)[self.pair_i]
+        f = non_bonded_pipeline(pos[:, self.pair_i], pos[:, self.pair_j],
+                                self.q_a, self.q_d, lj[:, 0], lj[:, 1])
+        acc = np.zeros((len(pos), n + 1, 3), dtype=np.int32)
+        acc[:, self.pair_atoms] += wrap32(np.add.reduceat(f, self.pair_starts, axis=1))
+        acc[:, self.react_atoms] -= wrap32(np.add.reduceat(f[:, self.react_order], self.react_starts, axis=1))
+        return acc[:, :n]
+
+    # --- Phase 3: clamped gradient step, then cool --------------------------
+    def forces(self, pos, iteration):
+        return self.bonded_forces(pos, iteration) + self.nonbonded_forces(pos, iteration)
+
+    def iterate(self, pos, iteration, step, limit=CLAMP_LIMIT):
+        return pos + clamp_move(qmult(self.forces(pos, iteration), step), limit)
+
+    def run(self, positions, max_iters=100, trace=False, force_tol=FORCE_RMS_TOL,
+            initial_step=INITIAL_STEP, cooling=COOLING_FACTOR, clamp_limit=CLAMP_LIMIT):
+        """
+        positions: (n, 3) or (batch, n, 3) Q16.16 words (as loaded into atom_regfile).
+        Returns (final positions, frames) where frames holds the positions after
+        every iteration when trace=True. The step size starts at initial_step and
+        is multiplied by cooling (qmult) after each pass (the INITIAL_STEP and
+        COOLING_FACTOR localparams by default), and every move is clipped to
+        +-clamp_limit (clamp_move's LIMIT); the FSM stops once
+        iter_count + 1 >= max_iters, so max_iters = 0 still runs one iteration.
+        self.iter_counts gets, per system, the number of iterations up to the last
+        one that started with an RMS force above force_tol (Q16.16): the
+        iter_count a convergence exit would have stopped at. The force is checked
+        rather than the move, because the cooled step reaches 0 (and every move
+        with it) after ~64 iterations whether or not the structure has relaxed.
+        A system whose force never falls to force_tol reports self.iterations,
+        and self.converged is False for it.
+        """
+        pos = wrap32(positions)
+        single = pos.ndim == 2
+        if single: pos = pos[None]
+        if pos.shape[1:] != (self.num_atoms, 3):
+            raise ValueError(f"expected (..., {self.num_atoms}, 3) positions, got {pos.shape}")
+
+        frames = []
+        step = int(initial_step)
+        last_high = np.zeros(len(pos), dtype=np.int64)
+        for iteration in range(max(int(max_iters), 1)):
+            acc = self.forces(pos, iteration)
+            rms = np.sqrt(np.mean(acc.astype(np.float64) ** 2, axis=(1, 2)))
+            last_high[rms > force_tol] = iteration + 1
+            pos = pos + clamp_move(qmult(acc, step), clamp_limit)
+            step = int(qmult(step, cooling))
+            if trace: frames.append(pos[0] if single else pos)
+        self.iterations = max(int(max_iters), 1)
+        self.cycles = self.iterations * self.cycles_per_iter
+        self.iter_counts = last_high[0] if single else last_high
+        self.converged = self.iter_counts < self.iterations
+        return (pos[0] if single else pos), frames
+
+    # --- Diagnostics: energy of the force field being descended -------------
+    def energies(self, pos):
+        """
+        Float64 potential energy (kcal/mol) per system, for ranking minimized
+        structures. Terms follow the forces the cores apply: kb (r - r0)^2,
+        k_theta/2 (theta - theta0)^2, the harmonic k_phi/2 (phi - phi0)^2, and over
+        the streamed pairs 332.06 q_a q_d / r + 4 eps (sr12 - sr6) with the loaded
+        atom types (sigma^2 and eps = eps_x24 / 24 from atom_type_table).
+        """
+        x = from_q16(pos)
+        single = x.ndim == 2
+        if single: x = x[None]
+        w = len(self.windows)
+        a, b, c, d = (x[:, k:k + w] for k in range(4))
+        r0, kb, th0, kth, phi0, kphi = (from_q16(self.rows[:, col]) for col in range(6))
+        norm = lambda v: np.linalg.norm(v, axis=-1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            e = (kb * (norm(b - a) - r0) ** 2).sum(axis=1)
+
+            ba, bc = a - b, c - b
+            theta = np.arccos(np.clip((ba * bc).sum(-1) / (norm(ba) * norm(bc)), -1.0, 1.0))
+            e += (0.5 * kth * (theta - th0) ** 2).sum(axis=1)
+
+            # Same angle convention as cordic_atan2(n1 . n2, (n1 x b2/|b2|) . n2)
+            b2 = c - b
+            n1, n2 = np.cross(b - a, b2), np.cross(b2, d - c)
+            m1 = np.cross(n1, b2 / norm(b2)[..., None])
+            phi = np.arctan2((m1 * n2).sum(-1), (n1 * n2).sum(-1))
+            e += (0.5 * kphi * (phi - phi0) ** 2).sum(axis=1)
+
+            i, j = np.triu_indices(self.num_atoms, 3)
+            r = norm(x[:, i] - x[:, j])
+            sigma_sq, eps_x24 = (from_q16(self.lj_first[i, col]) for col in range(2))
+            sr6 = (sigma_sq / (r * r)) ** 3
+            e += (from_q16(KC) * from_q16(self.q_a) * from_q16(self.q_d) / r
+                  + eps_x24 / 6.0 * (sr6 * sr6 - sr6)).sum(axis=1)
+        return e[0] if single else e
+
+# ==============================================================================
+# 6. BATCHED CONFORMER SCREENING
+# ==============================================================================
+def _minimize_shard(args):
+    model, conformers, max_iters, force_tol = args
+    final, _ = model.run(conformers, max_iters=max_iters, force_tol=force_tol)
+    return final, model.energies(final), model.iter_counts
+
+def minimize_conformers(model, conformers, max_iters=100, force_tol=FORCE_RMS_TOL, workers=1):
+    """
+    Minimizes (N_conformers, num_atoms, 3) starting geometries of one fragment
+    as a single broadcast batch; workers > 1 splits the batch across a process
+    pool (each shard is still a batch). Every conformer sees the same LFSR
+    kicks, as if each were run from reset. Returns (final positions,
+    energies [kcal/mol], iteration counts) in input order; the counts are
+    MDSystemTop.run's iter_counts, so a conformer whose RMS force never fell
+    to force_tol reports max(max_iters, 1).
+    """
+    conformers = wrap32(conformers).reshape(-1, model.num_atoms, 3)
+    if workers <= 1 or len(conformers) < 2:
+        return _minimize_shard((model, conformers, max_iters, force_tol))
+
+    shards = np.array_split(conformers, min(workers, len(conformers)))
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        results = list(pool.map(_minimize_shard, [(model, s, max_iters, force_tol) for s in shards]))
+    return tuple(np.concatenate(part) for part in zip(*results))
+
+# ==============================================================================
+# 7. RTL LOG COMPARISON
+# ==============================================================================
+def to_q16(coords):
+    """Angstrom floats -> Q16.16 words (truncating, like to_q16_16)."""
+    return wrap32(np.trunc(np.asarray(coords, dtype=np.float64) * 65536.0).astype(np.int64))
+
+def from_q16(words):
+    return np.asarray(words, dtype=np.float64) / 65536.0
+
+def read_rtl_coordinates(filename):
+    """INITIAL / FINAL coordinate blocks and the iteration count of a sim_output log."""
+    blocks, current, iterations = {'INITIAL': [], 'FINAL': []}, None, None
+    with open(filename, 'r') as f:
+        for line in f:
+            if "INITIAL COORDINATES" in line: current = blocks['INITIAL']
+            elif "FINAL COORDINATES" in line: current = blocks['FINAL']
+            elif "Total Iterations Executed" in line: iterations = int(line.split(':')[1])
+            elif current is not None:
+                m = re.search(r'X=\s*([-\d.]+),\s*Y=\s*([-\d.]+),\s*Z=\s*([-\d.]+)', line)
+                if m: current.append(tuple(map(float, m.groups())))
+    return np.array(blocks['INITIAL']), np.array(blocks['FINAL']), iterations
+
+def diff_against_log(filename, param_rows=None):
+    """Re-runs a logged minimization and returns the max |model - RTL| per atom (A)."""
+    initial, final, iterations = read_rtl_coordinates(filename)
+    model = MDSystemTop(len(initial), param_rows)
+    result, _ = model.run(to_q16(initial), max_iters=iterations or 1)
+    # The log prints 4 decimals, so anything under 5e-5 A is an exact match
+    return np.abs(from_q16(result) - final).max(axis=1)
+
+# ==============================================================================
+# 8. EXECUTION (Batched Regression Throughput)
+# ==============================================================================
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        for log in sys.argv[1:]:
+            err = diff_against_log(log)
+            status = "MATCH" if err.max() < 5e-5 else "MISMATCH"
+            print(f"{log}: max |model - RTL| = {err.max():.4f} A over {len(err)} atoms -> {status}")
+        sys.exit()
+
+    rng = np.random.default_rng(0)
+    for num_atoms, batch in ((10, 1000), (32, 200), (62, 50)):
+        model = MDSystemTop(num_atoms)
+        # Perturbed zig-zag chains, ~1.5 A spacing
+        chain = np.zeros((num_atoms, 3))
+        chain[:, 0] = 1.5 * np.arange(num_atoms)
+        chain[1::2, 1] = 0.8
+        start = to_q16(chain + rng.normal(0.0, 0.3, (batch, num_atoms, 3)))
+
+        t0 = time.perf_counter()
+        final, _ = model.run(start, max_iters=100)
+        elapsed = time.perf_counter() - t0
+        moved = np.abs(from_q16(final - start)).max()
+        print(f"{num_atoms:2d} atoms x {batch:4d} runs x 100 iters: {elapsed:6.2f} s "
+              f"({batch / elapsed:7.1f} minimizations/s, {model.cycles} RTL cycles each, "
+              f"max displacement {moved:.2f} A)")
+
+    # Conformer screening: many starts of one fragment, sharded across cores
+    workers = os.cpu_count() or 1
+    model = MDSystemTop(10)
+    chain = np.zeros((10, 3))
+    chain[:, 0] = 1.5 * np.arange(10)
+    chain[1::2, 1] = 0.8
+    starts = to_q16(chain + rng.normal(0.0, 0.5, (1000, 10, 3)))
+
+    t0 = time.perf_counter()
+    final, energy, iters = minimize_conformers(model, starts, max_iters=100, workers=workers)
+    elapsed = time.perf_counter() - t0
+    print(f"Screened {len(starts)} conformers on {workers} worker(s) in {elapsed:.2f} s "
+          f"({np.count_nonzero(iters < 100)} reached RMS force {from_q16(FORCE_RMS_TOL):.1f} kcal/mol/A, "
+          f"iterations used: {iters.min()}..{iters.max()})")
+    for k in np.argsort(energy)[:3]:
+        print(f"  conformer {k:4d}: E = {energy[k]:12.2f} kcal/mol after {iters[k]} iterations")
@@ -0,0 +1,285 @@
+import argparse
+
+import numpy as np
+
+from golden_model import iteration_schedule
+
+# ==============================================================================
+# 1. WHAT THE project.v SEQUENCER CAN LOAD
+# ==============================================================================
+# Every clock tt_um_bioTensor executes the command on ui_in[7:6] with the data
+# on ui_in[5:0] (there is no NOP):
+#   00 / 01 / 10 : shift_reg byte 0 / 1 / 2 <= {2'b0, data}
+#   11           : shift_reg byte 3 <= {2'b0, data}, load_pulse <= 1
+# The pulse writes shift_reg into atom_regfile in the NEXT cycle, at the address
+# on ui_in[5:0] of that next cycle, whose own command still executes. Only
+# load_x is wired (y = z = 0), and each byte carries 6 bits, so a loadable
+# x word has bits 31:30, 23:22, 15:14 and 7:6 clear: it is a 24-bit number
+# written in base-64 digits, one digit per byte.
+CMD_BYTE0, CMD_BYTE1, CMD_BYTE2, CMD_LOAD = 0, 1, 2, 3
+PROJECT_NUM_ATOMS = 10    # Hard-wired on md_system_top in project.v
+PROJECT_MAX_ITERS = 100
+CLOCK_HZ = 50e6
+
+def _digits(words):
+    """(n,) uint32 -> (n, 4) byte array, byte 0 first."""
+    words = np.asarray(words, dtype=np.int64)
+    return (words[:, None] >> np.array([0, 8, 16, 24])) & 0xFF
+
+def _from_digits(digits):
+    return (np.asarray(digits, dtype=np.int64) << np.array([0, 8, 16, 24])).sum(axis=1)
+
+def loadable_words(words):
+    """
+    Nearest word the sequencer can produce for each Q16.16 word (negative
+    values clamp to 0). Loadable words sort like their base-64 digit strings,
+    so the floor clips every byte from the first one above 63 downwards and
+    the ceiling is the next digit string up.
+    """
+    words = np.clip(np.asarray(words, dtype=np.int64), 0, 0xFFFFFFFF)
+    digits = _digits(words)
+    over = np.logical_or.accumulate((digits > 63)[:, ::-1], axis=1)[:, ::-1]
+    floor_digits = np.where(over, 63, digits)
+    floor_value = (floor_digits * 64 ** np.arange(4)).sum(axis=1)
+    floor_word = _from_digits(floor_digits)
+
+    ceil_value = np.minimum(floor_value + (floor_word != words), 64 ** 4 - 1)
+    ceil_word = _from_digits((ceil_value[:, None] // 64 ** np.arange(4)) % 64)
+    return np.where(ceil_word - words < words - floor_word, ceil_word, floor_word)
+
+def quantize(coords, shift_to_origin=False):
+    """
+    (n, 3) Angstrom -> (n,) loadable x words. With shift_to_origin the chain
+    is translated so its smallest x is 0 (forces only see differences).
+    Returns (words, quantization error in Angstrom per atom).
+    """
+    x = np.asarray(coords, dtype=np.float64).reshape(len(coords), -1)[:, 0]
+    if shift_to_origin and len(x): x = x - x.min()
+    words = loadable_words(np.trunc(x * 65536.0))
+    return words, words / 65536.0 - x
+
+# ==============================================================================
+# 2. STREAM ENCODER (Minimum Commands for a Load Order)
+# ==============================================================================
+def _command(cmd, data):
+    return (cmd << 6) | (int(data) & 0x3F)
+
+def _transition_costs(digits, addresses):
+    """
+    costs[k, l]: byte commands needed for atom l right after atom k. After
+    k's load the shift bytes hold k's digits, except that the address cycle
+    overwrote one of bytes 0..2 (our pick) with k's address.
+    """
+    low = digits[:, :3]
+    costs = np.full((len(low), len(low)), 3, dtype=np.int64)
+    for j in range(3):
+        state = low.copy()
+        state[:, j] = addresses
+        costs = np.minimum(costs, (state[:, None, :] != low[None, :, :]).sum(axis=2))
+    return costs
+
+EXACT_MAX_ATOMS = 14   # Held-Karp table is 2^n x n; above this load_order falls back to greedy
+
+def _greedy_order(first, costs):
+    """Walks to the cheapest next atom, trying every start."""
+    best, best_cost = None, None
+    for start in range(len(first)):
+        order, seen, total = [start], {start}, first[start]
+        while len(order) < len(first):
+            row = costs[order[-1]].copy()
+            row[list(seen)] = 99
+            nxt = int(np.argmin(row))
+            total += row[nxt]
+            order.append(nxt)
+            seen.add(nxt)
+        if best_cost is None or total < best_cost: best, best_cost = order, total
+    return best
+
+def _exact_order(first, costs):
+    """
+    Held-Karp over (atoms loaded, last atom): cost[mask, l] is the fewest byte
+    commands that load the atoms in mask ending on l. Masks only grow, so
+    visiting them in numeric order finalizes each before it is extended.
+    """
+    n = len(first)
+    cost = np.full((1 << n, n), np.iinfo(np.int64).max // 2, dtype=np.int64)
+    parent = np.full((1 << n, n), -1, dtype=np.int64)
+    atoms = np.arange(n)
+    cost[1 << atoms, atoms] = first
+    for mask in range(1, 1 << n):
+        inside = (mask >> atoms) & 1 == 1
+        if inside.all(): continue
+        step = cost[mask][inside, None] + costs[inside]     # (loaded, next)
+        via = step.argmin(axis=0)
+        nxt = atoms[~inside]
+        grown = mask | (1 << nxt)
+        better = step[via[nxt], nxt] < cost[grown, nxt]
+        cost[grown[better], nxt[better]] = step[via[nxt], nxt][better]
+        parent[grown[better], nxt[better]] = atoms[inside][via[nxt]][better]
+
+    mask, last = (1 << n) - 1, int(cost[-1].argmin())
+    order = []
+    while last >= 0:
+        order.append(last)
+        mask, last = mask ^ (1 << last), int(parent[mask, last])
+    return order[::-1]
+
+def load_order(words, addresses, method="shortest"):
+    """
+    Order to stream the atoms in (any order works; every load carries its
+    address). A stream costs 2 cycles per atom plus the byte commands between
+    loads, which depend only on consecutive pairs (_transition_costs), so the
+    best order is a shortest Hamiltonian path. 'shortest' solves it exactly
+    (Held-Karp) up to EXACT_MAX_ATOMS atoms and falls back to 'greedy' beyond;
+    'greedy' walks to the cheapest next atom, trying every start.
+    """
+    if method == "index" or len(words) < 2: return np.arange(len(words))
+    digits = _digits(words)
+    costs = _transition_costs(digits, np.asarray(addresses))
+    first = (digits[:, :3] != 0).sum(axis=1) # From the reset state (all zero)
+    if method == "shortest" and len(words) <= EXACT_MAX_ATOMS:
+        return np.array(_exact_order(first, costs))
+    return np.array(_greedy_order(first, costs))
+
+def encode_stream(words, addresses=None, order="shortest"):
+    """
+    ui_in bytes that load words[k] into atom_regfile address addresses[k]
+    (default k). Per atom: only the low bytes that differ from shift_reg, the
+    load command (byte 3), then the address cycle, whose command is chosen to
+    set a byte the next atom needs anyway. Returns a uint8 array.
+    """
+    words = np.asarray(words, dtype=np.int64)
+    addresses = np.arange(len(words)) if addresses is None else np.asarray(addresses)
+    digits = _digits(words)
+    if (digits > 63).any(): raise ValueError("words must be loadable (see loadable_words)")
+    if (addresses < 0).any() or (addresses > 63).any(): raise ValueError("addresses are 6 bits")
+
+    seq = load_order(words, addresses, order) if isinstance(order, str) else np.asarray(order)
+    state, stream = [0, 0, 0], []
+    for pos, k in enumerate(seq):
+        for j in range(3):
+            if state[j] != digits[k, j]:
+                stream.append(_command(j, digits[k, j]))
+                state[j] = digits[k, j]
+        stream.append(_command(CMD_LOAD, digits[k, 3]))
+
+        # Address cycle: clobber the byte that helps (or hurts least) the next atom
+        addr = int(addresses[k])
+        nxt = digits[seq[pos + 1], :3] if pos + 1 < len(seq) else np.array(state)
+        cost = [sum((addr if i == j else state[i]) != nxt[i] for i in range(3)) for j in range(3)]
+        j = int(np.argmin(cost))
+        stream.append(_command(j, addr))
+        state[j] = addr
+    return np.array(stream, dtype=np.uint8)
+
+def naive_stream(words, addresses=None):
+    """Reference: all four bytes + address cycle for every atom (5 cycles each)."""
+    words = np.asarray(words, dtype=np.int64)
+    addresses = np.arange(len(words)) if addresses is None else np.asarray(addresses)
+    stream = []
+    for d, addr in zip(_digits(words), addresses):
+        stream += [_command(0, d[0]), _command(1, d[1]), _command(2, d[2]), _command(CMD_LOAD, d[3]),
+                   _command(0, addr)]
+    return np.array(stream, dtype=np.uint8)
+
+def simulate_sequencer(stream):
+    """
+    Cycle model of the project.v sequencer from reset. Returns the list of
+    (address, word) regfile writes in order.
+    """
+    shift, pulse, writes = [0, 0, 0, 0], False, []
+    for byte in np.asarray(stream, dtype=np.int64).tolist():
+        cmd, data = byte >> 6, byte & 0x3F
+        if pulse: writes.append((data, shift[0] | shift[1] << 8 | shift[2] << 16 | shift[3] << 24))
+        shift[cmd] = data
+        pulse = cmd == CMD_LOAD
+    if pulse: raise ValueError("stream ends on a load command; its address cycle is missing")
+    return writes
+
+# ==============================================================================
+# 3. CYCLE ESTIMATES
+# ==============================================================================
+def estimate_cycles(stream, num_atoms=PROJECT_NUM_ATOMS, max_iters=PROJECT_MAX_ITERS, clock_hz=CLOCK_HZ):
+    """Load and run cycles (run from golden_model's FSM schedule) and the wall time at clock_hz."""
+    load = len(stream)
+    run = max(int(max_iters), 1) * iteration_schedule(num_atoms)[1]
+    return {'load_cycles': load, 'run_cycles': run,
+            'load_us': load / clock_hz * 1e6, 'run_us': run / clock_hz * 1e6}
+
+# ==============================================================================
+# 4. INPUT FILES
+# ==============================================================================
+def read_coordinates(filename):
+    """(n, 3) Angstrom from a .npy array, a PDB file (ATOM/HETATM) or 'x y z' text lines."""
+    if filename.endswith('.npy'):
+        return np.load(filename).reshape(-1, 3).astype(np.float64)
+    coords = []
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.startswith(('ATOM', 'HETATM')):
+                coords.append((float(line[30:38]), float(line[38:46]), float(line[46:54])))
+            elif not filename.lower().endswith(('.pdb', '.ent')):
+                parts = line.split('#')[0].split()
+                if len(parts) >= 3: coords.append(tuple(map(float, parts[:3])))
+    return np.array(coords, dtype=np.float64).reshape(-1, 3)
+
+def write_stream(stream, output_filename="load_stream.hex"):
+    """One ui_in byte per line, for $readmemh or drive_stream()."""
+    with open(output_filename, 'w') as f:
+        f.writelines(f"{b:02X}\n" for b in np.asarray(stream).tolist())
+
+def read_stream(filename):
+    with open(filename, 'r') as f:
+        return np.array([int(t, 16) for line in f for t in line.split('//')[0].split()], dtype=np.uint8)
+
+# ==============================================================================
+# 5. COCOTB DRIVER
+# ==============================================================================
+async def drive_stream(dut, stream):
+    """
+    Replays a stream on the tb's ui_in, one byte per clock, changing inputs on
+    the falling edge. ena (start_run) is held low so md_system_top stays in
+    S_IDLE; ui_in returns to 0 (byte-0 command, no load) afterwards. Returns
+    the number of load cycles.
+    """
+    from cocotb.triggers import FallingEdge
+
+    dut.ena.value = 0
+    for byte in np.asarray(stream).tolist():
+        await FallingEdge(dut.clk)
+        dut.ui_in.value = byte
+    await FallingEdge(dut.clk)
+    dut.ui_in.value = 0
+    return len(stream)
+
+# ==============================================================================
+# 6. COMMAND LINE
+# ==============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Encode coordinates into a tt_um_bioTensor ui_in load stream.")
+    parser.add_argument("coords", help=".pdb, .npy or 'x y z' text file (Angstrom)")
+    parser.add_argument("-o", "--output", default="load_stream.hex", help="stream file, one byte per line")
+    parser.add_argument("--order", choices=("shortest", "greedy", "index"), default="shortest",
+                        help=f"load order: exact up to {EXACT_MAX_ATOMS} atoms with 'shortest', else greedy")
+    parser.add_argument("--shift", action="store_true", help="translate so the smallest x is 0")
+    parser.add_argument("--clock", type=float, default=CLOCK_HZ, help="clock in Hz for the time estimate")
+    args = parser.parse_args(argv)
+
+    coords = read_coordinates(args.coords)
+    if not 1 <= len(coords) <= 64: raise SystemExit(f"{len(coords)} atoms: atom_regfile holds 64")
+    words, error = quantize(coords, args.shift)
+    stream = encode_stream(words, order=args.order)
+    assert dict(simulate_sequencer(stream)) == dict(enumerate(words.tolist()))
+    write_stream(stream, args.output)
+
+    naive = len(naive_stream(words))
+    est = estimate_cycles(stream, clock_hz=args.clock)
+    print(f"{len(coords)} atoms -> {args.output}: {len(stream)} load cycles "
+          f"(naive {naive}, floor {2 * len(coords)}), {est['load_us']:.2f} us at {args.clock / 1e6:g} MHz")
+    print(f"  max |x error| {np.abs(error).max():.4f} A (6-bit bytes); y and z are not loadable (load_y = load_z = 0)")
+    print(f"  run: {est['run_cycles']} cycles ({est['run_us']:.1f} us) for {PROJECT_NUM_ATOMS} atoms x "
+          f"{PROJECT_MAX_ITERS} iterations as wired in project.v")
+    return stream
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from batch_compiler import ONE_LETTER, ResidueTemplates
+from ff_cache import load_cached
+from fixed_point import NONBONDED_ROW, PARAM_RAM_ROW, encode_rows
+from forcefield import ForceField
+from parameter_compiler import window_rows
+from parameter_compiler_2d import (MIXING_ROW, identity_lines, mixing_table, unique_atom_types,
+                                   write_mixing_matrix)
+from parameter_compiler_new import nonbonded_rows
+
+# ==============================================================================
+# 1. BUILD MANIFEST (Rows of the Previous Build)
+# ==============================================================================
+# A full build writes the images compile_hex_file, compile_nonbonded_lut and
+# compile_hardware_assets produce, plus build_manifest.json with each row's
+# label (atoms and types), parameters and hex line:
+#   windows   : [label, (r0, kb, theta0, k_theta, phi0, k_phi, n, q_a, q_d), hex]
+#   nonbonded : [label, (Q, Sigma^2, 24*Epsilon), hex]
+#   identity  : atom_identity.hex line
+# plus the atom list and the type numbering. Type ids are kept across
+# rebuilds (new types are appended), so a mutation never renumbers existing
+# identity rows and, in the packed layout, only appends mixing entries.
+MANIFEST = "build_manifest.json"
+IMAGE_FILES = {'windows': "forcefield_init.hex", 'nonbonded': "nonbonded_lut.hex",
+               'identity': "atom_identity.hex", 'mixing': "mixing_matrix.hex"}
+
+def _records(labels, rows, fmt):
+    # Parameters as plain Python numbers (the dihedral columns are numpy scalars)
+    return [[label, [np.asarray(v).item() for v in row], h]
+            for label, row, h in zip(labels, rows, encode_rows(rows, fmt))]
+
+def _window_records(ff, atoms):
+    return _records(*window_rows(ff, atoms), PARAM_RAM_ROW) if len(atoms) >= 4 else []
+
+def _nonbonded_records(ff, atoms):
+    return _records(*nonbonded_rows(ff, atoms), NONBONDED_ROW) if atoms else []
+
+def _labelled_row(i, record):
+    return f"// Atom {i}: {record[0]}\n{record[2]}\n"
+
+def _plain_row(i, line):
+    return f"{line}\n"
+
+def _path(prefix, name):
+    return f"{prefix}{IMAGE_FILES[name]}"
+
+def _row_offsets(records, render, first=0, start=0):
+    """Byte offset of every row (plus the end of file), rows numbered from first."""
+    lengths = [len(render(first + k, r)) for k, r in enumerate(records)]
+    return start + np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+
+def save_manifest(state, prefix=""):
+    with open(f"{prefix}{MANIFEST}", 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
+
+def load_manifest(prefix=""):
+    with open(f"{prefix}{MANIFEST}", 'r') as f:
+        return json.load(f)
+
+def compile_full(ff, atom_list, prefix="", packed=False, type_order=()):
+    """Writes every image from scratch (byte-identical to the single compilers) and the manifest."""
+    atoms = [tuple(a) for a in atom_list]
+    types = unique_atom_types(ff, atoms, type_order)
+    type_to_id = {t: i for i, t in enumerate(types)}
+    state = {'atoms': atoms, 'type_order': types, 'packed': packed,
+             'windows': _window_records(ff, atoms), 'nonbonded': _nonbonded_records(ff, atoms),
+             'identity': identity_lines(ff, atoms, type_to_id)}
+    for name in ROW_IMAGES:
+        with open(_path(prefix, name), 'w') as f:
+            f.write("".join(ROW_IMAGES[name](i, r) for i, r in enumerate(state[name])))
+    sig_sq, eps_24 = mixing_table(ff, types)
+    write_mixing_matrix(sig_sq, eps_24, len(types), _path(prefix, 'mixing'), packed)
+    save_manifest(state, prefix)
+    return state
+
+# ==============================================================================
+# 2. CHANGED SPAN AND IN-PLACE PATCHING
+# ==============================================================================
+# Old and new atom lists are aligned on their common prefix and suffix; only
+# atoms in between changed. A window row depends on its four atoms and a
+# per-atom row on its atom, so only rows touching that span are recomputed.
+# Rows after the span keep their contents and move by the change in atom
+# count: their bytes are re-rendered from the manifest ("// Atom i" labels
+# renumbered) and rewritten, but no parameter is looked up again. When the
+# count does not change and the new rows have the old byte length, the file
+# is overwritten in place and nothing after the span is touched. Row byte
+# offsets are kept next to the records, so nothing before the span is read.
+ROW_IMAGES = {'windows': _labelled_row, 'nonbonded': _labelled_row, 'identity': _plain_row}
+
+def changed_span(old, new):
+    """(p, s): length of the common prefix and of the common suffix (not overlapping it)."""
+    limit = min(len(old), len(new))
+    p = 0
+    while p < limit and old[p] == new[p]: p += 1
+    s = 0
+    while s < limit - p and old[-1 - s] == new[-1 - s]: s += 1
+    return p, s
+
+class IncrementalBuild:
+    def __init__(self, ff, prefix="", packed=False):
+        """
+        Picks up the manifest under prefix; without one (or with the other
+        mixing layout) the first update() does a full build.
+        """
+        self.ff, self.prefix, self.packed = ff, prefix, packed
+        try:
+            state = load_manifest(prefix)
+        except FileNotFoundError:
+            state = None
+        self.state = state if state is not None and state['packed'] == packed else None
+        if self.state is not None:
+            self.state['atoms'] = [tuple(a) for a in self.state['atoms']]
+            self.offsets = {name: _row_offsets(self.state[name], render) for name, render in ROW_IMAGES.items()}
+
+    def full(self, atom_list, type_order=()):
+        self.state = compile_full(self.ff, atom_list, self.prefix, self.packed, type_order)
+        self.offsets = {name: _row_offsets(self.state[name], render) for name, render in ROW_IMAGES.items()}
+
+    def save(self):
+        save_manifest(self.state, self.prefix)
+
+    def _patch(self, name, start, old_stop, new_records):
+        """Replaces rows [start, old_stop) of one row image; returns (bytes written, patched in place)."""
+        render, old_records, offsets = ROW_IMAGES[name], self.state[name], self.offsets[name]
+        new_text = "".join(render(start + k, r) for k, r in enumerate(new_records))
+        in_place = bool(len(new_records) == old_stop - start
+                        and len(new_text) == offsets[old_stop] - offsets[start])
+        records = old_records[:start] + new_records + old_records[old_stop:]
+        if not in_place:
+            tail = old_records[old_stop:]
+            new_text += "".join(render(start + len(new_records) + k, r) for k, r in enumerate(tail))
+            self.offsets[name] = np.concatenate([offsets[:start],
+                                                 _row_offsets(records[start:], render, start, offsets[start])])
+        with open(_path(self.prefix, name), 'r+b') as f:
+            f.seek(int(offsets[start]))
+            f.write(new_text.encode('ascii'))
+            if not in_place: f.truncate()
+        self.state[name] = records
+        return len(new_text), in_place
+
+    def update(self, atom_list):
+        """
+        Brings the images up to date with atom_list, recomputing only the rows
+        that touch changed atoms. The manifest on disk is written by save().
+        Returns a summary dict.
+        """
+        atoms = [tuple(a) for a in atom_list]
+        if self.state is None:
+            self.full(atoms)
+            return {'full': True, 'atoms': len(atoms), 'windows': max(len(atoms) - 3, 0), 'new_types': [],
+                    'bytes_written': None, 'in_place': False}
+
+        ff, state = self.ff, self.state
+        old = state['atoms']
+        p, s = changed_span(old, atoms)
+        n_old, n_new = len(old), len(atoms)
+        summary = {'full': False, 'atoms': n_new - s - p, 'windows': 0, 'new_types': [], 'bytes_written': 0,
+                   'in_place': True}
+        if p == n_old == n_new: return summary
+
+        def patch(name, start, old_stop, new_records):
+            written, in_place = self._patch(name, start, old_stop, new_records)
+            summary['bytes_written'] += written
+            summary['in_place'] &= in_place
+
+        # Sliding-window rows: every window with an atom in the changed span
+        w0 = max(p - 3, 0)
+        w_old, w_new = max(min(n_old - s, n_old - 3), w0), max(min(n_new - s, n_new - 3), w0)
+        windows = _window_records(ff, atoms[w0:w_new + 3]) if w_new > w0 else []
+        patch('windows', w0, w_old, windows)
+        summary['windows'] = len(windows)
+
+        # Per-atom rows: non-bonded LUT and identity (type ids stay stable)
+        changed = atoms[p:n_new - s]
+        patch('nonbonded', p, n_old - s, _nonbonded_records(ff, changed))
+        known = state['type_order']
+        types = unique_atom_types(ff, changed, known)
+        patch('identity', p, n_old - s, identity_lines(ff, changed, {t: i for i, t in enumerate(types)}))
+
+        # Mixing entries: only new types add entries (appended in the packed layout)
+        if len(types) > len(known):
+            summary['new_types'] = types[len(known):]
+            sig_sq, eps_24 = mixing_table(ff, types)
+            if self.packed:
+                first = len(known) * (len(known) + 1) // 2
+                text = "".join(f"{line}\n" for line in encode_rows(np.column_stack([sig_sq, eps_24])[first:],
+                                                                    MIXING_ROW))
+                with open(_path(self.prefix, 'mixing'), 'ab') as f:
+                    f.write(text.encode('ascii'))
+                summary['bytes_written'] += len(text)
+            else:
+                summary['bytes_written'] += 17 * write_mixing_matrix(sig_sq, eps_24, len(types),
+                                                                     _path(self.prefix, 'mixing'))
+                summary['in_place'] = False
+
+        state['atoms'], state['type_order'] = atoms, types
+        return summary
+
+def recompile(ff, atom_list, prefix="", packed=False):
+    """One-shot update of the images under prefix from their manifest (rewritten afterwards)."""
+    build = IncrementalBuild(ff, prefix, packed)
+    summary = build.update(atom_list)
+    build.save()
+    return summary
+
+# ==============================================================================
+# 3. MUTATION SCAN (Full Build vs Incremental Patches)
+# ==============================================================================
+def point_mutation(templates, atoms, residue_index, position, residue):
+    """Replaces residue `position` (0-based) by `residue`; returns (atoms, residue_index)."""
+    lo, hi = np.searchsorted(residue_index, [position, position + 1])
+    template = templates.residue(residue)
+    return (atoms[:lo] + list(template) + atoms[hi:],
+            residue_index[:lo] + [position] * len(template) + residue_index[hi:])
+
+def same_images(prefix_a, prefix_b):
+    for filename in IMAGE_FILES.values():
+        with open(f"{prefix_a}{filename}", 'rb') as fa, open(f"{prefix_b}{filename}", 'rb') as fb:
+            if fa.read() != fb.read(): return False
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Point-mutation scan with incremental parameter image patches.")
+    parser.add_argument("--sequence", help="one-letter start sequence (default: random)")
+    parser.add_argument("--length", type=int, default=60, help="residues of the random start sequence")
+    parser.add_argument("--mutations", type=int, default=50, help="random point mutations to apply in turn")
+    parser.add_argument("--packed", action="store_true", help="packed (triangle) mixing matrix")
+    parser.add_argument("--verify", action="store_true", help="compare every patched build with a full build")
+    parser.add_argument("-o", "--out-dir", default="incremental_out")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ff = ForceField()
+    load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
+    templates = ResidueTemplates(ff)
+    rng = np.random.default_rng(args.seed)
+    codes = sorted(ONE_LETTER)
+    sequence = args.sequence or "".join(rng.choice(codes, args.length))
+    atoms, residue_index = templates.expand(sequence)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    prefix = os.path.join(args.out_dir, "")
+    build = IncrementalBuild(ff, prefix, args.packed)
+    t0 = time.perf_counter()
+    build.full(atoms)
+    full_ms = (time.perf_counter() - t0) * 1e3
+    print(f"{len(sequence)} residues, {len(atoms)} atoms: full build {full_ms:.1f} ms -> {args.out_dir}/")
+
+    check = tempfile.mkdtemp() if args.verify else None
+    times, rebuilds, written, in_place, windows, mismatches = [], [], 0, 0, 0, 0
+    for _ in range(args.mutations):
+        position = int(rng.integers(len(sequence)))
+        code = str(rng.choice([c for c in codes if c != sequence[position]]))
+        sequence = sequence[:position] + code + sequence[position + 1:]
+        atoms, residue_index = point_mutation(templates, atoms, residue_index, position, ONE_LETTER[code])
+
+        t0 = time.perf_counter()
+        summary = build.update(atoms)
+        times.append((time.perf_counter() - t0) * 1e3)
+        written += summary['bytes_written'] or 0
+        in_place += summary['in_place']
+        windows += summary['windows']
+
+        if check:
+            t0 = time.perf_counter()
+            compile_full(ff, atoms, os.path.join(check, ""), args.packed, build.state['type_order'])
+            rebuilds.append((time.perf_counter() - t0) * 1e3)
+            mismatches += not same_images(prefix, os.path.join(check, ""))
+    if check: shutil.rmtree(check)
+    build.save()
+
+    if times:
+        print(f"{len(times)} point mutations: {np.mean(times):.2f} ms per incremental recompile "
+              f"({windows / len(times):.1f} windows recomputed, {written / len(times) / 1024:.1f} KiB written, "
+              f"{in_place} patched in place)")
+    if rebuilds:
+        print(f"  full rebuild of the same images: {np.mean(rebuilds):.2f} ms "
+              f"({np.mean(rebuilds) / np.mean(times):.1f}x slower), "
+              f"{'all images identical' if not mismatches else f'{mismatches} MISMATCHES'}")
@@ -0,0 +1,229 @@
+import os
+
+import numpy as np
+
+from ff_cache import load_cached
+from fixed_point import encode_q16_16
+from forcefield import ForceField
+
+# ==============================================================================
+# 1. RESIDUE / TYPE TABLES FROM THE PARSED FORCE FIELD
+# ==============================================================================
+# residue_id order is fixed by the hardware (host streams these ids into the
+# identity ROM); HIS is the neutral HSD tautomer of the topology file.
+RESIDUES = ['GLY', 'ALA', 'VAL', 'LEU', 'ILE', 'SER', 'THR', 'CYS', 'MET', 'ASP',
+            'GLU', 'ASN', 'GLN', 'LYS', 'ARG', 'PHE', 'TYR', 'HSD', 'TRP', 'PRO']
+RESIDUE_LABELS = {'HSD': 'HIS'}
+BACKBONE_NAMES = ('N', 'CA', 'C', 'O')
+MAX_ATOMS_PER_RESIDUE = 16   # atom_index is 4 bits
+NUM_RESIDUE_IDS = 32         # residue_id is 5 bits
+HEAVY_MASS = 2.0             # Hydrogens are not stored in the residue ROM
+
+# atom_type_table default entry (unknown / unused type ids). These are the raw
+# words project.v has always run with (every atom falls through to them), so
+# they are kept as they are rather than converted like the CHARMM entries.
+DEFAULT_SIGMA_Q16 = 0x00018000
+DEFAULT_EPSILON_Q16 = 0x00001999
+
+def type_ids(ff):
+    """{AtomType: type_id}, 1-based in .prm MASS order (0 = the default entry)."""
+    return {t: i + 1 for i, t in enumerate(ff.masses)}
+
+def residue_table(ff, residues=RESIDUES):
+    """
+    One row per heavy atom, in topology order:
+    (res_id, atom_idx, res_name, atom_name, atom_type, mass, charge_byte,
+     type_id, is_backbone, is_last_atom)
+    charge_byte is round(q * 64) as two's-complement int8 (param_out[23:16]).
+    """
+    ids = type_ids(ff)
+    rows = []
+    for res_id, res in enumerate(residues):
+        names = [a for a in ff.residues[res] if ff.masses[ff.atom_types[(res, a)][0]] > HEAVY_MASS]
+        if len(names) > MAX_ATOMS_PER_RESIDUE:
+            raise ValueError(f"{res}: {len(names)} heavy atoms, atom_index holds {MAX_ATOMS_PER_RESIDUE}")
+        for idx, name in enumerate(names):
+            atom_type, q = ff.atom_types[(res, name)]
+            rows.append((res_id, idx, res, name, atom_type, int(round(ff.masses[atom_type])),
+                         int(np.floor(q * 64.0 + 0.5)) & 0xFF, ids[atom_type],
+                         name in BACKBONE_NAMES, idx == len(names) - 1))
+    return rows
+
+def type_table(ff, types):
+    """
+    {type_id: (atom_type, sigma_q16, epsilon_q16)} for the given atom types.
+    The words are what md_system_top latches into active_sigma_sq /
+    active_eps_x24: sigma^2 with sigma = Rmin / 2^(1/6) and 24 * |Emin|, as in
+    get_nonbonded_hardware_params.
+    """
+    ids = type_ids(ff)
+    types = sorted(set(types), key=ids.get)
+    eps, rmin_half = np.array([ff.nonbonded.get(t, (0.0, 0.0)) for t in types]).T.reshape(2, -1)
+    sigma_q16 = encode_q16_16((2.0 * rmin_half / 2.0 ** (1.0 / 6.0)) ** 2)
+    eps_q16 = encode_q16_16(24.0 * eps)
+    return {ids[t]: (t, int(s), int(e)) for t, s, e in zip(types, sigma_q16, eps_q16)}
+
+def _param_word(row):
+    _, _, _, _, _, mass, charge, tid, _, _ = row
+    return (mass & 0xFF) << 24 | charge << 16 | tid
+
+# ==============================================================================
+# 2. COMBINATIONAL CASE TABLES (Default Verilog Output)
+# ==============================================================================
+GENERATED_NOTE = "// Generated by lookup_table_compiler.py from the CHARMM .rtf/.prm -- do not edit by hand."
+
+def write_residue_case(rows, output_filename="residue_database.v", residues=RESIDUES):
+    lines = [GENERATED_NOTE, "`default_nettype none", "",
+             *_RESIDUE_PORTS, "",
+             "    always @(*) begin",
+             "        // Default values to prevent latches",
+             "        is_last_atom = 0;",
+             "        is_backbone  = 0;",
+             "        param_out    = 0;",
+             "",
+             "        case (residue_id)"]
+    for res_id, res in enumerate(residues):
+        lines += [f"            // --- {res_id}. {RESIDUE_LABELS.get(res, res)} ---",
+                  f"            5'd{res_id}: begin",
+                  "                case (atom_index)"]
+        for row in (r for r in rows if r[0] == res_id):
+            _, idx, _, name, atom_type, mass, charge, tid, backbone, last = row
+            flags = f"is_backbone = {int(backbone)};" + (" is_last_atom = 1;" if last else "")
+            lines.append(f"                    4'd{idx}: begin param_out = {{8'd{mass}, 8'h{charge:02X}, "
+                         f"16'h{tid:04X}}}; {flags} end // {name} ({atom_type})")
+        lines += ["                    default: param_out = 0;",
+                  "                endcase",
+                  "            end",
+                  ""]
+    lines += [f"            // --- DEFAULT: Unknown Residue ID ({len(residues)}-{NUM_RESIDUE_IDS - 1} unused) ---",
+              "            default: begin",
+              "                param_out = 32'h00000000;",
+              "                is_last_atom = 0;",
+              "                is_backbone = 0;",
+              "            end",
+              "",
+              "        endcase",
+              "    end",
+              "endmodule"]
+    _write_lines(output_filename, lines)
+
+def write_type_case(table, output_filename="atom_type_table.v"):
+    # Types with identical parameters share one case item
+    groups = {}
+    for tid, (atom_type, sigma, eps) in table.items():
+        groups.setdefault((sigma, eps), []).append((tid, atom_type))
+
+    lines = [GENERATED_NOTE, "`default_nettype none", "",
+             *_TYPE_PORTS, "",
+             "    // CHARMM36 Lennard-Jones parameters as the non-bonded pipeline consumes them:",
+             "    // sigma_q16 = sigma^2 with sigma = Rmin / 2^(1/6), epsilon_q16 = 24 * |Emin|",
+             "    always @(*) begin",
+             "        case (type_id)"]
+    for (sigma, eps), members in groups.items():
+        labels = ", ".join(f"16'h{tid:04X}" for tid, _ in members)
+        names = "/".join(t for _, t in members)
+        lines += [f"            {labels}: begin // {names}",
+                  f"                sigma_q16   = 32'h{sigma:08X}; // sigma^2 = {sigma / 65536.0:.3f} A^2",
+                  f"                epsilon_q16 = 32'h{eps:08X}; // 24 * eps = {eps / 65536.0:.4f} kcal/mol",
+                  "            end"]
+    lines += ["",
+              "            default: begin",
+              f"                sigma_q16   = 32'h{DEFAULT_SIGMA_Q16:08X}; // 1.500 (Default)",
+              f"                epsilon_q16 = 32'h{DEFAULT_EPSILON_Q16:08X}; // 0.100 (Default)",
+              "            end",
+              "        endcase",
+              "    end",
+              "endmodule"]
+    _write_lines(output_filename, lines)
+
+_RESIDUE_PORTS = [
+    "module residue_database (",
+    "    input  wire [4:0]  residue_id,   // e.g., 0=GLY, 1=ALA",
+    "    input  wire [3:0]  atom_index,   // Which atom (0..N)",
+    "    output reg  [31:0] param_out,    // Mass, Charge, Type",
+    "    output reg         is_last_atom, // Flag: End of residue?",
+    "    output reg         is_backbone   // Flag: Is this N, CA, C or O?",
+    ");"]
+
+_TYPE_PORTS = [
+    "module atom_type_table (",
+    "    input  wire [15:0] type_id,     // From your Residue DB",
+    "    output reg  [31:0] sigma_q16,   // Sigma^2 (A^2) in Q16.16",
+    "    output reg  [31:0] epsilon_q16  // 24 * Well Depth (kcal/mol) in Q16.16",
+    ");"]
+
+def _write_lines(output_filename, lines):
+    with open(output_filename, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+
+# ==============================================================================
+# 3. $readmemh ROM IMAGES (Optional Output)
+# ==============================================================================
+# residue ROM: NUM_RESIDUE_IDS x 16 words of 34 bits {is_last_atom, is_backbone,
+# param_out}, address {residue_id, atom_index}; empty slots are all zero.
+# type ROM: one 64-bit {sigma^2, 24 * epsilon} word per type id, row 0 and
+# unused ids hold the default entry; ids past the end read the default too.
+def write_residue_rom(rows, output_filename="residue_database.v", hex_filename="residue_database.hex"):
+    words = np.zeros(NUM_RESIDUE_IDS * MAX_ATOMS_PER_RESIDUE, dtype=np.uint64)
+    for row in rows:
+        words[row[0] * MAX_ATOMS_PER_RESIDUE + row[1]] = row[9] << 33 | row[8] << 32 | _param_word(row)
+    _write_lines(hex_filename, [f"{int(w):09X}" for w in words])
+
+    lines = [GENERATED_NOTE, "`default_nettype none", "",
+             *_RESIDUE_PORTS, "",
+             f"    reg [33:0] rom [0:{len(words) - 1}];",
+             f"    initial $readmemh(\"{os.path.basename(hex_filename)}\", rom);",
+             "",
+             "    always @(*) begin",
+             "        {is_last_atom, is_backbone, param_out} = rom[{residue_id, atom_index}];",
+             "    end",
+             "endmodule"]
+    _write_lines(output_filename, lines)
+
+def write_type_rom(table, output_filename="atom_type_table.v", hex_filename="atom_type_table.hex"):
+    depth = max(table) + 1
+    words = [(DEFAULT_SIGMA_Q16, DEFAULT_EPSILON_Q16)] * depth
+    for tid, (_, sigma, eps) in table.items():
+        words[tid] = (sigma, eps)
+    _write_lines(hex_filename, [f"{s:08X}{e:08X}" for s, e in words])
+
+    lines = [GENERATED_NOTE, "`default_nettype none", "",
+             *_TYPE_PORTS, "",
+             f"    reg [63:0] rom [0:{depth - 1}];",
+             f"    initial $readmemh(\"{os.path.basename(hex_filename)}\", rom);",
+             "",
+             "    always @(*) begin",
+             f"        if (type_id < 16'd{depth}) {{sigma_q16, epsilon_q16}} = rom[type_id];",
+             f"        else {{sigma_q16, epsilon_q16}} = {{32'h{DEFAULT_SIGMA_Q16:08X}, 32'h{DEFAULT_EPSILON_Q16:08X}}};",
+             "    end",
+             "endmodule"]
+    _write_lines(output_filename, lines)
+
+# ==============================================================================
+# 4. COMPILER STAGE
+# ==============================================================================
+def compile_lookup_tables(ff, rom=False, rdb_file="residue_database.v", att_file="atom_type_table.v",
+                          residues=RESIDUES):
+    """
+    Regenerates residue_database.v and atom_type_table.v for the given residues.
+    rom=True emits $readmemh ROM modules (same ports) plus .hex images next to
+    them instead of combinational case statements.
+    """
+    rows = residue_table(ff, residues)
+    table = type_table(ff, [r[4] for r in rows])
+    if rom:
+        write_residue_rom(rows, rdb_file, os.path.splitext(rdb_file)[0] + ".hex")
+        write_type_rom(table, att_file, os.path.splitext(att_file)[0] + ".hex")
+    else:
+        write_residue_case(rows, rdb_file, residues)
+        write_type_case(table, att_file)
+    print(f"Generated {len(rows)} atoms in {len(residues)} residues ({rdb_file}) and "
+          f"{len(table)} atom types ({att_file}){' as ROM images' if rom else ''}")
+    return rows, table
+
+if __name__ == "__main__":
+    import sys
+
+    ff = ForceField()
+    load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
+    compile_lookup_tables(ff, rom="--rom" in sys.argv)
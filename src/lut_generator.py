@@ -0,0 +1,322 @@
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+
+from fixed_point_error import error_stats, ulp_error
+from golden_model import (ACOS_CENTER, ACOS_NEG_EDGE, ACOS_POS_EDGE, CORDIC_LUT, NORM_SEED_LUT, ONE, PI_RADS,
+                          UPPER_CLAMP, UPPER_SHOULDER, acos_poly, cordic_atan2, reciprocal_unit, wrap32)
+from rtl_templates import generated_by, read_template, src_path, write_text
+
+# ==============================================================================
+# 1. MINIMAX FITTING
+# ==============================================================================
+# Lawson's algorithm: iteratively reweighted least squares whose weights pile
+# up where the error peaks, converging on the equioscillating (minimax) fit.
+# Coefficients are returned c0 first, the order acos_poly's Horner loop uses.
+GENERATED_BY = generated_by("lut_generator.py")
+GENERATED_NOTE = f"// {GENERATED_BY}"
+
+def _with_banner(text):
+    """text with GENERATED_NOTE as its first line (replacing one a regenerated template already has)."""
+    if text.startswith(GENERATED_NOTE + "\n"): text = text[len(GENERATED_NOTE) + 1:]
+    return f"{GENERATED_NOTE}\n{text}"
+
+def minimax_fit(f, lo, hi, degree, points=512, iterations=60):
+    """Minimax polynomial of f on [lo, hi]; returns (coefficients, max abs error)."""
+    x = (lo + hi) / 2 + (hi - lo) / 2 * np.cos(np.linspace(np.pi, 0, points)) # Chebyshev spacing
+    y = f(x)
+    basis = np.vander(x, degree + 1, increasing=True)
+    w = np.full(points, 1.0 / points)
+    for _ in range(iterations):
+        sw = np.sqrt(w)
+        c = np.linalg.lstsq(basis * sw[:, None], y * sw, rcond=None)[0]
+        err = np.abs(basis @ c - y)
+        w = w * err
+        if w.sum() == 0: break
+        w /= w.sum()
+    return c, float(np.abs(basis @ c - y).max())
+
+def quantize(values):
+    """Round-to-nearest Q16.16 words (Python ints)."""
+    return [int(v) for v in np.floor(np.asarray(values, dtype=np.float64) * ONE + 0.5).astype(np.int64)]
+
+def _hex32(word):
+    return f"32'h{word & 0xFFFFFFFF:08X}"
+
+# ==============================================================================
+# 2. norm_seed_lut (Seed Depth vs reciprocal_unit Newton Steps)
+# ==============================================================================
+# Seed k covers [1 + k/depth, 1 + (k+1)/depth). s = 2 / (a + b) minimises the
+# worst relative error |1 - s * x| over [a, b], and Newton squares that error
+# each step, so every halving of the table is worth about one more step.
+RECIP_X = np.arange(ONE, 2 * ONE, dtype=np.int64)   # every x_norm reciprocal_unit sees
+
+def seed_table(depth):
+    edges = 1.0 + np.arange(depth + 1) / depth
+    return np.array(quantize(2.0 / (edges[:-1] + edges[1:])), dtype=np.int32)
+
+def seed_error(lut, steps):
+    """Max |ULP| of reciprocal_unit over all of [1, 2) with this seed table."""
+    return float(np.abs(ulp_error(reciprocal_unit(RECIP_X, steps, lut), 2.0 ** 32 / RECIP_X)).max())
+
+def seed_tradeoff(depths=(2, 4, 8, 16, 32, 64, 128), steps=(1, 2, 3, 4, 5, 6)):
+    """{(depth, steps): max ULP} for the generated tables, plus the RTL table at depth 32."""
+    table = {(d, s): seed_error(seed_table(d), s) for d in depths for s in steps}
+    table.update({('RTL', s): seed_error(NORM_SEED_LUT, s) for s in steps})
+    return table
+
+def pick_seed(tradeoff, budget):
+    """Fewest Newton steps (pipeline stages) first, then the smallest table, within budget."""
+    ok = sorted((s, d) for (d, s), e in tradeoff.items() if d != 'RTL' and e <= budget)
+    if not ok: raise ValueError(f"no seed depth reaches {budget} ULP")
+    return ok[0][1], ok[0][0]
+
+def write_norm_seed_lut(lut, output_filename="norm_seed_lut.v"):
+    """Same ports as norm_seed_lut.v; the index is the top log2(depth) fraction bits."""
+    depth = len(lut)
+    bits = depth.bit_length() - 1
+    lines = [GENERATED_NOTE, "`default_nettype none", "",
+             "module norm_seed_lut (",
+             "    input  wire [31:0] d_in,    // Always 1.0 to 1.999 (Q16.16)",
+             "    output reg  [31:0] seed_out // Guesses 0.5 to 1.0 (Q16.16)",
+             ");",
+             f"    // Look at the top {bits} bits of the fraction (bits 15:{16 - bits})",
+             f"    wire [{bits - 1}:0] index = d_in[15:{16 - bits}];",
+             "",
+             "    always @(*) begin",
+             "        case (index)",
+             f"            // Minimax 1/x seeds for the range [1.0, 2.0), {depth} segments"]
+    for k, seed in enumerate(np.asarray(lut).tolist()):
+        mid = 1.0 + (k + 0.5) / depth
+        lines.append(f"            {bits}'d{k}:{' ' * (len(str(depth - 1)) - len(str(k)) + 1)}seed_out = "
+                     f"32'h{seed >> 16:04X}_{seed & 0xFFFF:04X}; // 1 / {mid:.3f} = {seed / ONE:.3f}")
+    lines += ["        endcase", "    end", "endmodule", ""]
+    write_text(output_filename, "\n".join(lines))
+
+# ==============================================================================
+# 3. cordic_atan2 (Angle Table and Step Count)
+# ==============================================================================
+# atan_lut[i] = atan(2^-i) in Q16.16. The RTL table truncates; rounding is an
+# option. Errors are measured on the radii the dihedral core feeds in
+# (dot products of unit vectors, r ~ 1); below r ~ 2^-3 the truncating
+# shifts dominate whatever the table holds.
+def cordic_table(steps, rounding="round"):
+    angles = np.arctan(2.0 ** -np.arange(steps)) * ONE
+    return tuple(int(v) for v in (np.floor(angles + 0.5) if rounding == "round" else np.trunc(angles)))
+
+def cordic_samples(n, rng, r_lo=0.5, r_hi=2.0):
+    theta = rng.uniform(-np.pi, np.pi, n)
+    r = 2.0 ** rng.uniform(np.log2(r_lo), np.log2(r_hi), n)
+    x = wrap32(np.trunc(r * np.cos(theta) * ONE))
+    y = wrap32(np.trunc(r * np.sin(theta) * ONE))
+    return x, y, np.arctan2(y.astype(np.float64), x) * ONE
+
+def cordic_error(lut, steps, samples):
+    x, y, ref = samples
+    out = cordic_atan2(x, y, steps, lut).astype(np.float64)
+    wrapped = ref + np.round((out - ref) / (2 * np.pi * ONE)) * 2 * np.pi * ONE
+    return error_stats(ulp_error(out, wrapped), wrapped)
+
+def cordic_tradeoff(samples, steps=range(8, 19), roundings=("trunc", "round")):
+    table = {(r, s): cordic_error(cordic_table(s, r), s, samples) for r in roundings for s in steps}
+    table.update({('RTL', 16): cordic_error(CORDIC_LUT, 16, samples)})
+    return table
+
+def pick_cordic(tradeoff, budget):
+    """Fewest steps (cycles) within budget, rounding preferred on ties; else the most accurate."""
+    ok = sorted((s, r != "round") for (r, s), e in tradeoff.items() if r != 'RTL' and e['max_ulp'] <= budget)
+    if ok: return ok[0][0], "trunc" if ok[0][1] else "round"
+    (r, s), _ = min(((k, e) for k, e in tradeoff.items() if k[0] != 'RTL'), key=lambda kv: (kv[1]['max_ulp'], kv[0][1]))
+    return s, r
+
+def write_cordic_atan2(lut, output_filename="cordic_atan2.v", template=src_path("cordic_atan2.v")):
+    """cordic_atan2.v with the atan_lut initial block and the last step replaced."""
+    text = read_template(template)
+    steps = len(lut)
+    entries = [f"atan_lut[{k}]{' ' if k < 10 else ''}= 32'h{v:08X};" for k, v in enumerate(lut)]
+    body = "\n".join("        " + " ".join(entries[k:k + 3]) for k in range(0, steps, 3))
+    block = ("    // LUT: atan(2^-i) in Q16.16\n"
+             f"    reg signed [31:0] atan_lut [0:{steps - 1}];\n    initial begin\n{body}\n    end")
+    text, n_lut = re.subn(r"    // LUT[^\n]*\n    reg signed \[31:0\] atan_lut \[0:\d+\];\n    initial begin\n.*?\n    end",
+                          lambda m: block, text, flags=re.S)
+    text, n_step = re.subn(r"if \(step == \d+\)", f"if (step == {steps - 1})", text)
+    if n_lut != 1 or n_step != 1: raise ValueError(f"{template}: atan_lut block or last-step test not found")
+    if steps > 31: raise ValueError("step is a 5-bit counter")
+    write_text(output_filename, _with_banner(text))
+
+# ==============================================================================
+# 4. acos_poly (Segment Placement and Minimax Coefficients)
+# ==============================================================================
+# acos_poly routes x to one of three segments: a centre polynomial on
+# [-s, s], shoulder polynomials on s < |x| < c and constants (0, pi) beyond
+# the clamp c. acos(-x) = pi - acos(x), so the negative shoulder is the
+# mirror of the positive one (same odd coefficients, even ones mapped).
+# Placement scans s on a 1/64 grid and bisects c over Q16.16 words: the
+# shoulder error grows with c while the clamp error acos(c) shrinks.
+ACOS_X = np.arange(-ONE, ONE + 1, dtype=np.int64)
+
+def _mirror(coeffs):
+    """Negative-shoulder coefficients from the positive ones: pi - p(-x)."""
+    c = [(-v if k % 2 == 0 else v) for k, v in enumerate(coeffs)]
+    c[0] += PI_RADS
+    return tuple(c)
+
+def _acos_error(design):
+    return ulp_error(acos_poly(wrap32(ACOS_X), **design), np.arccos(ACOS_X / ONE) * ONE)
+
+def place_acos(center_degree=3, shoulder_degree=1):
+    """Float-domain placement; returns (shoulder, clamp, center fit, shoulder fit, max error in rad)."""
+    best = None
+    for s in np.arange(32, 63) / 64:
+        c_fit, e_center = minimax_fit(np.arccos, -s, s, center_degree)
+        if best is not None and e_center >= best[-1]: continue
+        lo, hi = int(s * ONE) + 1, ONE - 1
+        while lo < hi: # Smallest clamp word whose shoulder error reaches the clamp error
+            mid = (lo + hi) // 2
+            if minimax_fit(np.arccos, s, mid / ONE, shoulder_degree)[1] >= np.arccos(mid / ONE): hi = mid
+            else: lo = mid + 1
+        for c in {lo - 1, lo} - {int(s * ONE)}:
+            s_fit, e_shoulder = minimax_fit(np.arccos, s, c / ONE, shoulder_degree)
+            e = max(e_center, e_shoulder, np.arccos(c / ONE))
+            if best is None or e < best[-1]: best = (s, c / ONE, c_fit, s_fit, e)
+    return best
+
+def design_acos(center_degree=3, shoulder_degree=1):
+    """
+    Quantised design for golden_model.acos_poly / acos_poly.v. After rounding,
+    each segment's c0 is re-centred on its bit-exact error band.
+    """
+    s, c, c_fit, s_fit, _ = place_acos(center_degree, shoulder_degree)
+    design = {'center': tuple(quantize(c_fit)), 'pos_edge': tuple(quantize(s_fit)),
+              'shoulder': int(s * ONE), 'clamp': int(c * ONE)}
+    design['neg_edge'] = _mirror(design['pos_edge'])
+    err = _acos_error(design)
+    a = np.abs(ACOS_X)
+    for key, mask in (('center', a <= design['shoulder']),
+                      ('pos_edge', (ACOS_X > design['shoulder']) & (ACOS_X < design['clamp']))):
+        shift = int(np.round((err[mask].max() + err[mask].min()) / 2))
+        design[key] = (design[key][0] - shift,) + design[key][1:]
+    design['neg_edge'] = _mirror(design['pos_edge'])
+    return design
+
+RTL_ACOS = {'center': ACOS_CENTER, 'pos_edge': ACOS_POS_EDGE, 'neg_edge': ACOS_NEG_EDGE,
+            'shoulder': UPPER_SHOULDER, 'clamp': UPPER_CLAMP}
+
+def acos_report(design):
+    """Bit-exact error over every word of [-1, 1], total and per segment."""
+    err = _acos_error(design)
+    ref = np.arccos(ACOS_X / ONE) * ONE
+    a = np.abs(ACOS_X)
+    regions = {'center': a <= design['shoulder'], 'shoulder': (a > design['shoulder']) & (a < design['clamp']),
+               'clamp': a >= design['clamp']}
+    return {'all': error_stats(err, ref), **{k: error_stats(err[m], ref[m]) for k, m in regions.items() if m.any()}}
+
+def acos_tradeoff(degrees=((1, 1), (3, 1), (3, 3), (5, 3))):
+    """{(center degree, shoulder degree): (design, report)}; Horner steps = the larger degree."""
+    return {d: (lambda design: (design, acos_report(design)))(design_acos(*d)) for d in degrees}
+
+def write_acos_poly(design, output_filename="acos_poly.v", template=src_path("acos_poly.v")):
+    """acos_poly.v with new constants and thresholds; the datapath has 3 Horner steps (degree <= 3)."""
+    center, pos, neg = (tuple(design[k]) + (0,) * (4 - len(design[k])) for k in ('center', 'pos_edge', 'neg_edge'))
+    if max(len(design['center']), len(design['pos_edge'])) > 4:
+        raise ValueError("acos_poly.v evaluates cubics; deeper fits need more Horner stages")
+    if pos[1] != neg[1] or pos[3] != neg[3]: raise ValueError("shoulders must share their odd coefficients")
+    s, c = design['shoulder'], design['clamp']
+    lines = [f"    // SET 1: Center minimax, degree {len(design['center']) - 1} (For -{s / ONE:.4f} to +{s / ONE:.4f})"]
+    lines += [f"    localparam signed [31:0] MAC_C{k} = {_hex32(v)}; // {v / ONE:.5f}" for k, v in enumerate(center)]
+    lines += ["", f"    // SET 2: Edge minimax fits ({s / ONE:.4f} < |x| < {c / ONE:.4f}, negative side mirrored)",
+              f"    localparam signed [31:0] EDGE_C1     = {_hex32(pos[1])}; // {pos[1] / ONE:.5f}",
+              f"    localparam signed [31:0] EDGE_POS_C0 = {_hex32(pos[0])}; // {pos[0] / ONE:.5f}",
+              f"    localparam signed [31:0] EDGE_NEG_C0 = {_hex32(neg[0])}; // {neg[0] / ONE:.5f}"]
+    cubic_edge = any(pos[2:]) or any(neg[2:])
+    if cubic_edge:
+        lines += [f"    localparam signed [31:0] EDGE_C3     = {_hex32(pos[3])}; // {pos[3] / ONE:.5f}",
+                  f"    localparam signed [31:0] EDGE_POS_C2 = {_hex32(pos[2])}; // {pos[2] / ONE:.5f}",
+                  f"    localparam signed [31:0] EDGE_NEG_C2 = {_hex32(neg[2])}; // {neg[2] / ONE:.5f}"]
+    lines += ["", "    // Thresholds",
+              f"    localparam signed [31:0] UPPER_CLAMP = {_hex32(c)}; //  {c / ONE:.4f}",
+              f"    localparam signed [31:0] UPPER_SHOULDER= {_hex32(s)}; //  {s / ONE:.4f}",
+              f"    localparam signed [31:0] LOWER_SHOULDER= {_hex32(-s)}; // -{s / ONE:.4f}",
+              f"    localparam signed [31:0] LOWER_CLAMP = {_hex32(-c)}; // -{c / ONE:.4f}"]
+
+    text = read_template(template)
+    text, n = re.subn(r"    // SET 1:.*?localparam signed \[31:0\] LOWER_CLAMP[^\n]*",
+                      lambda m: "\n".join(lines), text, count=1, flags=re.S)
+    if n != 1: raise ValueError(f"{template}: coefficient block not found")
+    if cubic_edge:
+        for side in ("POS", "NEG"):
+            text, n = re.subn(rf"(curr_c0 <= EDGE_{side}_C0; curr_c1 <= EDGE_C1;\s*)curr_c2 <= \w+; curr_c3 <= \w+;"
+                              r"(\s*)acc <= \w+;[^\n]*",
+                              rf"\1curr_c2 <= EDGE_{side}_C2; curr_c3 <= EDGE_C3;\2acc <= EDGE_C3;", text)
+            if n != 1: raise ValueError(f"{template}: {side.lower()} shoulder router not found")
+    write_text(output_filename, _with_banner(text))
+
+# ==============================================================================
+# 5. REPORT AND OUTPUT
+# ==============================================================================
+def write_hex(words, output_filename):
+    write_text(output_filename, "".join(f"{w & 0xFFFFFFFF:08X}\n" for w in np.asarray(words).tolist()))
+
+def print_seed_tradeoff(table, pick):
+    steps = sorted({s for _, s in table})
+    print(f"reciprocal_unit max |ULP| over [1, 2): seed depth x Newton steps (RTL: 32 entries, 6 steps)")
+    print(f"  {'depth':>6} " + " ".join(f"{s:>9}" for s in steps))
+    for d in dict.fromkeys(d for d, _ in table):
+        mark = " <-" if d == pick[0] else ""
+        print(f"  {d:>6} " + " ".join(f"{table[(d, s)]:9.1f}" for s in steps) + mark)
+
+def print_cordic_tradeoff(table, pick):
+    print("cordic_atan2 max / mean |ULP| at r in [0.5, 2): table rounding x steps (RTL: trunc, 16)")
+    for (r, s), e in table.items():
+        mark = " <-" if (s, r) == pick else ""
+        print(f"  {r:>5} {s:3d} steps  max {e['max_ulp']:7.1f}  mean {e['mean_ulp']:6.2f}{mark}")
+
+def print_acos_tradeoff(table, rtl):
+    print("acos_poly max |ULP| over [-1, 1] (Horner steps = larger degree; the RTL runs 3)")
+    rows = [("RTL (3, 1)", rtl)] + [(f"minimax {d}", rep) for d, (_, rep) in table.items()]
+    for name, rep in rows:
+        parts = "  ".join(f"{k} {v['max_ulp']:8.1f}" for k, v in rep.items())
+        print(f"  {name:<14} {parts}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit the norm_seed_lut / cordic_atan2 / acos_poly tables.")
+    parser.add_argument("--recip-budget", type=float, default=1.0, help="reciprocal_unit max ULP over [1, 2)")
+    parser.add_argument("--cordic-budget", type=float, default=16.0, help="cordic_atan2 max ULP at r ~ 1")
+    parser.add_argument("--acos-degrees", default="3,1", help="centre,shoulder degree for acos_poly.v (<= 3)")
+    parser.add_argument("--samples", type=int, default=1 << 20, help="CORDIC test vectors")
+    parser.add_argument("-o", "--out-dir", default="generated_tables")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    seeds = seed_tradeoff()
+    depth, steps = pick_seed(seeds, args.recip_budget)
+    print_seed_tradeoff(seeds, (depth, steps))
+    print(f"  -> {depth} seeds, {steps} Newton steps within {args.recip_budget:g} ULP "
+          f"(reciprocal_unit.v has 6 stages)\n")
+
+    samples = cordic_samples(args.samples, np.random.default_rng(0))
+    cordic = cordic_tradeoff(samples)
+    c_steps, c_round = pick_cordic(cordic, args.cordic_budget)
+    print_cordic_tradeoff(cordic, (c_steps, c_round))
+    print(f"  -> {c_steps} steps, {c_round}ed table (budget {args.cordic_budget:g} ULP); S_BND_WAIT changes by "
+          f"{c_steps - 16} cycles (golden_model.BND_WAIT_CYCLES)\n")
+
+    acos = acos_tradeoff()
+    print_acos_tradeoff(acos, acos_report(RTL_ACOS))
+    degrees = tuple(int(d) for d in args.acos_degrees.split(","))
+    design = acos[degrees][0] if degrees in acos else design_acos(*degrees)
+    print(f"  -> {degrees}: shoulder {design['shoulder'] / ONE:.4f}, clamp {design['clamp'] / ONE:.4f}\n")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    print(f"Writing {args.out_dir}/ (drop-in replacements; golden_model needs the same tables to stay bit-exact):")
+    lut = seed_table(depth)
+    write_norm_seed_lut(lut, os.path.join(args.out_dir, "norm_seed_lut.v"))
+    write_hex(lut, os.path.join(args.out_dir, "norm_seed_lut.hex"))
+    atan_lut = cordic_table(c_steps, c_round)
+    write_cordic_atan2(atan_lut, os.path.join(args.out_dir, "cordic_atan2.v"))
+    write_hex(atan_lut, os.path.join(args.out_dir, "cordic_atan_lut.hex"))
+    write_acos_poly(design, os.path.join(args.out_dir, "acos_poly.v"))
+    print(f"Done in {time.perf_counter() - t0:.1f} s")
@@ -0,0 +1,413 @@
+import argparse
+import time
+
+import numpy as np
+
+from fixed_point import encode_q16_16
+from golden_model import from_q16, phase_schedule, qmult, wrap32
+from host_loader import CLOCK_HZ, read_coordinates
+from neighbor_list import VerletList
+from parameter_compiler_new import pair_coefficients
+from topology import NonbondedExclusions, Topology, bonded_tables
+
+# ==============================================================================
+# 1. UNITS (AKMA: Angstrom, kcal/mol, amu, 48.888 fs)
+# ==============================================================================
+# With masses in amu and energies in kcal/mol the natural time unit is
+# 48.88821 fs, so velocities are Angstrom per AKMA time unit and
+# a = F / m needs no conversion factor. Typical thermal velocities (0.1 - 1)
+# and per-step moves (~0.01 A) sit comfortably inside Q16.16.
+KB = 0.0019872041   # kcal/mol/K
+AKMA_FS = 48.88821  # fs per AKMA time unit
+
+def _q16_words(values):
+    """Truncating, saturating Q16.16 words, like the hex images the compilers write."""
+    return wrap32(encode_q16_16(values))
+
+def _q16_round(values):
+    """Value of the nearest Q16.16 word (integrator constants)."""
+    return from_q16(wrap32(encode_q16_16(values, rounding="nearest")))
+
+# ==============================================================================
+# 2. FORCE FIELD TERMS (Real Topology, Batched Over Terms)
+# ==============================================================================
+# Bonds kb (r - r0)^2, angles k_theta (theta - theta0)^2, dihedrals
+# sum k_phi (1 + cos(n phi - delta)) over every Fourier term, and over the
+# non-excluded pairs KC q_i q_j / r + 4 eps (sr12 - sr6). Parameters are the
+# ones the compilers emit: bonded_tables (compile_hex_file's unit conversions),
+# pair_coefficients / coefficients14 ({KC q_i q_j, Sig^2, 24 Eps}, 1-4 pairs
+# with the .prm 1-4 LJ values). 1-2 / 1-3 pairs are excluded. Impropers, CMAP
+# and Urey-Bradley terms are not part of Topology yet and are left out.
+class ForceTerms:
+    def __init__(self, ff, topo, cutoff=None, skin=2.0, q16=False):
+        """
+        cutoff=None evaluates every non-excluded pair; otherwise pairs come from a
+        VerletList of cutoff + skin and are truncated at cutoff (no switching,
+        pair energies shifted to zero there).
+        q16=True stores every parameter as its Q16.16 word value.
+        """
+        self.n = len(topo.atoms)
+        self.q16 = q16
+        param = (lambda a: from_q16(_q16_words(a))) if q16 else np.asarray
+
+        tables = bonded_tables(ff, topo)
+        rows, params = tables['bond']
+        self.bond_idx = np.array([r[:2] for r in rows], dtype=np.int64).reshape(-1, 2)
+        self.r0, self.kb = param(np.array(params, dtype=np.float64).reshape(-1, 2)[[r[2] for r in rows]].T)
+
+        rows, params = tables['angle']
+        self.angle_idx = np.array([r[:3] for r in rows], dtype=np.int64).reshape(-1, 3)
+        self.theta0, self.k_theta = param(np.array(params, dtype=np.float64).reshape(-1, 2)[[r[3] for r in rows]].T)
+
+        rows, params = tables['dihedral']
+        self.dihedral_idx = np.array([r[:4] for r in rows], dtype=np.int64).reshape(-1, 4)
+        dih = np.array(params, dtype=np.float64).reshape(-1, 3)[[r[4] for r in rows]]
+        self.delta, self.k_phi = param(dih[:, :2].T)
+        self.period = dih[:, 2]
+
+        # Non-bonded: every non-excluded pair (1-4 rows carry the 1-4 parameters)
+        self.ff, self.atoms = ff, topo.atoms
+        self.excl = NonbondedExclusions(topo)
+        self.pairs14 = self.excl.pairs14
+        self.coeffs14 = param(self.excl.coefficients14(ff).T).T.reshape(-1, 3)
+        self._param = param
+        self.cutoff, self.skin = cutoff, skin
+        self.vlists = [] # one VerletList per batched replica (cutoff mode)
+        if cutoff is None:
+            self._set_pairs(*np.triu_indices(self.n, k=1))
+
+    def _set_pairs(self, pair_i, pair_j):
+        pair_i, pair_j, is14 = self.excl.filter(pair_i, pair_j)
+        pair_i, pair_j = pair_i[~is14], pair_j[~is14]
+        coeffs = self._param(pair_coefficients(self.ff, self.atoms, pair_i, pair_j).T).T.reshape(-1, 3)
+        self.pair_i = np.concatenate([pair_i, self.pairs14[:, 0]])
+        self.pair_j = np.concatenate([pair_j, self.pairs14[:, 1]])
+        self.kqq, self.sigma_sq, self.eps_x24 = np.concatenate([coeffs, self.coeffs14]).T
+
+    def update_pairs(self, x):
+        """
+        Refreshes the Verlet lists (cutoff mode); returns True when one was
+        rebuilt. Every replica of a batch keeps its own list and the pair loop
+        runs over their union, truncated at the cutoff per replica, so no
+        replica misses a pair another one's list would not have held.
+        """
+        if self.cutoff is None: return False
+        frames = x.reshape(-1, self.n, 3)
+        if len(frames) != len(self.vlists):
+            self.vlists = [VerletList(self.cutoff, self.skin, min_separation=1) for _ in frames]
+        rebuilt = [vlist.update(frame) for vlist, frame in zip(self.vlists, frames)]
+        if not any(rebuilt): return False
+        keys = np.unique(np.concatenate([vlist.pair_i * self.n + vlist.pair_j for vlist in self.vlists]))
+        self._set_pairs(keys // self.n, keys % self.n)
+        return True
+
+    # --- Batched term evaluation ---------------------------------------------
+    def _scatter(self, acc, idx, f):
+        """acc[..., idx[:, k], :] += f[k] for every slot k of the term."""
+        for k, fk in enumerate(f):
+            contrib = np.moveaxis(_q16_words(fk) if self.q16 else fk, -2, 0)
+            np.add.at(acc, idx[:, k], contrib)
+
+    def energy_forces(self, x):
+        """
+        x: (..., n, 3) Angstrom. Returns ({term: energy (...)} in kcal/mol,
+        forces (..., n, 3) kcal/mol/A). In q16 mode the forces are int32 words:
+        each term's contribution to an atom is truncated to Q16.16 and summed in
+        wrapping 32-bit accumulators, like acc_fx/fy/fz in md_system_top.
+        """
+        self.update_pairs(x)
+        batch = x.shape[:-2]
+        acc = np.zeros((self.n,) + batch + (3,), dtype=np.int64 if self.q16 else np.float64)
+        energy = {}
+        norm = lambda v: np.sqrt((v * v).sum(axis=-1))
+        dot = lambda a, b: (a * b).sum(axis=-1)
+
+        # Bonds: dE/dr = 2 kb (r - r0)
+        i, j = self.bond_idx.T
+        d = x[..., j, :] - x[..., i, :]
+        r = norm(d)
+        energy['bond'] = (self.kb * (r - self.r0) ** 2).sum(axis=-1)
+        f_i = (2.0 * self.kb * (r - self.r0) / r)[..., None] * d
+        self._scatter(acc, self.bond_idx, (f_i, -f_i))
+
+        # Angles: dE/dtheta = 2 k_theta (theta - theta0)
+        a, b, c = self.angle_idx.T
+        ba, bc = x[..., a, :] - x[..., b, :], x[..., c, :] - x[..., b, :]
+        l_ba, l_bc = norm(ba), norm(bc)
+        u_ba, u_bc = ba / l_ba[..., None], bc / l_bc[..., None]
+        cos = np.clip(dot(u_ba, u_bc), -1.0, 1.0)
+        theta = np.arccos(cos)
+        sin = np.maximum(np.sqrt(1.0 - cos * cos), 1e-8)
+        energy['angle'] = (self.k_theta * (theta - self.theta0) ** 2).sum(axis=-1)
+        de = 2.0 * self.k_theta * (theta - self.theta0)
+        f_a = (de / (l_ba * sin))[..., None] * (u_bc - cos[..., None] * u_ba)
+        f_c = (de / (l_bc * sin))[..., None] * (u_ba - cos[..., None] * u_bc)
+        self._scatter(acc, self.angle_idx, (f_a, -(f_a + f_c), f_c))
+
+        # Dihedrals (IUPAC sign): dE/dphi = -k_phi n sin(n phi - delta)
+        a, b, c, dd = self.dihedral_idx.T
+        b1, b2, b3 = x[..., b, :] - x[..., a, :], x[..., c, :] - x[..., b, :], x[..., dd, :] - x[..., c, :]
+        m, nn = np.cross(b1, b2), np.cross(b2, b3)
+        l_b2 = norm(b2)
+        phi = np.arctan2(l_b2 * dot(b1, nn), dot(m, nn))
+        arg = self.period * phi - self.delta
+        energy['dihedral'] = (self.k_phi * (1.0 + np.cos(arg))).sum(axis=-1)
+        de = -self.k_phi * self.period * np.sin(arg)
+        g_a = -(l_b2 / np.maximum(dot(m, m), 1e-12))[..., None] * m
+        g_d = (l_b2 / np.maximum(dot(nn, nn), 1e-12))[..., None] * nn
+        s1, s3 = (dot(b1, b2) / (l_b2 * l_b2))[..., None], (dot(b3, b2) / (l_b2 * l_b2))[..., None]
+        g_b = s3 * g_d - (s1 + 1.0) * g_a
+        g_c = s1 * g_a - (s3 + 1.0) * g_d
+        self._scatter(acc, self.dihedral_idx, tuple(-de[..., None] * g for g in (g_a, g_b, g_c, g_d)))
+
+        # Non-bonded pairs: F_i = (KQQ / r^3 + 24 eps (2 sr12 - sr6) / r^2) d, d = x_i - x_j
+        d = x[..., self.pair_i, :] - x[..., self.pair_j, :]
+        r2_inv = 1.0 / (d * d).sum(axis=-1)
+        r_inv = np.sqrt(r2_inv)
+        sr6 = (self.sigma_sq * r2_inv) ** 3
+        e_coul = self.kqq * r_inv
+        e_lj = self.eps_x24 / 6.0 * (sr6 * sr6 - sr6)
+        inside = 1.0
+        if self.cutoff is not None:
+            # Truncated forces; energies shifted to zero at the cutoff so pairs
+            # crossing it do not make E_pot jump
+            inside = r2_inv * self.cutoff ** 2 > 1.0
+            sr6_c = (self.sigma_sq / self.cutoff ** 2) ** 3
+            e_coul = (e_coul - self.kqq / self.cutoff) * inside
+            e_lj = (e_lj - self.eps_x24 / 6.0 * (sr6_c * sr6_c - sr6_c)) * inside
+        energy['coulomb'], energy['lj'] = e_coul.sum(axis=-1), e_lj.sum(axis=-1)
+        f_i = ((self.kqq * r_inv + self.eps_x24 * (2.0 * sr6 * sr6 - sr6)) * r2_inv * inside)[..., None] * d
+        self._scatter(acc, np.column_stack([self.pair_i, self.pair_j]), (f_i, -f_i))
+
+        forces = np.moveaxis(acc, 0, -2)
+        return energy, (wrap32(forces) if self.q16 else forces)
+
+# ==============================================================================
+# 3. VELOCITY VERLET (float64 or Q16.16 State)
+# ==============================================================================
+# float64 : x, v and F in float64.
+# q16     : x, v and F are int32 Q16.16 words (as atom_regfile / acc_* hold
+#           them); the terms are evaluated on the word values with Q16.16
+#           parameters and every force contribution is truncated to a word.
+#           Updates use the truncating qmult with constants rounded to the
+#           nearest word: v += qmult(qmult(F, dt/2), 1/m), x += qmult(v, dt).
+#           dt/2 and 1/m are applied one after the other because dt/(2m) alone
+#           would only have ~55 LSBs for carbon at 1 fs (1.5% scale error).
+class VelocityVerlet:
+    def __init__(self, terms, masses, dt_fs=1.0, mode="float64"):
+        if mode not in ("float64", "q16"): raise ValueError(f"Unknown mode '{mode}'")
+        self.terms, self.mode = terms, mode
+        self.masses = np.asarray(masses, dtype=np.float64)
+        self.dt = dt_fs / AKMA_FS
+        self.dt_fs = dt_fs
+        if mode == "q16":
+            self.dt_word = _q16_words(_q16_round(self.dt))
+            self.half_dt_word = _q16_words(_q16_round(0.5 * self.dt))
+            self.inv_mass_word = _q16_words(_q16_round(1.0 / self.masses))[:, None]
+        self.steps = 0
+
+    # --- State ----------------------------------------------------------------
+    def set_state(self, x, v):
+        """x (Angstrom) and v (Angstrom / AKMA time) as floats, converted for the mode."""
+        if self.mode == "q16":
+            self.x, self.v = _q16_words(x), _q16_words(v)
+        else:
+            self.x, self.v = np.array(x, dtype=np.float64), np.array(v, dtype=np.float64)
+        self.energy, self.f = self.terms.energy_forces(self.positions())
+
+    def positions(self):
+        return from_q16(self.x) if self.mode == "q16" else self.x
+
+    def velocities(self):
+        return from_q16(self.v) if self.mode == "q16" else self.v
+
+    def kinetic(self):
+        v = self.velocities()
+        return 0.5 * (self.masses[:, None] * v * v).sum(axis=(-1, -2))
+
+    def temperature(self):
+        dof = 3 * len(self.masses) - 3 # centre-of-mass motion removed
+        return 2.0 * self.kinetic() / (dof * KB)
+
+    # --- Integration ----------------------------------------------------------
+    def _kick(self):
+        if self.mode == "q16":
+            self.v = wrap32(self.v + qmult(qmult(self.f, self.half_dt_word), self.inv_mass_word))
+        else:
+            self.v += 0.5 * self.dt * self.f / self.masses[:, None]
+
+    def step(self, n=1):
+        for _ in range(n):
+            self._kick()
+            if self.mode == "q16":
+                self.x = wrap32(self.x + qmult(self.v, self.dt_word))
+            else:
+                self.x += self.dt * self.v
+            self.energy, self.f = self.terms.energy_forces(self.positions())
+            self._kick()
+            self.steps += 1
+
+    def run(self, steps, report_every=100):
+        """Integrates and returns [(step, time_ps, E_pot, E_kin, E_total, T)] every report_every steps."""
+        records = [self._record()]
+        for _ in range(steps // report_every):
+            self.step(report_every)
+            records.append(self._record())
+        self.step(steps % report_every)
+        return records
+
+    def _record(self):
+        e_pot = float(np.sum(list(self.energy.values())))
+        e_kin = float(self.kinetic())
+        return (self.steps, self.steps * self.dt_fs * 1e-3, e_pot, e_kin, e_pot + e_kin, float(self.temperature()))
+
+def maxwell_boltzmann(masses, temperature, rng):
+    """Velocities (Angstrom / AKMA time) at temperature K with zero total momentum."""
+    masses = np.asarray(masses, dtype=np.float64)
+    v = rng.normal(size=(len(masses), 3)) * np.sqrt(KB * temperature / masses)[:, None]
+    v -= (masses[:, None] * v).sum(axis=0) / masses.sum()
+    return v
+
+# ==============================================================================
+# 4. STARTING STRUCTURE (Graph Embedding + Relaxation)
+# ==============================================================================
+def build_coordinates(topo, rng, bond=1.4):
+    """
+    Rough coordinates from the bond graph: a breadth-first walk puts every new
+    atom one bond length from its parent, pointing away from the parent's
+    placed neighbours with some random spread. Ring closures and clashes are
+    left to relax().
+    """
+    n = len(topo.atoms)
+    x = np.zeros((n, 3))
+    placed = np.zeros(n, dtype=bool)
+    for root in range(n):
+        if placed[root]: continue
+        x[root] = rng.normal(size=3) * 0.1 + (x[placed].max(axis=0) + 3.0 if placed.any() else 0.0)
+        placed[root] = True
+        queue = [root]
+        while queue:
+            p = queue.pop(0)
+            for c in topo.neighbors[p]:
+                if placed[c]: continue
+                nbrs = [k for k in topo.neighbors[p] if placed[k]]
+                away = x[p] - x[nbrs].mean(axis=0) if nbrs else rng.normal(size=3)
+                if np.linalg.norm(away) < 1e-6: away = rng.normal(size=3)
+                dirn = away / np.linalg.norm(away) + 0.9 * rng.normal(size=3) / np.sqrt(3.0)
+                x[c] = x[p] + bond * dirn / np.linalg.norm(dirn)
+                placed[c] = True
+                queue.append(c)
+    return x
+
+def relax(terms, x, steps=2000, max_move=0.05, step_size=1e-3):
+    """Steepest descent with a per-atom move clamp (the ASIC's scheme, in float64)."""
+    x = np.array(x, dtype=np.float64)
+    for _ in range(steps):
+        _, f = terms.energy_forces(x)
+        move = step_size * f
+        length = np.linalg.norm(move, axis=-1, keepdims=True)
+        x += move * np.minimum(1.0, max_move / np.maximum(length, 1e-12))
+    return x
+
+# ==============================================================================
+# 5. THROUGHPUT (Host ns/day vs the md_system_top Schedule)
+# ==============================================================================
+# One md_system_top iteration evaluates every bonded window and streamed pair
+# once and updates all atoms, i.e. the work of one MD step on the chain model.
+# Past 62 atoms (the 6-bit nb_i / nb_j limit) the same FSM with wider counters
+# is extrapolated: S_NB_* takes 4 cycles per pair plus n + 17.
+def asic_cycles_per_iteration(num_atoms):
+    if num_atoms <= 62:
+        return phase_schedule(max(num_atoms, 4))['total']
+    pairs = (num_atoms - 2) * (num_atoms - 3) // 2
+    return 1 + (num_atoms - 3) * phase_schedule(4)['bonded'] + 4 * pairs + num_atoms + 17 + 3 * num_atoms
+
+def ns_per_day(steps, seconds, dt_fs):
+    return steps / seconds * dt_fs * 86400.0 * 1e-6
+
+def benchmark(ff, residue_counts=(1, 4, 16, 64), steps=50, dt_fs=1.0, seed=0, clock_hz=CLOCK_HZ):
+    """Host float64 / Q16.16 ns/day against md_system_top at clock_hz, per system size."""
+    rng = np.random.default_rng(seed)
+    residues = ['ALA', 'GLY', 'SER', 'LEU', 'LYS', 'GLU', 'PHE', 'VAL']
+    rows = []
+    for count in residue_counts:
+        topo = Topology.from_residues(ff, [residues[k] for k in rng.integers(0, len(residues), count)])
+        terms = ForceTerms(ff, topo)
+        x = relax(terms, build_coordinates(topo, rng), steps=200)
+        v = maxwell_boltzmann(masses_of(ff, topo), 300.0, rng)
+        row = {'atoms': len(topo.atoms), 'pairs': len(terms.pair_i)}
+        for mode in ("float64", "q16"):
+            engine = VelocityVerlet(ForceTerms(ff, topo, q16=(mode == "q16")), masses_of(ff, topo), dt_fs, mode)
+            engine.set_state(x, v)
+            t0 = time.perf_counter()
+            engine.step(steps)
+            row[mode] = ns_per_day(steps, time.perf_counter() - t0, dt_fs)
+        cycles = asic_cycles_per_iteration(row['atoms'])
+        row['asic_cycles'] = cycles
+        row['asic'] = ns_per_day(clock_hz / cycles, 1.0, dt_fs)
+        rows.append(row)
+    return rows
+
+def print_benchmark(rows, dt_fs, clock_hz=CLOCK_HZ):
+    print(f"ns/day at dt = {dt_fs:g} fs (md_system_top at {clock_hz / 1e6:g} MHz, one iteration per step):")
+    print(f"  {'atoms':>6} {'pairs':>8} {'host f64':>10} {'host q16':>10} {'asic cyc':>10} {'asic':>10}  faster")
+    for r in rows:
+        faster = "asic" if r['asic'] > r['float64'] else "host"
+        print(f"  {r['atoms']:6d} {r['pairs']:8d} {r['float64']:10.3f} {r['q16']:10.3f} "
+              f"{r['asic_cycles']:10d} {r['asic']:10.3f}  {faster}")
+
+# ==============================================================================
+# 6. COMMAND LINE
+# ==============================================================================
+def masses_of(ff, topo):
+    return np.array([ff.masses.get(t, 12.011) for t in topo.types], dtype=np.float64)
+
+if __name__ == "__main__":
+    from ff_cache import load_cached
+    from forcefield import ForceField
+
+    parser = argparse.ArgumentParser(description="Velocity-Verlet MD on the compiled CHARMM parameters (float64 or Q16.16).")
+    parser.add_argument("--sequence", default="ALA,GLY,SER,LEU,LYS", help="comma-separated residues")
+    parser.add_argument("--coords", help="starting coordinates (.pdb/.npy/xyz, topology atom order); built if omitted")
+    parser.add_argument("--mode", default="both", choices=("float64", "q16", "both"))
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--dt", type=float, default=0.5, help="time step (fs)")
+    parser.add_argument("--temperature", type=float, default=300.0, help="initial Maxwell-Boltzmann T (K)")
+    parser.add_argument("--cutoff", type=float, help="non-bonded cutoff (A), default: all pairs")
+    parser.add_argument("--report", type=int, default=200, help="steps between energy reports")
+    parser.add_argument("--bench", action="store_true", help="ns/day vs system size, host vs md_system_top")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ff = ForceField()
+    load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
+    rng = np.random.default_rng(args.seed)
+
+    if args.bench:
+        print_benchmark(benchmark(ff, dt_fs=args.dt, seed=args.seed), args.dt)
+        raise SystemExit
+
+    topo = Topology.from_residues(ff, args.sequence.split(","))
+    masses = masses_of(ff, topo)
+    if args.coords:
+        x0 = read_coordinates(args.coords)
+        if len(x0) != len(topo.atoms): raise SystemExit(f"{args.coords}: {len(x0)} atoms, topology has {len(topo.atoms)}")
+    else:
+        x0 = build_coordinates(topo, rng)
+    x0 = relax(ForceTerms(ff, topo, args.cutoff), x0)
+    v0 = maxwell_boltzmann(masses, args.temperature, rng)
+    print(f"{args.sequence}: {len(topo.atoms)} atoms, {len(topo.bonds)} bonds, {len(topo.angles)} angles, "
+          f"{len(topo.dihedrals)} torsions; dt = {args.dt:g} fs")
+
+    for mode in (("float64", "q16") if args.mode == "both" else (args.mode,)):
+        engine = VelocityVerlet(ForceTerms(ff, topo, args.cutoff, q16=(mode == "q16")), masses, args.dt, mode)
+        engine.set_state(x0, v0)
+        t0 = time.perf_counter()
+        records = engine.run(args.steps, args.report)
+        seconds = time.perf_counter() - t0
+        print(f"\n{mode}: {args.steps} steps in {seconds:.2f} s, {ns_per_day(args.steps, seconds, args.dt):.3f} ns/day")
+        print(f"  {'step':>6} {'t (ps)':>7} {'E_pot':>11} {'E_kin':>10} {'E_total':>11} {'T (K)':>8}")
+        for step, t_ps, e_pot, e_kin, e_tot, temp in records:
+            print(f"  {step:6d} {t_ps:7.3f} {e_pot:11.3f} {e_kin:10.3f} {e_tot:11.3f} {temp:8.1f}")
+        drift = records[-1][4] - records[0][4]
+        print(f"  E_total drift {drift:+.4f} kcal/mol over {records[-1][1]:.3f} ps")
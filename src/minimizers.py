@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from golden_model import (CLAMP_LIMIT, COOLING_FACTOR, INITIAL_STEP, ONE, MDSystemTop, from_q16, qmult,
+                          read_rtl_coordinates, to_q16)
+from md_engine import ForceTerms, build_coordinates
+from rtl_templates import generated_by, read_template, src_path, write_text
+from topology import Topology
+
+# ==============================================================================
+# 1. OBJECTIVES (Energy + Forces, Counted)
+# ==============================================================================
+# Every minimizer sees the system as a callable x -> (energy, forces) and is
+# scored on evaluations as well as iterations: FIRE spends one evaluation per
+# iteration, the line searches spend one per trial step. Convergence is the
+# CHARMM-style GRMS, sqrt(sum |F|^2 / 3N) in kcal/mol/A.
+def grms(forces):
+    return float(np.sqrt(np.mean(np.square(forces))))
+
+class ForceFieldObjective:
+    """md_engine.ForceTerms (real CHARMM topology, float64)."""
+    def __init__(self, terms):
+        self.terms, self.evaluations = terms, 0
+
+    def __call__(self, x):
+        self.evaluations += 1
+        energy, forces = self.terms.energy_forces(x)
+        return float(sum(energy.values())), forces
+
+def _clamp(move, max_move):
+    """Scales the whole move down so no atom travels further than max_move."""
+    longest = np.linalg.norm(move, axis=-1).max()
+    return move * (max_move / longest) if longest > max_move else move
+
+def _result(method, objective, x, energy, forces, iterations, t0, target, history):
+    g = grms(forces)
+    return {'method': method, 'x': x, 'energy': energy, 'grms': g, 'iterations': iterations,
+            'evaluations': objective.evaluations, 'seconds': time.perf_counter() - t0,
+            'converged': g <= target, 'history': history}
+
+# ==============================================================================
+# 2. MINIMIZERS (Common Interface)
+# ==============================================================================
+# All take (objective, x, target, max_iters) and return the dict built by
+# _result. history holds (energy, grms, effective step) per iteration, the
+# effective step being the move projected on the force, (dx . F) / (F . F),
+# in the same A^2 mol/kcal units as md_system_top's current_step_size.
+def rtl_descent(objective, x, target=1.0, max_iters=1000, initial_step=from_q16(INITIAL_STEP),
+                cooling=from_q16(COOLING_FACTOR), max_move=0.5):
+    """The md_system_top loop in float64: x += clamp(step * F), step *= cooling."""
+    t0, x = time.perf_counter(), np.array(x, dtype=np.float64)
+    energy, forces = objective(x)
+    history, step = [], initial_step
+    for it in range(max_iters):
+        if grms(forces) <= target: break
+        move = np.clip(step * forces, -max_move, max_move)   # clamp_move is per component
+        history.append((energy, grms(forces), float((move * forces).sum() / (forces * forces).sum())))
+        x = x + move
+        energy, forces = objective(x)
+        step *= cooling
+    else:
+        it = max_iters
+    return _result("rtl_descent", objective, x, energy, forces, it, t0, target, history)
+
+def line_search_descent(objective, x, target=1.0, max_iters=1000, initial_step=from_q16(INITIAL_STEP),
+                        grow=1.2, shrink=0.5, max_move=0.5):
+    """Steepest descent with an adaptive step: grow after a downhill move, shrink and retry otherwise."""
+    t0, x = time.perf_counter(), np.array(x, dtype=np.float64)
+    energy, forces = objective(x)
+    history, step, it = [], initial_step, 0
+    while it < max_iters and grms(forces) > target and step > 1e-12:
+        move = np.clip(step * forces, -max_move, max_move)
+        trial_energy, trial_forces = objective(x + move)
+        if trial_energy < energy:
+            history.append((energy, grms(forces), float((move * forces).sum() / (forces * forces).sum())))
+            x, energy, forces = x + move, trial_energy, trial_forces
+            step *= grow
+            it += 1
+        else:
+            step *= shrink
+    return _result("line_search", objective, x, energy, forces, it, t0, target, history)
+
+def fire(objective, x, target=1.0, max_iters=1000, dt=0.02, dt_max=0.1, n_min=5, f_inc=1.1, f_dec=0.5,
+         alpha_start=0.1, f_alpha=0.99, max_move=0.2):
+    """FIRE (Bitzek et al. 2006) with unit masses and a per-step move limit."""
+    t0, x = time.perf_counter(), np.array(x, dtype=np.float64)
+    energy, forces = objective(x)
+    v, alpha, n_pos = np.zeros_like(x), alpha_start, 0
+    history = []
+    for it in range(max_iters):
+        if grms(forces) <= target: break
+        if (forces * v).sum() > 0.0:
+            v = (1.0 - alpha) * v + alpha * np.linalg.norm(v) * forces / np.linalg.norm(forces)
+            if n_pos > n_min:
+                dt, alpha = min(dt * f_inc, dt_max), alpha * f_alpha
+            n_pos += 1
+        else:
+            v[:], dt, alpha, n_pos = 0.0, dt * f_dec, alpha_start, 0
+        v = v + dt * forces
+        move = _clamp(dt * v, max_move)
+        history.append((energy, grms(forces), float((move * forces).sum() / (forces * forces).sum())))
+        x = x + move
+        energy, forces = objective(x)
+    else:
+        it = max_iters
+    return _result("fire", objective, x, energy, forces, it, t0, target, history)
+
+def lbfgs(objective, x, target=1.0, max_iters=1000, memory=10, initial_step=1e-3, max_move=0.2, c1=1e-4,
+          max_backtracks=10):
+    """L-BFGS (two-loop recursion) with Armijo backtracking; the memory resets on a non-descent direction."""
+    t0, x = time.perf_counter(), np.array(x, dtype=np.float64)
+    energy, forces = objective(x)
+    s_list, y_list, history = [], [], []
+    for it in range(max_iters):
+        if grms(forces) <= target: break
+        g = -forces.ravel()
+        q, coefs = g.copy(), []
+        for s, y in zip(reversed(s_list), reversed(y_list)):
+            a = (s @ q) / (y @ s)
+            coefs.append(a)
+            q -= a * y
+        h0 = (s_list[-1] @ y_list[-1]) / (y_list[-1] @ y_list[-1]) if s_list else initial_step
+        d = h0 * q
+        for (s, y), a in zip(zip(s_list, y_list), reversed(coefs)):
+            d += s * (a - (y @ d) / (y @ s))
+        d = -d
+        if g @ d >= 0.0:
+            s_list, y_list, d = [], [], -initial_step * g
+        d = _clamp(d.reshape(x.shape), max_move).ravel()
+
+        alpha = 1.0
+        for k in range(max_backtracks):
+            trial_energy, trial_forces = objective(x + alpha * d.reshape(x.shape))
+            if trial_energy <= energy + c1 * alpha * (g @ d): break
+            if k + 1 < max_backtracks: alpha *= 0.5 # keep alpha at the last evaluated trial
+        else:
+            s_list, y_list = [], []
+            if trial_energy >= energy: break   # no downhill step along -g either
+        move = alpha * d.reshape(x.shape)
+        history.append((energy, grms(forces), float((move * forces).sum() / (forces * forces).sum())))
+        s, y = move.ravel(), forces.ravel() - trial_forces.ravel()
+        if s @ y > 1e-10:
+            s_list, y_list = (s_list + [s])[-memory:], (y_list + [y])[-memory:]
+        x, energy, forces = x + move, trial_energy, trial_forces
+    else:
+        it = max_iters
+    return _result("lbfgs", objective, x, energy, forces, it, t0, target, history)
+
+MINIMIZERS = {'rtl_descent': rtl_descent, 'line_search': line_search_descent, 'fire': fire, 'lbfgs': lbfgs}
+
+# ==============================================================================
+# 3. BENCHMARK (Iterations and Wall Time to a Target GRMS)
+# ==============================================================================
+def benchmark(make_objective, starts, methods=tuple(MINIMIZERS), target=1.0, max_iters=2000):
+    """Runs every method from every start; make_objective() gives a fresh counted objective."""
+    rows = []
+    for label, x0 in starts:
+        for method in methods:
+            result = MINIMIZERS[method](make_objective(), x0, target=target, max_iters=max_iters)
+            result['start'] = label
+            rows.append(result)
+    return rows
+
+def print_benchmark(rows, target):
+    print(f"  {'start':<32} {'method':<12} {'iters':>6} {'evals':>6} {'ms':>8} {'E (kcal/mol)':>13} "
+          f"{'GRMS':>9}  GRMS <= {target:g}")
+    for r in rows:
+        print(f"  {r['start']:<32} {r['method']:<12} {r['iterations']:6d} {r['evaluations']:6d} "
+              f"{r['seconds'] * 1e3:8.1f} {r['energy']:13.3f} {r['grms']:9.3f}  {'yes' if r['converged'] else 'no'}")
+
+def fragment_starts(ff, sequences, rng):
+    """(label, ForceTerms, built coordinates) per comma-separated residue sequence."""
+    starts = []
+    for sequence in sequences:
+        topo = Topology.from_residues(ff, sequence.split(","))
+        starts.append((f"{sequence} ({len(topo.atoms)} atoms)", ForceTerms(ff, topo), build_coordinates(topo, rng)))
+    return starts
+
+# ==============================================================================
+# 4. HARDWARE SCHEDULE (INITIAL_STEP / COOLING_FACTOR, Bit-Exact)
+# ==============================================================================
+# md_system_top can only express step_k = INITIAL_STEP * COOLING_FACTOR^k
+# (truncating qmult per iteration) with the 0.5 A per-component clamp, and it
+# always runs max_iters iterations. Candidate word pairs are scored on
+# MDSystemTop itself: median hardware GRMS after max_iters over a batch of
+# starts (ties broken by the median MDSystemTop.energies value), plus the
+# fraction of starts that end at or under the target GRMS. Candidates come
+# from a grid and from fitting the geometric form to the effective steps of
+# the host runs that reached the target (the hardware's own forces are not
+# the gradient of any energy, so the line searches cannot be run on them
+# directly).
+STEP_GRID = tuple(int(round(0x10 * 2 ** (k / 2))) for k in range(21))   # 0x10 .. 0x4000
+COOLING_GRID = (0xC000, 0xD000, 0xE000, 0xE800, 0xF000, 0xF800, 0xFC00, 0xFF00, ONE)
+
+def hardware_starts(log="sim_output3.txt", chains=31, num_atoms=10, noise=0.3, rng=None):
+    """The logged start (if present) plus perturbed zig-zag chains, as (label, Angstrom) pairs."""
+    rng = rng or np.random.default_rng(0)
+    starts = []
+    if log and os.path.exists(log):
+        initial, _, _ = read_rtl_coordinates(log)
+        if len(initial) == num_atoms: starts.append((log, initial))
+    chain = np.zeros((num_atoms, 3))
+    chain[:, 0] = 1.5 * np.arange(num_atoms)
+    chain[1::2, 1] = 0.8
+    starts += [(f"chain {k}", chain + rng.normal(0.0, noise, chain.shape)) for k in range(chains)]
+    return starts
+
+def step_schedule(initial_step, cooling, max_iters):
+    """current_step_size words per iteration, as md_system_top cools them."""
+    words, step = [], int(initial_step)
+    for _ in range(max(int(max_iters), 1)):
+        words.append(step)
+        step = int(qmult(step, cooling))
+    return words
+
+def score_schedule(model, starts, initial_step, cooling, max_iters=100, target=1.0, clamp_limit=CLAMP_LIMIT):
+    final, _ = model.run(to_q16(starts), max_iters=max_iters, initial_step=initial_step, cooling=cooling,
+                         clamp_limit=clamp_limit)
+    acc = model.bonded_forces(final, max_iters) + model.nonbonded_forces(final, max_iters)
+    g = np.sqrt(np.mean(from_q16(acc) ** 2, axis=(1, 2)))
+    return {'initial_step': int(initial_step), 'cooling': int(cooling),
+            'energy': float(np.nanmedian(model.energies(final))), 'grms': float(np.median(g)),
+            'converged': float(np.mean(g <= target)),
+            'active_steps': sum(w != 0 for w in step_schedule(initial_step, cooling, max_iters))}
+
+def grid_search(model, starts, max_iters=100, target=1.0, step_grid=STEP_GRID, cooling_grid=COOLING_GRID):
+    return [score_schedule(model, starts, s, c, max_iters, target) for s in step_grid for c in cooling_grid]
+
+def schedule_rank(score):
+    return (score['grms'], score['energy'])
+
+def fit_schedule(history, max_iters=100):
+    """
+    Least-squares fit of log(step_k) = log(step_0) + k log(cooling) to the
+    positive effective steps of a host run's first max_iters iterations,
+    quantized to Q16.16 words (cooling capped at 1.0).
+    """
+    steps = np.array([h[2] for h in history[:max_iters]])
+    k = np.flatnonzero(steps > 0)
+    if len(k) < 2: return None
+    slope, intercept = np.polyfit(k, np.log(steps[k]), 1)
+    return (max(int(round(np.exp(intercept) * ONE)), 1), int(min(round(np.exp(slope) * ONE), ONE)))
+
+# ==============================================================================
+# 5. EXPORT (md_system_top.v Constants, Step Table, Report)
+# ==============================================================================
+GENERATED_BY = generated_by("minimizers.py")
+
+def write_md_system_top(initial_step, cooling, output_filename="md_system_top.v",
+                        template=src_path("md_system_top.v"), clamp_limit=None):
+    """md_system_top.v with the INITIAL_STEP / COOLING_FACTOR (and clamp_move LIMIT) localparams replaced."""
+    text = read_template(template)
+    text, n_step = re.subn(r"localparam signed \[31:0\] INITIAL_STEP  = 32'h[0-9A-Fa-f]+;.*",
+                           f"localparam signed [31:0] INITIAL_STEP  = 32'h{initial_step:08X}; "
+                           f"// ~{initial_step / ONE:.5f} ({GENERATED_BY})", text)
+    text, n_cool = re.subn(r"localparam signed \[31:0\] COOLING_FACTOR = 32'h[0-9A-Fa-f]+;.*",
+                           f"localparam signed [31:0] COOLING_FACTOR = 32'h{cooling:08X}; "
+                           f"// ~{cooling / ONE:.5f} in Q16.16", text)
+    if n_step != 1 or n_cool != 1: raise ValueError(f"{template}: INITIAL_STEP / COOLING_FACTOR localparams not found")
+    if clamp_limit is not None:
+        text, n_limit = re.subn(r"// 0x[0-9A-Fa-f]+ = [\d.]+ in Q16.16\n(\s*)localparam signed \[31:0\] LIMIT = 32'h[0-9A-Fa-f]+;",
+                                lambda m: f"// 0x{clamp_limit:08X} = {clamp_limit / ONE:g} in Q16.16\n{m.group(1)}"
+                                          f"localparam signed [31:0] LIMIT = 32'h{clamp_limit:08X};", text)
+        if n_limit != 1: raise ValueError(f"{template}: clamp_move LIMIT not found")
+    write_text(output_filename, text)
+
+def write_schedule_hex(words, output_filename="step_schedule.hex"):
+    write_text(output_filename, "".join(f"{w & 0xFFFFFFFF:08X}\n" for w in words))
+
+def write_report(report, output_filename="minimizer_report.json"):
+    write_text(output_filename, json.dumps(report, indent=2) + "\n")
+
+def _summary(result):
+    return {k: result[k] for k in ('start', 'method', 'iterations', 'evaluations', 'seconds', 'energy', 'grms',
+                                   'converged')}
+
+# ==============================================================================
+# 6. EXECUTION
+# ==============================================================================
+if __name__ == "__main__":
+    from ff_cache import load_cached
+    from forcefield import ForceField
+
+    parser = argparse.ArgumentParser(description="FIRE / L-BFGS / line-search minimizers and the md_system_top "
+                                                 "step schedule they suggest.")
+    parser.add_argument("--sequences", default="ALA;ALA,GLY,SER;ALA,GLY,SER,LEU,LYS",
+                        help="';'-separated fragments for the CHARMM benchmark")
+    parser.add_argument("--target", type=float, default=1.0, help="target GRMS (kcal/mol/A)")
+    parser.add_argument("--max-iters", type=int, default=2000, help="host iteration limit")
+    parser.add_argument("--hw-iters", type=int, default=100, help="md_system_top iterations (max_iters port)")
+    parser.add_argument("--chains", type=int, default=31, help="perturbed chains next to the sim_output3 start")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--out-dir", default="generated_tables")
+    args = parser.parse_args()
+
+    t_start = time.perf_counter()
+    rng = np.random.default_rng(args.seed)
+    ff = ForceField()
+    load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
+
+    print(f"CHARMM fragments, target GRMS {args.target:g} kcal/mol/A:")
+    host_rows = []
+    for label, terms, x0 in fragment_starts(ff, args.sequences.split(";"), rng):
+        host_rows += benchmark(lambda: ForceFieldObjective(terms), [(label, x0)], target=args.target,
+                               max_iters=args.max_iters)
+    print_benchmark(host_rows, args.target)
+
+    model = MDSystemTop(10)
+    hw_starts = hardware_starts(chains=args.chains, rng=rng)
+    starts = np.array([x for _, x in hw_starts])
+    print(f"\nSchedule search on MDSystemTop, {len(starts)} starts x {args.hw_iters} iterations (bit-exact):")
+    t0 = time.perf_counter()
+    grid = grid_search(model, starts, args.hw_iters, args.target)
+    rtl = score_schedule(model, starts, INITIAL_STEP, COOLING_FACTOR, args.hw_iters, args.target)
+    candidates = [dict(rtl, source="rtl"), dict(min(grid, key=schedule_rank), source="grid")]
+    for r in host_rows:
+        fitted = fit_schedule(r['history'], args.hw_iters) if r['converged'] else None
+        if fitted and all((c['initial_step'], c['cooling']) != fitted for c in candidates):
+            candidates.append(dict(score_schedule(model, starts, *fitted, args.hw_iters, args.target),
+                                   source=f"fit {r['method']} {r['start'].split(' ')[0]}"))
+    print(f"  {len(grid)} grid points in {time.perf_counter() - t0:.1f} s")
+    print(f"  {'source':<30} {'INITIAL_STEP':>12} {'COOLING':>10} {'active':>7} {'E median':>11} {'GRMS median':>12} {'converged':>10}")
+    for c in candidates:
+        print(f"  {c['source']:<30} {c['initial_step']:#12x} {c['cooling']:#10x} {c['active_steps']:7d} "
+              f"{c['energy']:11.3f} {c['grms']:12.3f} {c['converged']:10.0%}")
+    best = min(candidates, key=schedule_rank)
+    print(f"  -> {best['source']}: INITIAL_STEP = 32'h{best['initial_step']:08X}, "
+          f"COOLING_FACTOR = 32'h{best['cooling']:08X}")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    print(f"Writing {args.out_dir}/ (golden_model.MDSystemTop.run takes the same words as initial_step / cooling):")
+    write_md_system_top(best['initial_step'], best['cooling'], os.path.join(args.out_dir, "md_system_top.v"))
+    write_schedule_hex(step_schedule(best['initial_step'], best['cooling'], args.hw_iters),
+                       os.path.join(args.out_dir, "step_schedule.hex"))
+    write_report({'target_grms': args.target, 'hw_iters': args.hw_iters, 'host': [_summary(r) for r in host_rows],
+                  'candidates': candidates, 'grid': grid, 'best': best},
+                 os.path.join(args.out_dir, "minimizer_report.json"))
+    print(f"Done in {time.perf_counter() - t_start:.1f} s")
@@ -0,0 +1,232 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from ff_cache import load_cached
+from fixed_point import KC, encode_q16_16
+from fixed_point_error import error_stats, ulp_error
+from forcefield import ForceField
+from golden_model import NB_LATENCY, ONE, phase_schedule, qmult, reciprocal_wrapper, to_q16, wrap32
+from neighbor_list import VerletList, random_chain
+from parameter_compiler_new import compile_pair_lut, pair_coefficients
+
+# ==============================================================================
+# 1. DATAPATH VARIANTS (Per-Atom Rows vs Precombined Pair Rows)
+# ==============================================================================
+# Stage and multiplier counts of the two cores inside non_bonded_pipeline,
+# (stages, 32x32 multipliers):
+#   atom    : the RTL. coulombic_core_stream forms q_i * q_j, * r2_inv, * KC;
+#             lennard_jones_core sr2, sr4, sr6, sr12, 2 sr12 - sr6, * eps, * r2_inv
+#   pair    : KC * q_i * q_j precombined, Coulomb is one multiply by r2_inv
+#   pair_s6 : as pair, plus Sigma^6 in the image. Stage 1 forms Sigma^6 * r2_inv
+#             and r2_inv^2 side by side, so sr6 is ready one stage earlier
+# The Coulomb result is delayed to meet the LJ result (f_c_d1..d4 in the RTL),
+# so the pipeline latency follows the longer core.
+VARIANTS = {
+    'atom':    {'image': "per atom {Q, Sig^2, 24 Eps}", 'coulomb': (3, 3), 'lj': (7, 6), 'param_words': 4},
+    'pair':    {'image': "per pair {KQQ, Sig^2, 24 Eps}", 'coulomb': (1, 1), 'lj': (7, 6), 'param_words': 3},
+    'pair_s6': {'image': "per pair {KQQ, Sig^6, 24 Eps}", 'coulomb': (1, 1), 'lj': (6, 6), 'param_words': 3},
+}
+RTL_CORE_STAGES = 7     # lennard_jones_core in non_bonded_pipeline today
+PARAM_SHIFT_DEPTH = 9   # qi_sr .. eps_sr carry the parameters through stages 0-8
+ROW_BITS = 96           # three Q16.16 words per image row
+
+def pipeline_cost(variant, num_atoms=10):
+    """Latency, multipliers and register words of non_bonded_pipeline for one variant."""
+    v = VARIANTS[variant]
+    core = max(v['coulomb'][0], v['lj'][0])
+    latency = NB_LATENCY - (RTL_CORE_STAGES - core)
+    return {'variant': variant, 'image': v['image'],
+            'core_stages': core, 'nb_latency': latency,
+            'core_multipliers': v['coulomb'][1] + v['lj'][1],
+            'param_shift_words': v['param_words'] * PARAM_SHIFT_DEPTH,
+            'coulomb_delay_words': core - v['coulomb'][0],
+            # Only S_NB_DRAIN waits out the latency, once per iteration
+            'nonbonded_cycles': phase_schedule(num_atoms)['nonbonded'] + latency - NB_LATENCY}
+
+def scalar_force(variant, r2_inv, coeffs):
+    """
+    f_scalar_reg (Coulomb + LJ, before the 1/r normalisation) for one variant,
+    bit-exact with the truncating qmult of the cores. coeffs are Q16.16 words:
+    atom (q_i, q_j, sigma_sq, eps_x24), pair (kqq, sigma_sq, eps_x24),
+    pair_s6 (kqq, sigma6, eps_x24).
+    """
+    if variant == 'atom':
+        q_i, q_j, sigma_sq, eps_x24 = coeffs
+        f_coulomb = qmult(qmult(qmult(q_i, q_j), r2_inv), KC)
+    else:
+        kqq, sigma, eps_x24 = coeffs
+        f_coulomb = qmult(kqq, r2_inv)
+
+    if variant == 'pair_s6':
+        sr6 = qmult(qmult(sigma, r2_inv), qmult(r2_inv, r2_inv))
+    else:
+        sr2 = qmult(sigma_sq if variant == 'atom' else sigma, r2_inv)
+        sr6 = qmult(qmult(sr2, sr2), sr2)
+    sr12 = qmult(sr6, sr6)
+    f_lj = qmult(qmult((sr12 << 1) - sr6, eps_x24), r2_inv)
+    return wrap32(f_coulomb + f_lj)
+
+def scalar_force_float(r2_inv, qq, sigma_sq, eps_x24):
+    """float64 of the same formula: KC q_i q_j / r^2 + 24 eps (2 sr12 - sr6) / r^2."""
+    sr6 = (sigma_sq * r2_inv) ** 3
+    return (KC / ONE) * qq * r2_inv + eps_x24 * (2.0 * sr6 * sr6 - sr6) * r2_inv
+
+# ==============================================================================
+# 2. ACCURACY (Real CHARMM Pairs, Same r2_inv Word for Every Variant)
+# ==============================================================================
+RANGE_EDGES = (2.5, 4.0, 6.0, 9.0, 12.0)
+
+def protein_atoms(ff, num_atoms, rng, residues=('ALA', 'GLY', 'SER', 'LEU', 'LYS', 'GLU', 'PHE', 'VAL')):
+    """(res, atom) list of a random chain of RTF residues, cut to num_atoms."""
+    atom_list = []
+    while len(atom_list) < num_atoms:
+        res = residues[rng.integers(len(residues))]
+        atom_list += [(res, name) for name in ff.residues[res]]
+    return atom_list[:num_atoms]
+
+def variant_coefficients(ff, atom_list, pair_i, pair_j):
+    """Q16.16 coefficient words per variant, plus the unquantized float pair values."""
+    rows = pair_coefficients(ff, atom_list, pair_i, pair_j)
+    q = np.array([ff.atom_types.get(atom, ("UNKNOWN", 0.0))[1] for atom in atom_list])
+    q_words = wrap32(encode_q16_16(q))
+    sigma_sq, eps_x24 = wrap32(encode_q16_16(rows[:, 1])), wrap32(encode_q16_16(rows[:, 2]))
+    kqq = wrap32(encode_q16_16(rows[:, 0]))
+    words = {'atom': (q_words[pair_i], q_words[pair_j], sigma_sq, eps_x24),
+             'pair': (kqq, sigma_sq, eps_x24),
+             'pair_s6': (kqq, wrap32(encode_q16_16(rows[:, 1] ** 3)), eps_x24)}
+    exact = {'qq': q[pair_i] * q[pair_j], 'sigma_sq': rows[:, 1], 'eps_x24': rows[:, 2]}
+    saturated = int((rows[:, 1] ** 3 >= 32768.0).sum())
+    return words, exact, saturated
+
+def accuracy(ff, samples, rng, atoms=1000):
+    """
+    f_scalar error of each variant against float64 over random pairs of a
+    protein chain placed 2.5-12 A apart. All variants see the same r2_inv word
+    (reciprocal_wrapper of the pipeline's r2), so the differences come from the
+    coefficient image and the core datapath alone.
+    """
+    atom_list = protein_atoms(ff, atoms, rng)
+    pair_i = rng.integers(0, atoms, samples)
+    pair_j = (pair_i + rng.integers(3, atoms, samples)) % atoms
+    r = rng.uniform(RANGE_EDGES[0], RANGE_EDGES[-1], samples)
+
+    d64 = to_q16(r).astype(np.int64)
+    r2_inv = reciprocal_wrapper(wrap32((d64 * d64) >> 16))
+    words, exact, saturated = variant_coefficients(ff, atom_list, pair_i, pair_j)
+    ref = scalar_force_float(r2_inv / ONE, exact['qq'], exact['sigma_sq'], exact['eps_x24']) * ONE
+
+    results = []
+    bins = np.digitize(r, RANGE_EDGES[1:-1])
+    for variant in VARIANTS:
+        err = ulp_error(scalar_force(variant, r2_inv, words[variant]), ref)
+        stats = error_stats(err, ref)
+        stats['variant'] = variant
+        stats['by_range'] = [{'lo': RANGE_EDGES[k], 'hi': RANGE_EDGES[k + 1],
+                              **error_stats(err[bins == k], ref[bins == k])} for k in range(len(RANGE_EDGES) - 1)]
+        results.append(stats)
+    return {'samples': samples, 'atoms': atoms, 'sigma6_saturated': saturated, 'variants': results}
+
+# ==============================================================================
+# 3. MEMORY TRADE-OFF (Atom, Type and Pair Images vs System Size)
+# ==============================================================================
+# atom     : nonbonded_lut.hex, one {Q, Sig^2, 24 Eps} row per atom
+# type     : atom_identity.hex ({Q, 8-bit type id}) + packed mixing triangle
+# pair     : one precombined row per streamed pair (all j >= i + 3, or a list)
+# interned : pair image deduplicated like parameter_packer, an index per pair
+#            plus the unique rows (charges repeat per residue atom, so the
+#            unique rows stop growing once every residue pairing has been seen)
+def image_bits(num_atoms, num_types, num_pairs, unique_rows=None):
+    bits = {'atom': num_atoms * ROW_BITS,
+            'type': num_atoms * 40 + num_types * (num_types + 1) // 2 * 64,
+            'pair': num_pairs * ROW_BITS}
+    if unique_rows is not None:
+        bits['interned'] = num_pairs * max(int(unique_rows - 1).bit_length(), 1) + unique_rows * ROW_BITS
+    return bits
+
+def memory_tradeoff(ff, sizes, rng, cutoff=12.0, skin=2.0):
+    """Image sizes for all-pairs streaming and for a Verlet list of cutoff + skin."""
+    rows = []
+    for num_atoms in sizes:
+        atom_list = protein_atoms(ff, num_atoms, rng)
+        num_types = len({ff.atom_types.get(atom, ("UNKNOWN", 0.0))[0] for atom in atom_list})
+        all_pairs = max(num_atoms - 2, 0) * max(num_atoms - 3, 0) // 2
+
+        t0 = time.perf_counter()
+        vlist = VerletList(cutoff, skin)
+        vlist.update(random_chain(num_atoms, rng))
+        words = encode_q16_16(pair_coefficients(ff, atom_list, vlist.pair_i, vlist.pair_j))
+        unique = len(np.unique(words, axis=0)) if len(words) else 0
+        t_compile = time.perf_counter() - t0
+
+        rows.append({'atoms': num_atoms, 'types': num_types, 'all_pairs': all_pairs,
+                     'listed_pairs': len(vlist), 'unique_rows': unique, 'compile_s': t_compile,
+                     'all_pairs_bits': image_bits(num_atoms, num_types, all_pairs),
+                     'listed_bits': image_bits(num_atoms, num_types, len(vlist), unique)})
+    return rows
+
+# ==============================================================================
+# 4. REPORT
+# ==============================================================================
+def _kib(bits):
+    return f"{bits / 8192:11.1f}"
+
+def print_report(costs, acc, memory):
+    print(f"non_bonded_pipeline per variant (num_atoms = {NUM_ATOMS_REPORT}):")
+    print(f"  {'variant':8} {'image':30} {'stages':>6} {'latency':>7} {'mults':>5} "
+          f"{'param regs':>10} {'delay regs':>10} {'S_NB cyc':>8}")
+    for c in costs:
+        print(f"  {c['variant']:8} {c['image']:30} {c['core_stages']:6d} {c['nb_latency']:7d} "
+              f"{c['core_multipliers']:5d} {c['param_shift_words']:10d} {c['coulomb_delay_words']:10d} "
+              f"{c['nonbonded_cycles']:8d}")
+
+    print(f"\nf_scalar error vs float64, {acc['samples']} CHARMM pairs at 2.5-12 A "
+          f"({acc['sigma6_saturated']} Sig^6 words saturated):")
+    print(f"  {'variant':8} {'max ulp':>9} {'p99 ulp':>9} {'mean ulp':>9} {'bias':>7}   max ulp by distance (A)")
+    for v in acc['variants']:
+        ranges = "  ".join(f"{b['lo']:g}-{b['hi']:g}: {b['max_ulp']:5.0f}" for b in v['by_range'])
+        print(f"  {v['variant']:8} {v['max_ulp']:9.0f} {v['p99_ulp']:9.1f} {v['mean_ulp']:9.2f} "
+              f"{v['bias_ulp']:7.2f}   {ranges}")
+
+    print("\nImage size in KiB (all j >= i + 3 pairs | Verlet list, 12 + 2 A):")
+    print(f"  {'atoms':>6} {'types':>5} {'atom':>11} {'type':>11} {'pair (all)':>11} "
+          f"{'listed':>9} {'pair (list)':>11} {'interned':>11} {'unique':>9}")
+    for m in memory:
+        a, l = m['all_pairs_bits'], m['listed_bits']
+        print(f"  {m['atoms']:6d} {m['types']:5d} {_kib(a['atom'])} {_kib(a['type'])} {_kib(a['pair'])} "
+              f"{m['listed_pairs']:9d} {_kib(l['pair'])} {_kib(l['interned'])} {m['unique_rows']:9d}")
+
+# ==============================================================================
+# 5. COMMAND LINE
+# ==============================================================================
+NUM_ATOMS_REPORT = 10   # project.v fixes num_atoms at 10
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline and memory trade-off of precombined non-bonded pair images.")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="comma-separated atom counts")
+    parser.add_argument("-n", "--samples", type=int, default=200_000, help="pairs for the accuracy sweep")
+    parser.add_argument("--cutoff", type=float, default=12.0, help="Verlet list cutoff (A), skin 2 A")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image", help="also write the precombined pair image of a 10-atom chain here")
+    parser.add_argument("--sigma6", action="store_true", help="Sig^6 instead of Sig^2 in --image")
+    parser.add_argument("--json", help="write the report as JSON")
+    args = parser.parse_args()
+
+    ff = ForceField()
+    load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
+    rng = np.random.default_rng(args.seed)
+
+    costs = [pipeline_cost(v, NUM_ATOMS_REPORT) for v in VARIANTS]
+    acc = accuracy(ff, args.samples, rng)
+    memory = memory_tradeoff(ff, [int(s) for s in args.sizes.split(",")], rng, args.cutoff)
+    print_report(costs, acc, memory)
+
+    if args.image:
+        compile_pair_lut(ff, protein_atoms(ff, NUM_ATOMS_REPORT, rng), output_filename=args.image,
+                         sigma6=args.sigma6)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'pipeline': costs, 'accuracy': acc, 'memory': memory}, f, indent=1)
+        print(f"Wrote {args.json}")
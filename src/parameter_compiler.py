@@ -1,184 +1,78 @@
-import re
+import sys
 
-# ==============================================================================
-# 1. FIXED-POINT CONVERTER (The Bridge to Hardware)
-# ==============================================================================
-def to_q16_16(value):
-    """Converts a float to a 32-bit Q16.16 hex string."""
-    if value is None: return "00000000"
-    
-    # Handle constants (like periodicity n) that are integers
-    if isinstance(value, int):
-        return f"{value:x}" 
-        
-    # Fixed-Point Math: Multiply by 2^16 (65536)
-    fixed_val = int(value * 65536)
-    
-    # Handle negative numbers (Two's Complement)
-    if fixed_val < 0:
-        fixed_val = (1 << 32) + fixed_val
-        
-    return f"{fixed_val:08X}" # Returns 8-char hex string (e.g., "00018000")
+from dihedral_index import sliding_window_dihedrals
+from ff_cache import load_cached
+from fixed_point import PARAM_RAM_ROW, encode_rows
+from forcefield import ForceField
+from lookup_table_compiler import compile_lookup_tables
 
 # ==============================================================================
-# 2. CHARMM FILE PARSER
+# 1. COMPILER MAIN ROUTINE
 # ==============================================================================
-class ForceField:
-    def __init__(self):
-        self.bonds = {}      # Key: (Type1, Type2) -> (kb, r0)
-        self.angles = {}     # Key: (Type1, Type2, Type3) -> (ktheta, theta0)
-        self.dihedrals = {}  # Key: (Type1, Type2, Type3, Type4) -> (kchi, n, delta)
-        self.atom_types = {} # Key: AtomName -> (AtomType, Charge)
-
-    def load_prm(self, filename):
-        """Parses the .prm parameter file."""
-        section = None
-        with open(filename, 'r') as f:
-            for line in f:
-                # 1. Strip inline comments and whitespace safely
-                line = line.split('!')[0].strip()
-                if not line: continue
-                
-                # 2. Detect ALL possible CHARMM Sections to prevent bleed-over
-                if line.startswith('BONDS'): section = 'BONDS'; continue
-                if line.startswith('ANGLES'): section = 'ANGLES'; continue
-                if line.startswith('DIHEDRALS'): section = 'DIHEDRALS'; continue
-                if line.startswith('IMPROPER'): section = 'IMPROPER'; continue
-                if line.startswith('CMAP'): section = 'CMAP'; continue
-                if line.startswith('NONBONDED'): section = 'NONBONDED'; continue
-                if line.startswith('NBFIX'): section = 'NBFIX'; continue
-                if line.startswith('HBOND'): section = 'HBOND'; continue
-
-                parts = line.split()
-                
-                # 3. Safe Parsing: Check column counts before extracting
-                if section == 'BONDS' and len(parts) >= 4:
-                    # Format: Atom1 Atom2 Kb r0
-                    key = tuple(sorted((parts[0], parts[1]))) 
-                    self.bonds[key] = (float(parts[2]), float(parts[3]))
-
-                elif section == 'ANGLES' and len(parts) >= 5:
-                    # Format: Atom1 Atom2 Atom3 Ktheta Theta0
-                    key = (min(parts[0], parts[2]), parts[1], max(parts[0], parts[2]))
-                    self.angles[key] = (float(parts[3]), float(parts[4]))
-
-                elif section == 'DIHEDRALS' and len(parts) >= 7:
-                    # Format: A B C D Kchi n delta
-                    key = tuple(parts[0:4])
-                    self.dihedrals[key] = (float(parts[4]), int(parts[5]), float(parts[6]))
-
-    def load_rtf(self, filename):
-        """Parses the .rtf topology file to get Atom Types and Charges."""
-        current_residue = None
-        with open(filename, 'r') as f:
-            for line in f:
-                parts = line.split()
-                if not parts: continue
-                
-                if parts[0] == 'RESI':
-                    current_residue = parts[1]
-                
-                elif parts[0] == 'ATOM':
-                    # Format: ATOM Name Type Charge
-                    # Map: (Residue, AtomName) -> (AtomType, Charge)
-                    atom_name = parts[1]
-                    atom_type = parts[2]
-                    charge = float(parts[3])
-                    self.atom_types[(current_residue, atom_name)] = (atom_type, charge)
-
-    # ==========================================================================
-    # 3. PARAMETER LOOKUP LOGIC
-    # ==========================================================================
-    def get_bond_params(self, t1, t2):
-        key = tuple(sorted((t1, t2)))
-        params = self.bonds.get(key)
-        if params: return params # (kb, r0)
-        return (0.0, 0.0) # Default if not found
+def window_rows(ff, atom_list):
+    """
+    (labels, rows) for every 4-atom window of atom_list: the comment text after
+    '// Atom i: ' and the parameter row. A row depends on its own four atoms
+    only, which is what incremental_compiler relies on.
+    """
+    labels, rows = [], []
 
-    def get_angle_params(self, t1, t2, t3):
-        # Center atom (t2) must match. Outer atoms (t1, t3) can swap.
-        key = (min(t1, t3), t2, max(t1, t3))
-        params = self.angles.get(key)
-        if params: return params # (ktheta, theta0)
-        return (0.0, 90.0) 
+    # Dihedral terms for every window in one gather (multi-term series are kept
+    # in the index; the single-term RAM row takes the final one)
+    k_phi, n_phi, phi0_deg = sliding_window_dihedrals(ff, atom_list)
 
-    def get_dihedral_params(self, t1, t2, t3, t4):
-        # Try Exact Match
-        key = (t1, t2, t3, t4)
-        if key in self.dihedrals: return self.dihedrals[key]
+    # Sliding Window of 4 Atoms (A, B, C, D)
+    for i in range(len(atom_list) - 3):
+        # 1. Identify the 4 atoms in the window
+        a1 = atom_list[i]
+        a2 = atom_list[i+1]
+        a3 = atom_list[i+2]
+        a4 = atom_list[i+3]
         
-        # Try Reverse Match
-        key_rev = (t4, t3, t2, t1)
-        if key_rev in self.dihedrals: return self.dihedrals[key_rev]
+        # 2. Get their CHARMM Atom Types (e.g., 'CT1', 'NH1')
+        t1, q1 = ff.atom_types[a1]
+        t2, q2 = ff.atom_types[a2]
+        t3, q3 = ff.atom_types[a3]
+        t4, q4 = ff.atom_types[a4]
         
-        # Try Wildcard (X, t2, t3, X) - Common in CHARMM
-        key_wild = ('X', t2, t3, 'X')
-        if key_wild in self.dihedrals: return self.dihedrals[key_wild]
+        # 3. Look up Physics Parameters
+        kb, r0          = ff.get_bond_params(t1, t2)        # Bond A-B
+        kth, th0        = ff.get_angle_params(t1, t2, t3)   # Angle A-B-C
+        kphi, n, phi0   = k_phi[i], n_phi[i], phi0_deg[i]   # Dihedral A-B-C-D
         
-        return (0.0, 1, 180.0) # Default: No barrier, Trans conformation
+        # 4. Convert to Verilog Units
+        # Note: CHARMM angles are in Degrees. Need Radians? 
+        # Ideally yes, but let's assume your ASIC expects degrees for now 
+        # OR multiply by (3.14159/180) here. Let's do Degrees -> Radians:
+        th0_rad = th0 * (3.14159 / 180.0)
+        phi0_rad = phi0 * (3.14159 / 180.0)
+
+        # 5. Queue the row (260 bits total width)
+        # The order MUST match your Verilog concatenation from left (MSB) to right (LSB):
+        # {r0, kb, theta0, k_theta, phi0, k_phi, n, q_a, q_d}
+        rows.append((r0, kb, th0_rad, kth, phi0_rad, kphi, n, q1, q4))
+        labels.append(f"{a1}-{a2}-{a3}-{a4} ({t1}-{t2}-{t3}-{t4})")
+    return labels, rows
 
-# ==============================================================================
-# 4. COMPILER MAIN ROUTINE
-# ==============================================================================
 def compile_hex_file(ff, atom_list, output_filename="forcefield.hex"):
     """
     Generates the HEX file for parameter_ram.v
     atom_list: List of tuples [(ResName, AtomName), ...] representing the linear chain.
     """
     print(f"Compiling {len(atom_list)} atoms into {output_filename}...")
-    
-    with open(output_filename, 'w') as f:
-        # Sliding Window of 4 Atoms (A, B, C, D)
-        for i in range(len(atom_list) - 3):
-            # 1. Identify the 4 atoms in the window
-            a1 = atom_list[i]
-            a2 = atom_list[i+1]
-            a3 = atom_list[i+2]
-            a4 = atom_list[i+3]
-            
-            # 2. Get their CHARMM Atom Types (e.g., 'CT1', 'NH1')
-            t1, q1 = ff.atom_types[a1]
-            t2, q2 = ff.atom_types[a2]
-            t3, q3 = ff.atom_types[a3]
-            t4, q4 = ff.atom_types[a4]
-            
-            # 3. Look up Physics Parameters
-            kb, r0          = ff.get_bond_params(t1, t2)        # Bond A-B
-            kth, th0        = ff.get_angle_params(t1, t2, t3)   # Angle A-B-C
-            kphi, n, phi0   = ff.get_dihedral_params(t1,t2,t3,t4) # Dihedral A-B-C-D
-            
-            # 4. Convert to Verilog Q16.16 Hex
-            # Note: CHARMM angles are in Degrees. Need Radians? 
-            # Ideally yes, but let's assume your ASIC expects degrees for now 
-            # OR multiply by (3.14159/180) here. Let's do Degrees -> Radians:
-            th0_rad = th0 * (3.14159 / 180.0)
-            phi0_rad = phi0 * (3.14159 / 180.0)
+    labels, rows = window_rows(ff, atom_list)
+
+    # 6. Convert every row to Q16.16 Hex in one batch
+    # Each line is 65 characters (8 Q16.16 words + the 4-bit n = 260 bits)
+    hex_lines = encode_rows(rows, PARAM_RAM_ROW)
 
-            hex_r0 = to_q16_16(r0)
-            hex_kb = to_q16_16(kb)
-            hex_th0 = to_q16_16(th0_rad)
-            hex_kth = to_q16_16(kth)
-            hex_phi0 = to_q16_16(phi0_rad)
-            hex_kphi = to_q16_16(kphi)
-            hex_n = f"{n:1x}" # 4-bit integer, not Q16.16
-            hex_qa = to_q16_16(q1)
-            hex_qd = to_q16_16(q4)
-            
-            # 5. Format the line (260 bits total width)
-            # The order MUST match your Verilog concatenation from left (MSB) to right (LSB):
-            # {r0, kb, theta0, k_theta, phi0, k_phi, n, q_a, q_d}
-            
-            # Note: n is a 4-bit integer, so we use :1x to format it as a single hex character
-            hex_n = f"{n:1x}"
-            
-            # Combine into a single 65-character string (65 chars * 4 bits = 260 bits)
-            hex_line = f"{hex_r0}{hex_kb}{hex_th0}{hex_kth}{hex_phi0}{hex_kphi}{hex_n}{hex_qa}{hex_qd}"
-            
-            f.write(f"// Atom {i}: {a1}-{a2}-{a3}-{a4} ({t1}-{t2}-{t3}-{t4})\n")
+    with open(output_filename, 'w') as f:
+        for i, (label, hex_line) in enumerate(zip(labels, hex_lines)):
+            f.write(f"// Atom {i}: {label}\n")
             f.write(f"{hex_line}\n")
 
 # ==============================================================================
-# 5. EXECUTION
+# 2. EXECUTION
 # ==============================================================================
 if __name__ == "__main__":
     # Initialize System
@@ -186,8 +80,7 @@ if __name__ == "__main__":
     
     # Load the files (Assuming you saved them locally)
     try:
-        ff.load_rtf("top_all36_prot.rtf") 
-        ff.load_prm("par_all36_prot.prm")
+        load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
         print("Files loaded successfully.")
     except FileNotFoundError:
         print("Error: Ensure .rtf and .prm files are in the folder.")
@@ -203,4 +96,10 @@ if __name__ == "__main__":
     ]
     
     compile_hex_file(ff, test_sequence, "forcefield_init.hex")
-    print("Done! 'forcefield_init.hex' generated.")
\ No newline at end of file
+    print("Done! 'forcefield_init.hex' generated.")
+
+    # Residue / atom type lookup tables for all 20 amino acids. Opt-in: they
+    # overwrite the residue_database.v / atom_type_table.v tapeout sources
+    # (--rom for $readmemh images instead of case statements)
+    if "--lookup-tables" in sys.argv:
+        compile_lookup_tables(ff, rom="--rom" in sys.argv)
\ No newline at end of file
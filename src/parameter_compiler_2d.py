@@ -1,101 +1,167 @@
+import argparse
+import copy
 import math
+import os
+import tempfile
+import time
 
-# ==============================================================================
-# 1. FIXED-POINT CONVERTER (Q16.16)
-# ==============================================================================
-def to_q16_16(value):
-    """Converts a float to a 32-bit Q16.16 hex string."""
-    if value is None: return "00000000"
-    fixed_val = int(value * 65536)
-    if fixed_val < 0:
-        fixed_val = (1 << 32) + fixed_val
-    return f"{fixed_val:08X}"
+import numpy as np
+
+from ff_cache import load_cached
+from fixed_point import encode_rows, to_q16_16
+from forcefield import ForceField
 
 # ==============================================================================
-# 2. FORCE FIELD PARSER
+# 1. MIXING TABLE (Upper Triangle, NBFIX Overrides)
 # ==============================================================================
-class ForceField:
-    def __init__(self):
-        self.atom_types = {} 
-        self.nonbonded = {}  
-
-    def load_rtf(self, filename):
-        current_res = None
-        try:
-            with open(filename, 'r') as f:
-                for line in f:
-                    line = line.split('!')[0].strip()
-                    parts = line.split()
-                    if not parts: continue
-                    if parts[0] == 'RESI': current_res = parts[1]
-                    elif parts[0] == 'ATOM' and current_res:
-                        self.atom_types[(current_res, parts[1])] = (parts[2], float(parts[3]))
-        except FileNotFoundError:
-            print(f"Warning: {filename} not found.")
-
-    def load_prm(self, filename):
-        section = None
-        try:
-            with open(filename, 'r') as f:
-                for line in f:
-                    line = line.split('!')[0].strip()
-                    if line.startswith('NONBONDED'): section = 'NONBONDED'; continue
-                    parts = line.split()
-                    if section == 'NONBONDED' and len(parts) >= 4:
-                        try:
-                            self.nonbonded[parts[0]] = (abs(float(parts[2])), float(parts[3]))
-                        except ValueError: continue
-        except FileNotFoundError:
-            print(f"Warning: {filename} not found.")
+# The pair table is symmetric, so only i <= j is computed and stored. Packed
+# images list the triangle column by column:
+#   addr(i, j) = j * (j + 1) / 2 + i        for i <= j (swap otherwise)
+# which does not depend on the number of types, so growing the type set only
+# appends entries. Each entry is {sigma^2, 24 * epsilon} in Q16.16.
+MIXING_ROW = "qq"
+
+def tri_index(i, j):
+    """Packed-triangle address of type pair (i, j); works on scalars and arrays."""
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+    return hi * (hi + 1) // 2 + lo
+
+def mixing_table(ff, types):
+    """
+    (sigma_sq, eps_x24) arrays over the packed triangle of `types`.
+    Lorentz-Berthelot everywhere except the pairs listed under NBFIX in the
+    .prm, which replace the mixed Emin / Rmin.
+    """
+    eps, rmin_half = np.array([ff.nonbonded.get(t, (0.0, 0.0)) for t in types]).T.reshape(2, -1)
+    hi, lo = np.tril_indices(len(types)) # column j, row i <= j, in address order
+    mixed_eps = np.sqrt(eps[lo] * eps[hi])
+    mixed_rmin = rmin_half[lo] + rmin_half[hi]
+
+    # NBFIX pairs (Emin, Rmin) override the combination rule
+    type_to_id = {t: i for i, t in enumerate(types)}
+    for (t1, t2), (emin, rmin) in ff.nbfix.items():
+        if t1 in type_to_id and t2 in type_to_id:
+            addr = tri_index(type_to_id[t1], type_to_id[t2])
+            mixed_eps[addr], mixed_rmin[addr] = emin, rmin
+
+    mixed_sigma = mixed_rmin * 0.8908987 # Rmin * 2^(-1/6)
+    return mixed_sigma ** 2, mixed_eps * 24.0
+
+def write_mixing_matrix(sig_sq, eps_24, num_types, output_filename="mixing_matrix.hex", packed=False):
+    """
+    packed=False: dense num_types x num_types image, row-major (i * num_types + j).
+    packed=True : num_types * (num_types + 1) / 2 entries at tri_index(i, j).
+    """
+    lines = encode_rows(np.column_stack([sig_sq, eps_24]), MIXING_ROW) if len(sig_sq) else []
+    image = ("\n".join(lines) + "\n").encode('ascii') if lines else b""
+    if not packed and lines:
+        # Every line is 16 hex digits + newline: gather whole records
+        i, j = np.divmod(np.arange(num_types * num_types), num_types)
+        image = np.frombuffer(image, dtype="S17")[tri_index(i, j)].tobytes()
+    with open(output_filename, "wb") as f:
+        f.write(image)
+    return len(image) // 17
 
 # ==============================================================================
-# 3. ASSET GENERATION (1D Identity & 2D Mixing Matrix)
+# 2. ASSET GENERATION (1D Identity & 2D Mixing Matrix)
 # ==============================================================================
-def compile_hardware_assets(ff, atom_list):
-    # 1. Identify Unique Atom Types
-    unique_types = []
+def unique_atom_types(ff, atom_list, known=()):
+    """Atom types in order of first appearance, after the already numbered `known` ones."""
+    unique_types = list(known)
     for res, name in atom_list:
         t_str, _ = ff.atom_types.get((res, name), ("UNKNOWN", 0.0))
         if t_str not in unique_types:
             unique_types.append(t_str)
-    
+    return unique_types
+
+def identity_lines(ff, atom_list, type_to_id):
+    """atom_identity.hex lines: {Q (Q16.16), type_id (8 bits)} per atom."""
+    lines = []
+    for res, name in atom_list:
+        t_str, q = ff.atom_types.get((res, name), ("UNKNOWN", 0.0))
+        lines.append(f"{to_q16_16(q)}{type_to_id[t_str]:02X}")
+    return lines
+
+def compile_hardware_assets(ff, atom_list, packed=False, identity_filename="atom_identity.hex",
+                            mixing_filename="mixing_matrix.hex"):
+    # 1. Identify Unique Atom Types
+    unique_types = unique_atom_types(ff, atom_list)
     type_to_id = {t: i for i, t in enumerate(unique_types)}
     num_types = len(unique_types)
     
     # 2. Generate atom_identity.hex (1D)
     print(f"Generating identity hex for {len(atom_list)} atoms...")
-    with open("atom_identity.hex", "w") as f:
-        for res, name in atom_list:
-            t_str, q = ff.atom_types.get((res, name), ("UNKNOWN", 0.0))
-            tid = type_to_id[t_str]
-            f.write(f"{to_q16_16(q)}{tid:02X}\n")
+    with open(identity_filename, "w") as f:
+        for line in identity_lines(ff, atom_list, type_to_id):
+            f.write(f"{line}\n")
 
     # 3. Generate mixing_matrix.hex (2D)
-    print(f"Generating 2D mixing matrix for {num_types} unique types...")
-    with open("mixing_matrix.hex", "w") as f:
-        for i in range(num_types):
-            for j in range(num_types):
-                eps_i, rmin_i = ff.nonbonded.get(unique_types[i], (0.0, 0.0))
-                eps_j, rmin_j = ff.nonbonded.get(unique_types[j], (0.0, 0.0))
-                
-                # Lorentz-Berthelot Rules
-                mixed_eps = math.sqrt(eps_i * eps_j)
-                mixed_rmin = rmin_i + rmin_j
-                mixed_sigma = mixed_rmin * 0.8908987 # Rmin * 2^(-1/6)
-                
-                sig_sq = mixed_sigma**2
-                eps_24 = mixed_eps * 24.0
-                
-                f.write(f"{to_q16_16(sig_sq)}{to_q16_16(eps_24)}\n")
+    print(f"Generating {'packed' if packed else '2D'} mixing matrix for {num_types} unique types...")
+    sig_sq, eps_24 = mixing_table(ff, unique_types)
+    write_mixing_matrix(sig_sq, eps_24, num_types, mixing_filename, packed)
 
 # ==============================================================================
-# 4. EXECUTION (10-Atom Sequence)
+# 3. BENCHMARK (Per-Pair Loop vs Vectorized Triangle)
+# ==============================================================================
+def _loop_mixing_lines(ff, types):
+    """The original dense i x j loop, kept as the reference output (with the same NBFIX overrides)."""
+    lines = []
+    for ti in types:
+        for tj in types:
+            eps_i, rmin_i = ff.nonbonded.get(ti, (0.0, 0.0))
+            eps_j, rmin_j = ff.nonbonded.get(tj, (0.0, 0.0))
+            emin, rmin = math.sqrt(eps_i * eps_j), rmin_i + rmin_j
+            nbfix = ff.nbfix.get((ti, tj), ff.nbfix.get((tj, ti)))
+            if nbfix is not None: emin, rmin = nbfix
+            mixed_sigma = rmin * 0.8908987
+            lines.append(f"{to_q16_16(mixed_sigma**2)}{to_q16_16(emin * 24.0)}")
+    return lines
+
+def benchmark(ff, sizes=(54, 500, 4000), seed=0):
+    rng = np.random.default_rng(seed)
+    # Synthetic types go into a copy of the non-bonded table, never the caller's
+    ff = copy.copy(ff)
+    ff.nonbonded = dict(ff.nonbonded)
+    with tempfile.TemporaryDirectory(prefix="mixing_bench_") as tmp:
+        filename = os.path.join(tmp, "mixing_bench.hex")
+        for num_types in sizes:
+            # Beyond the real CHARMM set, synthetic types with CHARMM-like parameters
+            types = list(ff.nonbonded)[:num_types]
+            for k in range(num_types - len(types)):
+                ff.nonbonded[f"SYN{k}"] = (rng.uniform(0.01, 0.3), rng.uniform(0.9, 2.3))
+                types.append(f"SYN{k}")
+
+            t0 = time.perf_counter()
+            sig_sq, eps_24 = mixing_table(ff, types)
+            write_mixing_matrix(sig_sq, eps_24, num_types, filename, packed=True)
+            t_packed = time.perf_counter() - t0
+            line = f"{num_types:5d} types | packed {len(sig_sq):9,d} entries {t_packed * 1e3:8.1f} ms"
+
+            if num_types <= 500:
+                t0 = time.perf_counter()
+                reference = _loop_mixing_lines(ff, types)
+                t_loop = time.perf_counter() - t0
+                write_mixing_matrix(sig_sq, eps_24, num_types, filename)
+                with open(filename) as f:
+                    assert f.read().split() == reference, "dense image differs from the per-pair loop"
+                line += f" | dense loop {len(reference):9,d} entries {t_loop * 1e3:8.1f} ms"
+            print(line)
+
+# ==============================================================================
+# 4. EXECUTION (10-Atom Sequence; Benchmark with --bench)
 # ==============================================================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile atom_identity.hex and mixing_matrix.hex.")
+    parser.add_argument("--bench", action="store_true",
+                        help="also time the packed triangle against the per-pair loop (up to 4000 types)")
+    args = parser.parse_args()
+
     ff = ForceField()
     # Replace with path to standard CHARMM force field files
-    ff.load_rtf("top_all36_prot.rtf")
-    ff.load_prm("par_all36_prot.prm")
+    try:
+        load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
+    except FileNotFoundError as e:
+        print(f"Warning: {e.filename} not found.")
 
     # 10-atom sequence representing two Alanine residues
     test_sequence = [
@@ -104,4 +170,6 @@ if __name__ == "__main__":
     ]
     
     compile_hardware_assets(ff, test_sequence)
-    print("Done. Generated atom_identity.hex and mixing_matrix.hex.")
\ No newline at end of file
+    print("Done. Generated atom_identity.hex and mixing_matrix.hex.")
+
+    if args.bench: benchmark(ff)
\ No newline at end of file
@@ -1,133 +1,101 @@
-import re
-import math
+import numpy as np
+
+from ff_cache import load_cached
+from fixed_point import KC, NONBONDED_PAIR_ROW, NONBONDED_ROW, encode_rows
+from forcefield import ForceField
+from parameter_compiler_2d import mixing_table, tri_index
 
 # ==============================================================================
-# 1. FIXED-POINT CONVERTER 
+# 1. COMPILER MAIN ROUTINE (Non-Bonded LUT Generation)
 # ==============================================================================
-def to_q16_16(value):
-    """Converts a float to a 32-bit Q16.16 hex string."""
-    if value is None: return "00000000"
-    if isinstance(value, int): return f"{value:x}" 
+def nonbonded_rows(ff, atom_list):
+    """(labels, rows): comment text after '// Atom i: ' and {Q, Sigma^2, 24*Epsilon} per atom."""
+    labels, rows = [], []
+    for res_name, atom_name in atom_list:
         
-    fixed_val = int(value * 65536)
-    if fixed_val < 0:
-        fixed_val = (1 << 32) + fixed_val
+        # Fetch and convert math
+        q, sigma_sq, eps_x24, atom_type = ff.get_nonbonded_hardware_params(res_name, atom_name)
         
-    return f"{fixed_val:08X}"
+        rows.append((q, sigma_sq, eps_x24))
+        labels.append(f"{res_name}-{atom_name} (Type: {atom_type}) | Q={q}, Sig^2={sigma_sq:.3f}, Eps*24={eps_x24:.3f}")
+    return labels, rows
 
-# ==============================================================================
-# 2. CHARMM FILE PARSER
-# ==============================================================================
-class ForceField:
-    def __init__(self):
-        self.bonds = {}      
-        self.angles = {}     
-        self.dihedrals = {}  
-        self.atom_types = {} 
-        self.nonbonded = {}  # NEW: Key: AtomType -> (Epsilon, Rmin/2)
+def compile_nonbonded_lut(ff, atom_list, output_filename="nonbonded_lut.hex", pairs=None,
+                          pair_filename="nonbonded_pair_lut.hex", sigma6=False):
+    """
+    Generates a memory file for the Parameter LUT.
+    Each line corresponds to an atom's static parameters: {Q, Sigma^2, 24*Epsilon}
+    With pairs=(pair_i, pair_j) (or pairs='all'), the precombined pair image is
+    written to pair_filename as well (see compile_pair_lut).
+    """
+    print(f"Compiling Non-Bonded parameters for {len(atom_list)} atoms into {output_filename}...")
+    labels, rows = nonbonded_rows(ff, atom_list)
 
-    def load_prm(self, filename):
-        """Parses the .prm parameter file."""
-        section = None
-        with open(filename, 'r') as f:
-            for line in f:
-                line = line.split('!')[0].strip()
-                if not line: continue
-                
-                # Detect Sections
-                if line.startswith('BONDS'): section = 'BONDS'; continue
-                if line.startswith('ANGLES'): section = 'ANGLES'; continue
-                if line.startswith('DIHEDRALS'): section = 'DIHEDRALS'; continue
-                if line.startswith('NONBONDED'): section = 'NONBONDED'; continue
+    # Convert to Q16.16 Hex Strings (96 bits total: 32 bit Q, 32 bit Sig^2, 32 bit Eps24)
+    hex_lines = encode_rows(rows, NONBONDED_ROW)
 
-                parts = line.split()
-                
-                # --- NEW: Parse Non-Bonded Parameters ---
-                if section == 'NONBONDED' and len(parts) >= 4:
-                    # CHARMM format: AtomType  Ignored  Epsilon  Rmin/2
-                    # The try-except block ignores header lines containing words like 'ctofnb'
-                    try:
-                        atom_type = parts[0]
-                        epsilon = abs(float(parts[2])) 
-                        rmin_half = float(parts[3])
-                        self.nonbonded[atom_type] = (epsilon, rmin_half)
-                    except ValueError:
-                        # If parts[2] isn't a number, skip this line and keep going
-                        continue
+    with open(output_filename, 'w') as f:
+        for i, (label, hex_line) in enumerate(zip(labels, hex_lines)):
+            f.write(f"// Atom {i}: {label}\n")
+            f.write(f"{hex_line}\n")
 
-    def load_rtf(self, filename):
-        """Parses the .rtf topology file to get Atom Types and Charges."""
-        current_residue = None
-        with open(filename, 'r') as f:
-            for line in f:
-                line = line.split('!')[0].strip() # Clean comments
-                parts = line.split()
-                if not parts: continue
-                
-                if parts[0] == 'RESI':
-                    current_residue = parts[1]
-                
-                elif parts[0] == 'ATOM':
-                    atom_name = parts[1]
-                    atom_type = parts[2]
-                    charge = float(parts[3])
-                    self.atom_types[(current_residue, atom_name)] = (atom_type, charge)
-
-    # ==========================================================================
-    # 3. NON-BONDED LOOKUP & MATH CONVERSION
-    # ==========================================================================
-    def get_nonbonded_hardware_params(self, res_name, atom_name):
-        """Fetches and converts parameters to hardware-ready formats."""
-        # 1. Get Type and Charge
-        atom_type, q = self.atom_types.get((res_name, atom_name), ("UNKNOWN", 0.0))
-        
-        # 2. Get VDW params
-        epsilon, rmin_half = self.nonbonded.get(atom_type, (0.0, 0.0))
-        
-        # 3. Math Conversions for Hardware
-        # Sigma = Rmin / (2^(1/6)) = (2 * Rmin_half) / 1.122462
-        sigma = (2.0 * rmin_half) / 1.12246204831
-        sigma_sq = sigma * sigma
-        
-        # Epsilon scaled by 24 for the derivative calculation in hardware
-        eps_x24 = epsilon * 24.0
-        
-        return q, sigma_sq, eps_x24, atom_type
+    if pairs is not None:
+        pair_i, pair_j = (None, None) if isinstance(pairs, str) else pairs
+        compile_pair_lut(ff, atom_list, pair_i, pair_j, pair_filename, sigma6)
 
 # ==============================================================================
-# 4. COMPILER MAIN ROUTINE (Non-Bonded LUT Generation)
+# 2. PAIR-LEVEL IMAGE (Precombined Coefficients per Streamed Pair)
 # ==============================================================================
-def compile_nonbonded_lut(ff, atom_list, output_filename="nonbonded_lut.hex"):
+# The per-atom rows leave the combination to the datapath: coulombic_core_stream
+# spends two of its three multiplies on q_i * q_j * KC for every pair. A pair
+# image is precombined on the host instead, one row per streamed (i, j):
+#   {KC * q_i * q_j, Sigma^2 (or Sigma^6), 24 * Epsilon}
+# Sigma and epsilon are the mixed pair values of mixing_table (Lorentz-Berthelot
+# with NBFIX overrides). Row k belongs to the k-th pair of the feed order, i.e.
+# line k of neighbor_list.write_pair_hex for the same list.
+def pair_coefficients(ff, atom_list, pair_i, pair_j, sigma6=False):
+    """(pairs, 3) float rows in NONBONDED_PAIR_ROW order for the given pair list."""
+    types, charges = zip(*[ff.atom_types.get(atom, ("UNKNOWN", 0.0)) for atom in atom_list])
+    unique_types = sorted(set(types))
+    type_to_id = {t: i for i, t in enumerate(unique_types)}
+    tid = np.array([type_to_id[t] for t in types], dtype=np.int64)
+    q = np.array(charges, dtype=np.float64)
+
+    sig_sq, eps_24 = mixing_table(ff, unique_types)
+    addr = tri_index(tid[pair_i], tid[pair_j])
+    sigma = sig_sq[addr] ** 3 if sigma6 else sig_sq[addr]
+    return np.column_stack([(KC / 65536.0) * q[pair_i] * q[pair_j], sigma, eps_24[addr]])
+
+def compile_pair_lut(ff, atom_list, pair_i=None, pair_j=None, output_filename="nonbonded_pair_lut.hex",
+                     sigma6=False):
     """
-    Generates a memory file for the Parameter LUT.
-    Each line corresponds to an atom's static parameters: {Q, Sigma^2, 24*Epsilon}
+    Writes the pair image for pair_i / pair_j (default: every j >= i + 3 pair in
+    S_NB_INNER order). Returns the (pairs, 3) float rows.
     """
-    print(f"Compiling Non-Bonded parameters for {len(atom_list)} atoms into {output_filename}...")
-    
+    if pair_i is None:
+        pair_i, pair_j = np.triu_indices(len(atom_list), k=3)
+    pair_i, pair_j = np.asarray(pair_i, dtype=np.int64), np.asarray(pair_j, dtype=np.int64)
+    label = "Sig^6" if sigma6 else "Sig^2"
+    print(f"Compiling {len(pair_i)} precombined pairs ({label}) into {output_filename}...")
+
+    rows = pair_coefficients(ff, atom_list, pair_i, pair_j, sigma6)
+    hex_lines = encode_rows(rows, NONBONDED_PAIR_ROW) if len(rows) else []
     with open(output_filename, 'w') as f:
-        for i, (res_name, atom_name) in enumerate(atom_list):
-            
-            # Fetch and convert math
-            q, sigma_sq, eps_x24, atom_type = ff.get_nonbonded_hardware_params(res_name, atom_name)
-            
-            # Convert to Q16.16 Hex Strings
-            hex_q = to_q16_16(q)
-            hex_sig_sq = to_q16_16(sigma_sq)
-            hex_eps24 = to_q16_16(eps_x24)
-            
-            # Write to file (96 bits total: 32 bit Q, 32 bit Sig^2, 32 bit Eps24)
-            f.write(f"// Atom {i}: {res_name}-{atom_name} (Type: {atom_type}) | Q={q}, Sig^2={sigma_sq:.3f}, Eps*24={eps_x24:.3f}\n")
-            f.write(f"{hex_q}{hex_sig_sq}{hex_eps24}\n")
+        for k, (i, j, hex_line) in enumerate(zip(pair_i.tolist(), pair_j.tolist(), hex_lines)):
+            kqq, sigma, eps_x24 = rows[k]
+            f.write(f"// Pair {k}: {i}-{j} ({atom_list[i][0]}-{atom_list[i][1]}, {atom_list[j][0]}-{atom_list[j][1]})"
+                    f" | KQQ={kqq:.3f}, {label}={sigma:.3f}, Eps*24={eps_x24:.3f}\n")
+            f.write(f"{hex_line}\n")
+    return rows
 
 # ==============================================================================
-# 5. EXECUTION
+# 3. EXECUTION
 # ==============================================================================
 if __name__ == "__main__":
     ff = ForceField()
     
     try:
-        ff.load_rtf("top_all36_prot.rtf") 
-        ff.load_prm("par_all36_prot.prm")
+        load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
         print("Force Field Files loaded successfully.")
     except FileNotFoundError:
         print("Error: Ensure .rtf and .prm files are in the folder.")
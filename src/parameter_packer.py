@@ -0,0 +1,249 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from dihedral_index import sliding_window_dihedrals
+from fixed_point import PARAM_RAM_ROW, encode_q16_16, encode_rows
+
+# ==============================================================================
+# 1. TYPE-INDEXED PACKING
+# ==============================================================================
+# compile_hex_file writes a full 260-bit row per sliding window, but a protein
+# only ever hits a few dozen type combinations, so the same (r0, kb), (theta0,
+# k_theta) ... words repeat all the way down the chain. Here every parameter
+# group is resolved once per unique type combination, interned by its encoded
+# Q16.16 words, and the per-window stream keeps just the table indices:
+#   index    : {bond, angle, dihedral, q_a, q_d}  (5 x 16-bit fields)
+#   bond     : {r0, kb}
+#   angle    : {theta0, k_theta}
+#   dihedral : {phi0, k_phi, n}
+#   charge   : {q}                                (shared by q_a and q_d)
+# Interning the encoded words (not the floats) keeps decode bit-exact.
+PACKED_LAYOUTS = {
+    'index':    "hhhhh",
+    'bond':     "qq",
+    'angle':    "qq",
+    'dihedral': "qqn",
+    'charge':   "q",
+}
+TABLE_DEPTH = 256   # Entries per table in parameter_ram_packed.v (8-bit index)
+INDEX_DEPTH = 1024  # index_mem rows in parameter_ram_packed.v (one per window)
+DENSE_BITS = 260    # parameter_ram row width
+
+def _intern(words):
+    """(rows, cols) uint32 -> (unique rows, index of each input row)."""
+    table, index = np.unique(words.reshape(len(words), -1), axis=0, return_inverse=True)
+    return table, index.reshape(-1)
+
+def _intern_table(words):
+    """
+    _intern() with entry 0 reserved for the all-zero row, so windows past the
+    end of the index image (zero indices) read zeros like an unlisted
+    parameter_ram row. Zero words sort first, so a real zero row shares it.
+    """
+    words = words.reshape(len(words), -1)
+    table, index = _intern(np.concatenate([np.zeros((1, words.shape[1]), dtype=words.dtype), words]))
+    return table, index[1:]
+
+def _combos(type_ids, arity):
+    """Unique sliding type tuples and the slot of each window."""
+    windows = np.lib.stride_tricks.sliding_window_view(type_ids, arity)
+    return _intern(windows)
+
+class PackedParameterRam:
+    def __init__(self, index, bond, angle, dihedral, charge):
+        """index: (windows, 5) int; tables: uint32 word arrays in PACKED_LAYOUTS order."""
+        self.index = np.asarray(index, dtype=np.int64).reshape(-1, 5)
+        self.bond = np.asarray(bond, dtype=np.uint32).reshape(-1, 2)
+        self.angle = np.asarray(angle, dtype=np.uint32).reshape(-1, 2)
+        self.dihedral = np.asarray(dihedral, dtype=np.uint32).reshape(-1, 3)
+        self.charge = np.asarray(charge, dtype=np.uint32).reshape(-1, 1)
+
+    @classmethod
+    def from_atom_list(cls, ff, atom_list):
+        """Same windows and unit conversions as compile_hex_file, one lookup per unique combination."""
+        n_windows = len(atom_list) - 3
+        types = [ff.atom_types[a][0] for a in atom_list]
+        names = sorted(set(types))
+        lookup = {t: i for i, t in enumerate(names)}
+        tid = np.array([lookup[t] for t in types], dtype=np.int64)
+
+        # 1. Bonds A-B and angles A-B-C: look up each unique type combination once
+        combos, slot = _combos(tid[:n_windows + 1], 2)
+        bond = [ff.get_bond_params(names[a], names[b])[::-1] for a, b in combos.tolist()]
+        bond_words = encode_q16_16(np.reshape(bond, (-1, 2)))[slot]
+
+        combos, slot = _combos(tid[:n_windows + 2], 3)
+        angle = [(th0 * (3.14159 / 180.0), kth)
+                 for kth, th0 in (ff.get_angle_params(names[a], names[b], names[c]) for a, b, c in combos.tolist())]
+        angle_words = encode_q16_16(np.reshape(angle, (-1, 2)))[slot]
+
+        # 2. Dihedrals A-B-C-D (already gathered per unique quad by the index)
+        k_phi, n_phi, phi0_deg = sliding_window_dihedrals(ff, atom_list)
+        dihedral_words = np.column_stack([encode_q16_16(phi0_deg * (3.14159 / 180.0)), encode_q16_16(k_phi),
+                                          np.asarray(n_phi).astype(np.uint32) & 0xF])
+
+        # 3. Charges of A and D share one table
+        q = encode_q16_16([ff.atom_types[a][1] for a in atom_list])
+        charge_words = np.concatenate([q[:n_windows], q[3:]])
+
+        bond, bond_idx = _intern_table(bond_words)
+        angle, angle_idx = _intern_table(angle_words)
+        dihedral, dihedral_idx = _intern_table(dihedral_words)
+        charge, charge_idx = _intern_table(charge_words)
+        index = np.column_stack([bond_idx, angle_idx, dihedral_idx,
+                                 charge_idx[:n_windows], charge_idx[n_windows:]])
+        return cls(index, bond, angle, dihedral, charge)
+
+    # ==========================================================================
+    # 2. HOST-SIDE DECODER
+    # ==========================================================================
+    def tables(self):
+        return {'index': self.index, 'bond': self.bond, 'angle': self.angle,
+                'dihedral': self.dihedral, 'charge': self.charge}
+
+    def decode(self):
+        """
+        (windows, 9) int64 rows in parameter_ram field order {r0, kb, theta0,
+        k_theta, phi0, k_phi, n, q_a, q_d}, signed like load_parameter_ram().
+        """
+        b, a, d, qa, qd = self.index.T
+        words = np.column_stack([self.bond[b], self.angle[a], self.dihedral[d],
+                                 self.charge[qa], self.charge[qd]]).astype(np.int64)
+        signed = words - ((words >> 31) << 32)
+        signed[:, 6] = words[:, 6] # n is the unsigned 4-bit period
+        return signed
+
+    def hex_lines(self):
+        """Dense parameter_ram lines, byte-identical to compile_hex_file's rows."""
+        rows = self.decode().astype(np.float64)
+        rows[:, [0, 1, 2, 3, 4, 5, 7, 8]] /= 65536.0 # Exact: trunc(x * 65536) restores the word
+        return encode_rows(rows, PARAM_RAM_ROW)
+
+    # ==========================================================================
+    # 3. HEX IMAGES (One File per Table)
+    # ==========================================================================
+    def overflow(self):
+        """Why the images do not fit parameter_ram_packed.v (empty list when they do)."""
+        return [f"{name} table has {len(data)} entries, parameter_ram_packed holds {depth}"
+                for name, data in self.tables().items()
+                for depth in [INDEX_DEPTH if name == 'index' else TABLE_DEPTH] if len(data) > depth]
+
+    def write(self, prefix="forcefield"):
+        """Writes <prefix>_{index,bond,angle,dihedral,charge}.hex for parameter_ram_packed.v."""
+        problems = self.overflow()
+        if problems: raise ValueError("; ".join(problems))
+        for name, data in self.tables().items():
+            layout = PACKED_LAYOUTS[name]
+            rows = data.astype(np.int64)
+            if name != 'index':
+                rows = rows - ((rows >> 31) << 32)
+                rows = np.where([k == 'q' for k in layout], rows / 65536.0, rows)
+            with open(f"{prefix}_{name}.hex", 'w') as f:
+                for line in encode_rows(rows, layout) if len(rows) else []:
+                    f.write(f"{line}\n")
+
+    @classmethod
+    def read(cls, prefix="forcefield"):
+        """Loads the five images back (the inverse of write())."""
+        widths = {'q': 8, 'n': 1, 'h': 4}
+        tables = {}
+        for name, layout in PACKED_LAYOUTS.items():
+            fields = []
+            with open(f"{prefix}_{name}.hex", 'r') as f:
+                for line in f:
+                    line = line.split('//')[0].strip()
+                    if not line: continue
+                    pos, row = 0, []
+                    for kind in layout:
+                        row.append(int(line[pos:pos + widths[kind]], 16))
+                        pos += widths[kind]
+                    fields.append(row)
+            tables[name] = np.array(fields, dtype=np.int64).reshape(-1, len(layout))
+        return cls(**tables)
+
+    # ==========================================================================
+    # 4. COMPRESSION REPORT
+    # ==========================================================================
+    def report(self):
+        """Sizes in bits: dense rows vs the packed stream (minimal and 16-bit index fields) + tables."""
+        n_windows = len(self.index)
+        counts = {name: len(t) for name, t in self.tables().items() if name != 'index'}
+        width = {name: max(int(c - 1).bit_length(), 1) for name, c in counts.items()}
+        index_bits = width['bond'] + width['angle'] + width['dihedral'] + 2 * width['charge']
+        table_bits = (counts['bond'] * 64 + counts['angle'] * 64 + counts['dihedral'] * 68
+                      + counts['charge'] * 32)
+        return {
+            'windows': n_windows,
+            'entries': counts,
+            'dense_bits': n_windows * DENSE_BITS,
+            'packed_bits': n_windows * index_bits + table_bits,
+            'packed_hex_bits': n_windows * 16 * 5 + table_bits,
+            'index_bits': index_bits,
+        }
+
+    def print_report(self):
+        r = self.report()
+        ratio = r['dense_bits'] / max(r['packed_bits'], 1)
+        print(f"{r['windows']} windows | unique bond {r['entries']['bond']}, angle {r['entries']['angle']}, "
+              f"dihedral {r['entries']['dihedral']}, charge {r['entries']['charge']}")
+        print(f"  dense  : {r['dense_bits'] / 8192:9.1f} KiB ({DENSE_BITS} bits/window)")
+        print(f"  packed : {r['packed_bits'] / 8192:9.1f} KiB ({r['index_bits']} bits/window + tables), "
+              f"{ratio:.1f}x smaller, {(r['dense_bits'] - r['packed_bits']) / 8192:.1f} KiB saved")
+        print(f"  packed images (16-bit index fields): {r['packed_hex_bits'] / 8192:9.1f} KiB")
+
+def compile_packed_hex(ff, atom_list, prefix="forcefield"):
+    """Packed counterpart of compile_hex_file."""
+    print(f"Packing {len(atom_list)} atoms into {prefix}_*.hex...")
+    packed = PackedParameterRam.from_atom_list(ff, atom_list)
+    packed.write(prefix)
+    packed.print_report()
+    return packed
+
+# ==============================================================================
+# 5. BENCHMARK (Dense compile_hex_file vs Packed Images)
+# ==============================================================================
+if __name__ == "__main__":
+    from ff_cache import load_cached
+    from forcefield import ForceField
+    from parameter_compiler import compile_hex_file
+
+    ff = ForceField()
+    load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
+
+    rng = np.random.default_rng(0)
+    residues = ['ALA', 'GLY', 'SER', 'LEU', 'LYS', 'GLU', 'PHE', 'VAL']
+    # The window count is capped by index_mem; what packing shrinks is the
+    # memory behind it (index fields + tables instead of 260-bit rows)
+    print(f"parameter_ram_packed holds at most {INDEX_DEPTH} windows ({INDEX_DEPTH + 3} atoms) and "
+          f"{TABLE_DEPTH} entries per table\n")
+    for n_residues in (10, 60, 100, 2000):
+        chain = [residues[i] for i in rng.integers(0, len(residues), n_residues)]
+        atom_list = [(res, name) for res in chain for name in ff.residues[res]]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            dense_file = os.path.join(tmp, "forcefield_init.hex")
+            t0 = time.perf_counter()
+            compile_hex_file(ff, atom_list, dense_file)
+            t_dense = time.perf_counter() - t0
+
+            # Oversized chains are packed and decoded in memory only: write() refuses them
+            t0 = time.perf_counter()
+            packed = PackedParameterRam.from_atom_list(ff, atom_list)
+            problems = packed.overflow()
+            if not problems: packed.write(os.path.join(tmp, "forcefield"))
+            t_packed = time.perf_counter() - t0
+            packed.print_report()
+
+            t0 = time.perf_counter()
+            decoded = (packed if problems else PackedParameterRam.read(os.path.join(tmp, "forcefield"))).hex_lines()
+            t_load = time.perf_counter() - t0
+            if problems: print(f"  does not fit parameter_ram_packed: {'; '.join(problems)}")
+
+            with open(dense_file, 'r') as f:
+                dense = [line.strip() for line in f if not line.startswith('//')]
+            assert decoded == dense, "packed image does not decode to the dense parameter_ram rows"
+            print(f"  dense compile {t_dense * 1e3:8.1f} ms | packed compile {t_packed * 1e3:8.1f} ms "
+                  f"| load + decode {t_load * 1e3:8.1f} ms\n")
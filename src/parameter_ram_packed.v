@@ -0,0 +1,66 @@
+module parameter_ram_packed (
+    input wire clk,
+    input wire [9:0] addr, // Same window address as parameter_ram
+
+    // 2-Body Bond Parameters
+    output reg signed [31:0] r0_out,       // Target Bond Length
+    output reg signed [31:0] kb_out,       // Bond Stiffness
+
+    // 3-Body Angle Parameters
+    output reg signed [31:0] theta0_out,   // Target Angle
+    output reg signed [31:0] k_theta_out,  // Angle Stiffness
+
+    // 4-Body Dihedral Parameters
+    output reg signed [31:0] phi0_out,     // Target Torsion Phase
+    output reg signed [31:0] k_phi_out,    // Torsion Stiffness
+    output reg [3:0]         n_period_out, // Periodicity (1, 2, 3, etc.)
+
+    // Electrostatics (Charges)
+    output reg signed [31:0] q_a_out,      // Partial Charge of Atom A
+    output reg signed [31:0] q_d_out       // Partial Charge of Atom D
+);
+
+    // ---------------------------------------------------------
+    // TYPE-INDEXED MEMORIES (see parameter_packer.py)
+    // ---------------------------------------------------------
+    // Per window: {bond, angle, dihedral, q_a, q_d} table indices, 16 bits
+    // each in the image, of which the low 8 bits address the tables.
+    reg [79:0] index_mem [0:1023];
+    reg [63:0] bond_mem     [0:255]; // {r0, kb}
+    reg [63:0] angle_mem    [0:255]; // {theta0, k_theta}
+    reg [67:0] dihedral_mem [0:255]; // {phi0, k_phi, n}
+    reg [31:0] charge_mem   [0:255]; // {q}
+
+    wire [79:0] idx = index_mem[addr];
+
+    // ---------------------------------------------------------
+    // SYNCHRONOUS READ (same one-cycle latency as parameter_ram)
+    // ---------------------------------------------------------
+    always @(posedge clk) begin
+        {r0_out, kb_out}                   <= bond_mem[idx[71:64]];
+        {theta0_out, k_theta_out}          <= angle_mem[idx[55:48]];
+        {phi0_out, k_phi_out, n_period_out} <= dihedral_mem[idx[39:32]];
+        q_a_out                            <= charge_mem[idx[23:16]];
+        q_d_out                            <= charge_mem[idx[7:0]];
+    end
+
+    // ---------------------------------------------------------
+    // SIMULATION INITIALIZATION
+    // ---------------------------------------------------------
+    // Unlisted windows read index 0, and the packer keeps entry 0 of every
+    // table all-zero, so they see the same zero row as in parameter_ram.
+    integer i;
+    initial begin
+        for (i = 0; i < 1024; i = i + 1) index_mem[i] = 80'd0;
+        for (i = 0; i < 256; i = i + 1) begin
+            bond_mem[i] = 64'd0; angle_mem[i] = 64'd0; dihedral_mem[i] = 68'd0; charge_mem[i] = 32'd0;
+        end
+
+        $readmemh("forcefield_index.hex", index_mem);
+        $readmemh("forcefield_bond.hex", bond_mem);
+        $readmemh("forcefield_angle.hex", angle_mem);
+        $readmemh("forcefield_dihedral.hex", dihedral_mem);
+        $readmemh("forcefield_charge.hex", charge_mem);
+    end
+
+endmodule
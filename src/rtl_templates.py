@@ -0,0 +1,29 @@
+import os
+
+# ==============================================================================
+# 1. TEMPLATES (RTL Sources Next to This File)
+# ==============================================================================
+# The generators patch constants into copies of the checked-in Verilog. The
+# originals are found next to this file, so the scripts work from any
+# working directory; outputs still go where the caller says.
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def src_path(name):
+    """Path of a file in src/ (the default template of every generator)."""
+    return os.path.join(SRC_DIR, name)
+
+def read_template(template):
+    with open(template, 'r') as f:
+        return f.read()
+
+# ==============================================================================
+# 2. OUTPUT (Banner and Writer Shared by the Generators)
+# ==============================================================================
+def generated_by(script):
+    """Banner text for files written by script (e.g. 'lut_generator.py')."""
+    return f"Generated by {script} -- do not edit by hand."
+
+def write_text(filename, text):
+    with open(filename, 'w') as f:
+        f.write(text)
+    print(f"  wrote {filename}")
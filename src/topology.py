@@ -0,0 +1,335 @@
+import numpy as np
+
+from dihedral_index import DihedralIndex
+from fixed_point import KC, NONBONDED_PAIR_ROW, encode_rows
+
+# ==============================================================================
+# 1. MOLECULAR GRAPH (From RTF Residue Templates)
+# ==============================================================================
+# compile_hex_file walks atom_list[i:i+4] as if the molecule were a straight
+# chain, so branches (HN, HA, CB, O ...) pick up bonds/angles they don't have.
+# Here the BOND/DOUBLE lines of each residue template are stitched into one
+# graph ('+N' = N of the next residue, '-C' = C of the previous one) and the
+# real bonded terms are read off the adjacency lists.
+
+class Topology:
+    def __init__(self, ff, atoms, residue_index):
+        """
+        atoms: [(ResName, AtomName), ...]; residue_index[i] is the residue number
+        atom i belongs to (consecutive atoms of one residue share a number).
+        """
+        self.atoms = list(atoms)
+        self.residue_index = list(residue_index)
+        self.types = [ff.atom_types[a][0] for a in self.atoms]
+        self.charges = [ff.atom_types[a][1] for a in self.atoms]
+
+        # (residue number, AtomName) -> atom index
+        lookup = {(r, name): i for i, (r, (_, name)) in enumerate(zip(self.residue_index, self.atoms))}
+        residue_names = {r: res for r, (res, _) in zip(self.residue_index, self.atoms)}
+
+        # 1. Bonds from the templates, resolving +/- neighbours across residues
+        bonds = set()
+        for r, res in residue_names.items():
+            for a1, a2 in ff.residue_bonds.get(res, []):
+                i, j = self._resolve(lookup, r, a1), self._resolve(lookup, r, a2)
+                if i is None or j is None or i == j: continue # Atom not in this fragment
+                bonds.add((min(i, j), max(i, j)))
+        self.bonds = np.array(sorted(bonds), dtype=np.int64).reshape(-1, 2)
+
+        # 2. Adjacency lists
+        self.neighbors = [[] for _ in self.atoms]
+        for i, j in self.bonds.tolist():
+            self.neighbors[i].append(j)
+            self.neighbors[j].append(i)
+        for nbrs in self.neighbors: nbrs.sort()
+
+        # 3. Angles: every pair of neighbours around a centre atom (i < k)
+        angles = [(i, j, k) for j, nbrs in enumerate(self.neighbors)
+                  for x, i in enumerate(nbrs) for k in nbrs[x + 1:]]
+        self.angles = np.array(angles, dtype=np.int64).reshape(-1, 3)
+
+        # 4. Dihedrals: walk out from both ends of every bond (j-k), skipping
+        #    3-rings (i == l); each torsion is listed once, with i < l
+        dihedrals = set()
+        for j, k in self.bonds.tolist():
+            for i in self.neighbors[j]:
+                if i == k: continue
+                for l in self.neighbors[k]:
+                    if l == j or l == i: continue
+                    dihedrals.add((i, j, k, l) if i < l else (l, k, j, i))
+        self.dihedrals = np.array(sorted(dihedrals), dtype=np.int64).reshape(-1, 4)
+
+    @staticmethod
+    def _resolve(lookup, r, name):
+        if name.startswith('+'): return lookup.get((r + 1, name[1:]))
+        if name.startswith('-'): return lookup.get((r - 1, name[1:]))
+        return lookup.get((r, name))
+
+    # --- Constructors -------------------------------------------------------
+    @classmethod
+    def from_residues(cls, ff, sequence):
+        """Full peptide from a list of residue names, e.g. ['ALA', 'GLY', 'SER']."""
+        atoms, residue_index = [], []
+        for r, res in enumerate(sequence):
+            for name in ff.residues[res]:
+                atoms.append((res, name))
+                residue_index.append(r)
+        return cls(ff, atoms, residue_index)
+
+    @classmethod
+    def from_atom_list(cls, ff, atom_list):
+        """
+        The (ResName, AtomName) lists the compilers use have no residue numbers;
+        a new residue starts whenever the name changes or an atom name repeats.
+        """
+        residue_index, seen, r = [], set(), -1
+        for i, (res, name) in enumerate(atom_list):
+            if i == 0 or res != atom_list[i - 1][0] or name in seen:
+                r += 1
+                seen = set()
+            seen.add(name)
+            residue_index.append(r)
+        return cls(ff, atom_list, residue_index)
+
+    def type_tuples(self, terms):
+        return [tuple(self.types[i] for i in row) for row in terms.tolist()]
+
+    # --- Non-bonded exclusions ----------------------------------------------
+    def exclusions(self):
+        """1-2 and 1-3 pairs (i < j): the ends of every bond and angle."""
+        return _unique_pairs(np.concatenate([self.bonds, self.angles[:, [0, 2]]]), len(self.atoms))
+
+    def pairs14(self):
+        """Dihedral ends (i < l) that are not 1-2 / 1-3 already (4- and 5-rings)."""
+        n = len(self.atoms)
+        ends = _unique_pairs(self.dihedrals[:, [0, 3]], n)
+        excluded = self.exclusions()
+        keep = ~np.isin(ends[:, 0] * n + ends[:, 1], excluded[:, 0] * n + excluded[:, 1])
+        return ends[keep]
+
+def _unique_pairs(pairs, n):
+    """(k, 2) index pairs -> sorted unique (i < j) rows, (nb_i, nb_j) order."""
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    key = np.unique(pairs.min(axis=1) * n + pairs.max(axis=1))
+    return np.column_stack([key // n, key % n])
+
+# ==============================================================================
+# 2. DEDUPLICATED PARAMETER TABLES
+# ==============================================================================
+def bonded_tables(ff, topo, dihedral_index=None):
+    """
+    Resolves the parameters of every real term and interns them.
+    Returns {'bond'|'angle'|'dihedral': (term_rows, param_rows)} where
+    term_rows = [atom indices..., param id] and param_rows are unique tuples:
+      bond     : (r0, kb)
+      angle    : (theta0 [rad], k_theta)
+      dihedral : (phi0 [rad], k_phi, n)  -- one term row per Fourier term
+    Angles use the same 3.14159/180 conversion as compile_hex_file.
+    """
+    def intern(table, params):
+        if params not in table: table[params] = len(table)
+        return table[params]
+
+    tables = {}
+
+    params = {}
+    rows = [(i, j, intern(params, tuple(reversed(ff.get_bond_params(ti, tj)))))
+            for (i, j), (ti, tj) in zip(topo.bonds.tolist(), topo.type_tuples(topo.bonds))]
+    tables['bond'] = (rows, list(params))
+
+    params = {}
+    rows = []
+    for (i, j, k), (ti, tj, tk) in zip(topo.angles.tolist(), topo.type_tuples(topo.angles)):
+        kth, th0 = ff.get_angle_params(ti, tj, tk)
+        rows.append((i, j, k, intern(params, (th0 * (3.14159 / 180.0), kth))))
+    tables['angle'] = (rows, list(params))
+
+    params = {}
+    rows = []
+    quads = topo.type_tuples(topo.dihedrals)
+    if quads:
+        index = dihedral_index or DihedralIndex(ff, quads)
+        type_ids = np.array([[index.type_ids[t] for t in q] for q in quads], dtype=np.int64)
+        torsion, k, n, delta = index.gather(type_ids)
+        atoms = topo.dihedrals[torsion].tolist()
+        for (i, j, kk, l), kphi, period, phi0 in zip(atoms, k.tolist(), n.tolist(), delta.tolist()):
+            rows.append((i, j, kk, l, intern(params, (phi0 * (3.14159 / 180.0), kphi, period))))
+    tables['dihedral'] = (rows, list(params))
+    return tables
+
+# Hex layouts: atom / parameter indices are 16-bit fields, parameters Q16.16
+TERM_LAYOUTS = {
+    'bond':     ("hhh",   "qq"),    # {i, j, pid}          | {r0, kb}
+    'angle':    ("hhhh",  "qq"),    # {i, j, k, pid}       | {theta0, k_theta}
+    'dihedral': ("hhhhh", "qqn"),   # {i, j, k, l, pid}    | {phi0, k_phi, n}
+}
+
+def compile_bonded_tables(ff, topo, prefix=""):
+    """Writes <prefix>{bond,angle,dihedral}_{terms,params}.hex for the real bonded terms."""
+    tables = bonded_tables(ff, topo)
+    for kind, (rows, params) in tables.items():
+        term_layout, param_layout = TERM_LAYOUTS[kind]
+        for suffix, data, layout in (("terms", rows, term_layout), ("params", params, param_layout)):
+            with open(f"{prefix}{kind}_{suffix}.hex", 'w') as f:
+                for line in encode_rows(data, layout) if data else []:
+                    f.write(f"{line}\n")
+    return tables
+
+# ==============================================================================
+# 3. NON-BONDED EXCLUSIONS AND 1-4 PAIRS
+# ==============================================================================
+# S_NB_INNER evaluates every j >= i + 3 pair, which only matches the bond graph
+# for an unbranched chain: HN/HA/CB/O branches put 1-2 and 1-3 neighbours three
+# or more indices apart (so they get full LJ + Coulomb), while real non-bonded
+# pairs closer than three indices are never seen. CHARMM excludes 1-2 and 1-3
+# pairs outright and evaluates 1-4 pairs with the 1-4 LJ parameters of the .prm
+# (Eps14 / Rmin14/2 where given) and electrostatics scaled by e14fac (1.0 for
+# CHARMM36). Both are read off the Topology graph here and emitted as
+#   mask   : one row per atom i, two W-bit masks (excluded, 1-4) over
+#            j = i + 1 .. i + W, bit k <-> j = i + 1 + k, W a multiple of 16;
+#            the scheduler tests one bit per (nb_i, nb_j) instead of a list
+#   lists  : {i, j} exclusions and {i, j} + precombined 1-4 rows in
+#            NONBONDED_PAIR_ROW order ({KC*q_i*q_j*e14fac, Sig^2, 24*Eps})
+E14FAC = 1.0
+NORMAL, EXCLUDED, PAIR14 = 0, 1, 2
+MASK_LAYOUT_FIELD = "h"  # masks are split into 16-bit fields, most significant first
+
+def lj14_params(ff, t1, t2):
+    """(Emin, Rmin) of a 1-4 pair: NBFIX, else Lorentz-Berthelot of the 1-4 (or normal) values."""
+    key = tuple(sorted((t1, t2)))
+    if key in ff.nbfix: return ff.nbfix[key]
+    e1, r1 = ff.nonbonded14.get(t1, ff.nonbonded.get(t1, (0.0, 0.0)))
+    e2, r2 = ff.nonbonded14.get(t2, ff.nonbonded.get(t2, (0.0, 0.0)))
+    return np.sqrt(e1 * e2), r1 + r2
+
+class NonbondedExclusions:
+    def __init__(self, topo, e14fac=E14FAC):
+        self.n = len(topo.atoms)
+        self.excluded = topo.exclusions()
+        self.pairs14 = topo.pairs14()
+        self.e14fac = e14fac
+        self._topo = topo
+
+        # Sorted pair keys for vectorised lookups: key = i * n + j (i < j)
+        keys = np.concatenate([self.excluded[:, 0] * self.n + self.excluded[:, 1],
+                               self.pairs14[:, 0] * self.n + self.pairs14[:, 1]])
+        codes = np.concatenate([np.full(len(self.excluded), EXCLUDED), np.full(len(self.pairs14), PAIR14)])
+        order = np.argsort(keys)
+        self._keys, self._codes = keys[order], codes[order]
+
+    # --- Software model side ------------------------------------------------
+    def classify(self, pair_i, pair_j):
+        """NORMAL / EXCLUDED / PAIR14 per pair (either index order)."""
+        pair_i, pair_j = np.asarray(pair_i, dtype=np.int64), np.asarray(pair_j, dtype=np.int64)
+        key = np.minimum(pair_i, pair_j) * self.n + np.maximum(pair_i, pair_j)
+        pos = np.minimum(np.searchsorted(self._keys, key), max(len(self._keys) - 1, 0))
+        hit = (self._keys[pos] == key) if len(self._keys) else np.zeros(key.shape, dtype=bool)
+        return np.where(hit, self._codes[pos] if len(self._keys) else 0, NORMAL)
+
+    def filter(self, pair_i, pair_j):
+        """Drops excluded pairs from a pair list (e.g. VerletList.pair_i / pair_j); returns (i, j, is_14)."""
+        code = self.classify(pair_i, pair_j)
+        keep = code != EXCLUDED
+        return np.asarray(pair_i)[keep], np.asarray(pair_j)[keep], code[keep] == PAIR14
+
+    def coefficients14(self, ff):
+        """(pairs14, 3) float rows {KC*q_i*q_j*e14fac, Sig^2, 24*Eps} with the 1-4 LJ parameters."""
+        topo = self._topo
+        rows = []
+        for i, j in self.pairs14.tolist():
+            emin, rmin = lj14_params(ff, topo.types[i], topo.types[j])
+            rows.append((self.e14fac * (KC / 65536.0) * topo.charges[i] * topo.charges[j],
+                         (rmin * 0.8908987) ** 2, emin * 24.0))
+        return np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+    # --- Scheduler side -----------------------------------------------------
+    def window(self):
+        """Mask width W: the largest j - i of any excluded or 1-4 pair, rounded up to 16."""
+        span = (self._keys % self.n - self._keys // self.n).max(initial=1)
+        return int(-(-span // 16) * 16)
+
+    def masks(self, width=None):
+        """(n, W) bool arrays (excluded, 1-4); column k is j = i + 1 + k."""
+        width = width or self.window()
+        masks = []
+        for pairs in (self.excluded, self.pairs14):
+            bits = np.zeros((self.n, width), dtype=bool)
+            offset = pairs[:, 1] - pairs[:, 0] - 1
+            if (offset >= width).any(): raise ValueError(f"pair span {offset.max() + 1} exceeds mask width {width}")
+            bits[pairs[:, 0], offset] = True
+            masks.append(bits)
+        return masks
+
+    def write(self, ff, prefix=""):
+        """
+        Writes <prefix>nb_exclusion_mask.hex (one row per atom), <prefix>nb_exclusions.hex
+        ({i, j}) and <prefix>nb_pairs14.hex ({i, j} + 1-4 coefficient row).
+        """
+        width = self.window()
+        weights = 1 << np.arange(15, -1, -1)
+        fields = [(bits[:, ::-1].reshape(self.n, -1, 16) * weights).sum(axis=2) for bits in self.masks(width)]
+        images = {
+            'nb_exclusion_mask': (np.hstack(fields), MASK_LAYOUT_FIELD * (2 * width // 16)),
+            'nb_exclusions': (self.excluded, "hh"),
+            'nb_pairs14': (np.column_stack([self.pairs14, self.coefficients14(ff)]), "hh" + NONBONDED_PAIR_ROW),
+        }
+        for name, (rows, layout) in images.items():
+            with open(f"{prefix}{name}.hex", 'w') as f:
+                for line in encode_rows(rows, layout) if len(rows) else []:
+                    f.write(f"{line}\n")
+        return width
+
+    # --- Comparison with the RTL loop -----------------------------------------
+    def rtl_loop_report(self, num_atoms=None, min_separation=3):
+        """
+        How the j >= i + min_separation rule of S_NB_INNER lines up with the bond
+        graph over the first num_atoms atoms (default: all).
+        """
+        n = num_atoms or self.n
+        i, j = np.triu_indices(n, k=1)
+        code = self.classify(i, j)
+        fed = (j - i) >= min_separation
+        return {'atoms': n, 'rtl_pairs': int(fed.sum()),
+                'wasted': int((fed & (code == EXCLUDED)).sum()),     # 1-2 / 1-3 pairs fed anyway
+                'unscaled14': int((fed & (code == PAIR14)).sum()),   # 1-4 pairs with normal LJ
+                'missed': int((~fed & (code != EXCLUDED)).sum()),    # real pairs never fed
+                'needed': int((code != EXCLUDED).sum()),
+                'mask_bits': 2 * n * self.window(),
+                'list_bits': 32 * int((self.excluded[:, 1] < n).sum())
+                             + (32 + 96) * int((self.pairs14[:, 1] < n).sum())}
+
+def compile_nonbonded_exclusions(ff, topo, prefix=""):
+    """Exclusion mask and pair-list images for the non-bonded phase."""
+    excl = NonbondedExclusions(topo)
+    width = excl.write(ff, prefix)
+    print(f"  exclusions: {len(excl.excluded)} 1-2/1-3 pairs, {len(excl.pairs14)} 1-4 pairs, mask width {width}")
+    return excl
+
+# ==============================================================================
+# 4. EXECUTION (Real Terms vs the Linear Sliding Window)
+# ==============================================================================
+if __name__ == "__main__":
+    from ff_cache import load_cached
+    from forcefield import ForceField
+
+    ff = ForceField()
+    load_cached(ff, "top_all36_prot.rtf", "par_all36_prot.prm")
+
+    sequence = ['ALA', 'GLY', 'SER', 'LEU', 'LYS']
+    topo = Topology.from_residues(ff, sequence)
+    tables = compile_bonded_tables(ff, topo)
+
+    n_atoms = len(topo.atoms)
+    print(f"{'-'.join(sequence)}: {n_atoms} atoms")
+    print(f"  sliding window : {n_atoms - 3} rows x (1 bond + 1 angle + 1 dihedral)")
+    for kind, (rows, params) in tables.items():
+        print(f"  {kind:9s}: {len(rows):4d} terms, {len(params):3d} unique parameter sets")
+
+    # Non-bonded pairs: the j >= i + 3 rule of S_NB_INNER vs the bond graph
+    excl = compile_nonbonded_exclusions(ff, topo)
+    for n in (10, 62, n_atoms):
+        r = excl.rtl_loop_report(min(n, n_atoms))
+        print(f"  first {r['atoms']:3d} atoms: S_NB_INNER feeds {r['rtl_pairs']:5d} pairs, {r['wasted']:4d} of them "
+              f"1-2/1-3 and {r['unscaled14']:4d} 1-4 at full strength; misses {r['missed']:3d} of "
+              f"{r['needed']} real pairs")
+    print(f"  mask image {r['mask_bits'] / 8:.0f} bytes, pair lists {r['list_bits'] / 8:.0f} bytes")
@@ -0,0 +1,135 @@
+import os
+import time
+
+import numpy as np
+
+# ==============================================================================
+# 1. BINARY TRAJECTORY FORMAT (.btrj)
+# ==============================================================================
+# Little-endian, written by test/tb.v (+TRAJ=<file>) or TrajectoryWriter:
+#   header : 'BTRJ', u32 version, u32 num_atoms, u32 reserved      (16 bytes)
+#   frame  : u32 iteration, i32 step_size (Q16.16),
+#            num_atoms x {i32 x, i32 y, i32 z} Q16.16 atom_regfile words
+# iteration is iter_count after the frame's update, step_size the step that
+# produced it. Frames are fixed-size records, so the file maps straight onto a
+# structured array and frames['coords'] is a zero-copy (frames, atoms, 3) view.
+TRAJ_MAGIC = b"BTRJ"
+TRAJ_VERSION = 1
+TRAJ_HEADER = np.dtype([('magic', 'S4'), ('version', '<u4'), ('num_atoms', '<u4'), ('reserved', '<u4')])
+
+def frame_dtype(num_atoms):
+    return np.dtype([('iteration', '<u4'), ('step_size', '<i4'), ('coords', '<i4', (num_atoms, 3))])
+
+class TrajectoryWriter:
+    def __init__(self, filename, num_atoms):
+        self.num_atoms = num_atoms
+        self.dtype = frame_dtype(num_atoms)
+        self.file = open(filename, 'wb')
+        header = np.zeros(1, dtype=TRAJ_HEADER)
+        header[0] = (TRAJ_MAGIC, TRAJ_VERSION, num_atoms, 0)
+        header.tofile(self.file)
+
+    def write(self, coords, iteration, step_size=0):
+        """Appends one (num_atoms, 3) frame of Q16.16 words."""
+        self.write_frames(np.asarray(coords)[None], [iteration], [step_size])
+
+    def write_frames(self, coords, iterations, step_sizes):
+        """Appends a (frames, num_atoms, 3) block in one write."""
+        coords = np.asarray(coords)
+        block = np.empty(len(coords), dtype=self.dtype)
+        block['iteration'] = iterations
+        block['step_size'] = step_sizes
+        block['coords'] = coords.astype(np.int64).astype(np.int32) # Two's-complement wrap like the regfile
+        block.tofile(self.file)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ==============================================================================
+# 2. MEMORY-MAPPED READER
+# ==============================================================================
+def open_trajectory(filename):
+    """
+    Maps a .btrj file read-only. Returns the structured frame array: fields
+    'iteration', 'step_size' and 'coords' ((frames, atoms, 3) int32, Q16.16).
+    A partly written last frame (simulation still running) is left out.
+    """
+    header = np.fromfile(filename, dtype=TRAJ_HEADER, count=1)
+    if len(header) == 0 or header[0]['magic'] != TRAJ_MAGIC:
+        raise ValueError(f"{filename}: not a BTRJ trajectory")
+    if header[0]['version'] != TRAJ_VERSION:
+        raise ValueError(f"{filename}: unsupported BTRJ version {header[0]['version']}")
+
+    dtype = frame_dtype(int(header[0]['num_atoms']))
+    n_frames = (os.path.getsize(filename) - TRAJ_HEADER.itemsize) // dtype.itemsize
+    if n_frames == 0: return np.zeros(0, dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode='r', offset=TRAJ_HEADER.itemsize, shape=(n_frames,))
+
+def load_coordinates(filename):
+    """(frames, atoms, 3) coordinates in Angstrom."""
+    return open_trajectory(filename)['coords'] / 65536.0
+
+def log_to_trajectory(log_file, output_filename):
+    """
+    Converts a sim_output-style text log (streamed with visualize_md). Text logs
+    carry neither iteration numbers nor step sizes, so frames are numbered in
+    file order with step_size 0.
+    """
+    from visualize_md import iter_frames
+
+    writer, count = None, 0
+    for _, coords in iter_frames(log_file):
+        if writer is None: writer = TrajectoryWriter(output_filename, len(coords))
+        writer.write(np.trunc(coords * 65536.0), count)
+        count += 1
+    if writer: writer.close()
+    print(f"Successfully converted {count} frames from {log_file} to {output_filename}")
+    return count
+
+# ==============================================================================
+# 3. BENCHMARK (Text Log vs Binary: Size and Load Time)
+# ==============================================================================
+def benchmark(num_atoms=62, n_frames=20000, seed=0):
+    from visualize_md import read_trajectory
+
+    rng = np.random.default_rng(seed)
+    walk = np.cumsum(rng.integers(-0x800, 0x800, (n_frames, num_atoms, 3)), axis=0)
+    words = (walk + rng.integers(-0x40000, 0x40000, (1, num_atoms, 3))).astype(np.int32)
+    steps = (0x200 * 0.9375 ** np.arange(n_frames)).astype(np.int32)
+
+    text_file, bin_file = "traj_bench.txt", "traj_bench.btrj"
+    with open(text_file, 'w') as f:
+        for k, frame in enumerate(words / 65536.0):
+            f.write(f"--- ITER {k + 1} COORDINATES ---\n")
+            f.writelines(f"Atom {i}: X={x:8.4f}, Y={y:8.4f}, Z={z:8.4f}\n" for i, (x, y, z) in enumerate(frame))
+    with TrajectoryWriter(bin_file, num_atoms) as writer:
+        writer.write_frames(words, np.arange(1, n_frames + 1), steps)
+
+    t0 = time.perf_counter()
+    text_frames, _, _ = read_trajectory(text_file)
+    t_text = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    frames = open_trajectory(bin_file)
+    checksum = int(frames['coords'].sum(dtype=np.int64)) # Touch every word
+    t_bin = time.perf_counter() - t0
+
+    assert np.array_equal(frames['coords'], words) and checksum == int(words.sum(dtype=np.int64))
+    assert np.abs(text_frames - words / 65536.0).max() < 1e-4 # 4 printed decimals
+    size_text, size_bin = os.path.getsize(text_file), os.path.getsize(bin_file)
+    print(f"{n_frames} frames x {num_atoms} atoms")
+    print(f"  text log : {size_text / 1e6:8.2f} MB, parsed in {t_text * 1e3:9.1f} ms")
+    print(f"  btrj     : {size_bin / 1e6:8.2f} MB, mapped in {t_bin * 1e3:9.1f} ms "
+          f"({size_text / size_bin:.1f}x smaller, {t_text / t_bin:.0f}x faster)")
+    del frames
+    os.remove(text_file)
+    os.remove(bin_file)
+
+if __name__ == "__main__":
+    benchmark()
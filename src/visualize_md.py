@@ -1,85 +1,185 @@
-import matplotlib.pyplot as plt
 import re
+import time
 
-def parse_coordinates(filename):
-    initial_coords = []
-    final_coords = []
-    current_list = None
+import numpy as np
+
+# ==============================================================================
+# 1. STREAMING LOG READER
+# ==============================================================================
+# $display logs of long minimization runs can reach gigabytes, so lines are read
+# in chunks and coordinate frames go straight into NumPy buffers. A log that the
+# simulator is still writing can be followed like `tail -f`.
+ATOM_LINE = re.compile(r'Atom\s+(\d+):\s*X=\s*([-\d.]+),\s*Y=\s*([-\d.]+),\s*Z=\s*([-\d.]+)')
+METRIC_LINE = re.compile(r'\[ITER\s+(\d+)\]\s*Metric[^:]*:\s*([-\d.eE+]+)')
 
+def iter_log_lines(filename, follow=False, poll=0.5, timeout=None, chunk_size=1 << 20):
+    """
+    Yields complete lines of a log. With follow=True it keeps polling for
+    appended data and stops after `timeout` seconds without growth (None =
+    wait forever). A partial last line is held back until its newline
+    arrives, or until the file has been idle for a whole poll: $display
+    writes whole lines, so one left unterminated that long is the last line
+    of a finished log (sim_output3.txt ends without a newline).
+    """
     with open(filename, 'r') as f:
-        for line in f:
-            if "INITIAL COORDINATES" in line:
-                current_list = initial_coords
-            elif "FINAL COORDINATES" in line:
-                current_list = final_coords
-            elif "Atom" in line and current_list is not None:
-                # Regex to extract X, Y, Z floating point numbers
-                match = re.search(r'X=\s*([-\d.]+),\s*Y=\s*([-\d.]+),\s*Z=\s*([-\d.]+)', line)
-                if match:
-                    x, y, z = map(float, match.groups())
-                    current_list.append((x, y, z))
-                    
+        pending, idle = '', 0.0
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk:
+                idle = 0.0
+                lines = (pending + chunk).split('\n')
+                pending = lines.pop()
+                yield from lines
+                continue
+            if not follow: break
+            if pending and idle > 0:
+                yield pending # Idle for a whole poll: the log's unterminated last line
+                pending = ''
+            if timeout is not None and idle >= timeout: break
+            time.sleep(poll)
+            idle += poll
+        if pending: yield pending
+
+def iter_records(filename, follow=False, **kwargs):
+    """
+    Yields ('frame', label, coords) for every coordinate block -- a header line
+    containing 'COORDINATES' (INITIAL, FINAL or a per-iteration dump) followed
+    by 'Atom i: X=.., Y=.., Z=..' lines, coords an (atoms, 3) float64 array --
+    and ('metric', iteration, value) for every '[ITER k] Metric ...' line.
+    When following a live log, reading stops once the FINAL block is complete:
+    at the first line after it, or as soon as it holds as many atoms as the
+    first block did.
+    """
+    label, rows, num_atoms = None, [], None
+    for line in iter_log_lines(filename, follow=follow, **kwargs):
+        if "COORDINATES" in line:
+            if rows:
+                yield 'frame', label, np.array(rows)
+                if num_atoms is None: num_atoms = len(rows)
+            label, rows = line.strip(' -\r'), []
+            continue
+
+        match = ATOM_LINE.search(line) if label is not None and "Atom" in line else None
+        if match:
+            rows.append(tuple(map(float, match.groups()[1:])))
+            if follow and label.startswith("FINAL") and len(rows) == num_atoms:
+                yield 'frame', label, np.array(rows)
+                return
+            continue
+        if rows:
+            yield 'frame', label, np.array(rows)
+            if num_atoms is None: num_atoms = len(rows)
+            if follow and label.startswith("FINAL"): return
+            label, rows = None, []
+
+        match = METRIC_LINE.search(line) if "Metric" in line else None
+        if match: yield 'metric', int(match.group(1)), float(match.group(2))
+    if rows: yield 'frame', label, np.array(rows)
+
+def iter_frames(filename, follow=False, **kwargs):
+    """(label, coords) for every coordinate block, see iter_records()."""
+    for kind, label, coords in iter_records(filename, follow=follow, **kwargs):
+        if kind == 'frame': yield label, coords
+
+def read_trajectory(filename, follow=False, capacity=64, **kwargs):
+    """
+    Collects every frame into one preallocated (frames, atoms, 3) array (grown
+    by doubling). Returns (frames, labels, metrics) where metrics holds the
+    per-iteration '[ITER k] Metric' values, indexed by k.
+    """
+    frames, labels, count, metrics = None, [], 0, {}
+    for kind, label, value in iter_records(filename, follow=follow, **kwargs):
+        if kind == 'metric':
+            metrics[label] = value
+            continue
+        if frames is None:
+            frames = np.empty((capacity, len(value), 3))
+        elif count == len(frames):
+            frames = np.concatenate([frames, np.empty_like(frames)])
+        if len(value) != frames.shape[1]:
+            raise ValueError(f"{label}: {len(value)} atoms, expected {frames.shape[1]}")
+        frames[count] = value
+        labels.append(label)
+        count += 1
+
+    if frames is None: frames = np.empty((0, 0, 3))
+    metric_array = np.full(max(metrics, default=-1) + 1, np.nan)
+    metric_array[list(metrics)] = list(metrics.values())
+    return frames[:count], labels, metric_array
+
+def parse_coordinates(filename):
+    """INITIAL and FINAL blocks as lists of (x, y, z) tuples."""
+    initial_coords, final_coords = [], []
+    for label, coords in iter_frames(filename):
+        if label.startswith("INITIAL"): initial_coords = [tuple(c) for c in coords.tolist()]
+        elif label.startswith("FINAL"): final_coords = [tuple(c) for c in coords.tolist()]
     return initial_coords, final_coords
 
-# Read the data from your Verilog log
-initial, final = parse_coordinates('sim_output.txt')
-
-if not initial or not final:
-    print("Could not find coordinate data. Make sure you saved the terminal output to 'sim_output.txt'!")
-    exit()
-
-# Setup 3D Plot
-fig = plt.figure(figsize=(10, 8))
-ax = fig.add_subplot(111, projection='3d')
-
-# Unpack coordinates
-ix, iy, iz = zip(*initial)
-fx, fy, fz = zip(*final)
-
-# Plot Initial (Red Dots) and Final (Blue Stars)
-ax.scatter(ix, iy, iz, c='red', s=50, label='Initial (T=0)', alpha=0.5)
-ax.scatter(fx, fy, fz, c='blue', marker='o', s=80, label='Final (T=5)')
-
-# ==========================================
-# NEW: DRAW THE CHEMICAL BONDS
-# ==========================================
-# List of (Atom A, Atom B) indices that share a chemical bond
-bonds = [
-    (0, 1), # N  - HN
-    (0, 2), # N  - CA
-    (2, 3), # CA - HA
-    (2, 4), # CA - CB
-    (2, 5), # CA - C
-    (5, 6), # C  - O
-    (5, 7), # C  - N  (The Peptide Bond bridging the two amino acids!)
-    (7, 8), # N  - HN
-    (7, 9)  # N  - CA
-]
-
-# Draw Initial Bonds (Faint Red)
-for (atom1, atom2) in bonds:
-    ax.plot([ix[atom1], ix[atom2]], 
-            [iy[atom1], iy[atom2]], 
-            [iz[atom1], iz[atom2]], 
-            color='red', alpha=0.3, linewidth=2)
-
-# Draw Final Bonds (Solid Blue)
-for (atom1, atom2) in bonds:
-    ax.plot([fx[atom1], fx[atom2]], 
-            [fy[atom1], fy[atom2]], 
-            [fz[atom1], fz[atom2]], 
-            color='blue', alpha=0.8, linewidth=3)
-# ==========================================
-
-# Draw arrows showing the displacement path of each atom (optional, faint)
-for i in range(len(initial)):
-    ax.plot([ix[i], fx[i]], [iy[i], fy[i]], [iz[i], fz[i]], 'k:', alpha=0.3)
-    # Add atom labels slightly offset from the final positions
-    ax.text(fx[i], fy[i], fz[i], f"  A{i}", size=9, zorder=1, color='k')
-
-ax.set_title("Hardware Minimization: Alanine Dipeptide Structure")
-ax.set_xlabel("X (Å)")
-ax.set_ylabel("Y (Å)")
-ax.set_zlabel("Z (Å)")
-ax.legend()
-plt.show()
\ No newline at end of file
+# ==============================================================================
+# 2. PLOT (Initial vs Final Structure)
+# ==============================================================================
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    # Read the data from your Verilog log
+    initial, final = parse_coordinates('sim_output.txt')
+
+    if not initial or not final:
+        print("Could not find coordinate data. Make sure you saved the terminal output to 'sim_output.txt'!")
+        exit()
+
+    # Setup 3D Plot
+    fig = plt.figure(figsize=(10, 8))
+    ax = fig.add_subplot(111, projection='3d')
+
+    # Unpack coordinates
+    ix, iy, iz = zip(*initial)
+    fx, fy, fz = zip(*final)
+
+    # Plot Initial (Red Dots) and Final (Blue Stars)
+    ax.scatter(ix, iy, iz, c='red', s=50, label='Initial (T=0)', alpha=0.5)
+    ax.scatter(fx, fy, fz, c='blue', marker='o', s=80, label='Final (T=5)')
+
+    # ==========================================
+    # NEW: DRAW THE CHEMICAL BONDS
+    # ==========================================
+    # List of (Atom A, Atom B) indices that share a chemical bond
+    bonds = [
+        (0, 1), # N  - HN
+        (0, 2), # N  - CA
+        (2, 3), # CA - HA
+        (2, 4), # CA - CB
+        (2, 5), # CA - C
+        (5, 6), # C  - O
+        (5, 7), # C  - N  (The Peptide Bond bridging the two amino acids!)
+        (7, 8), # N  - HN
+        (7, 9)  # N  - CA
+    ]
+
+    # Draw Initial Bonds (Faint Red)
+    for (atom1, atom2) in bonds:
+        ax.plot([ix[atom1], ix[atom2]],
+                [iy[atom1], iy[atom2]],
+                [iz[atom1], iz[atom2]],
+                color='red', alpha=0.3, linewidth=2)
+
+    # Draw Final Bonds (Solid Blue)
+    for (atom1, atom2) in bonds:
+        ax.plot([fx[atom1], fx[atom2]],
+                [fy[atom1], fy[atom2]],
+                [fz[atom1], fz[atom2]],
+                color='blue', alpha=0.8, linewidth=3)
+    # ==========================================
+
+    # Draw arrows showing the displacement path of each atom (optional, faint)
+    for i in range(len(initial)):
+        ax.plot([ix[i], fx[i]], [iy[i], fy[i]], [iz[i], fz[i]], 'k:', alpha=0.3)
+        # Add atom labels slightly offset from the final positions
+        ax.text(fx[i], fy[i], fz[i], f"  A{i}", size=9, zorder=1, color='k')
+
+    ax.set_title("Hardware Minimization: Alanine Dipeptide Structure")
+    ax.set_xlabel("X (Å)")
+    ax.set_ylabel("Y (Å)")
+    ax.set_zlabel("Z (Å)")
+    ax.legend()
+    plt.show()
@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: © 2024 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles, FallingEdge
+
+# run_bench puts src/ on sys.path
+from run_bench import DEFAULT_ATOMS, DEFAULT_ITERS, SHAPES, clock_period_ns, molecule
+from golden_model import phase_schedule, to_q16
+
+# Toplevel is md_system_top (see run_bench.py); the sweep comes from the runner
+ATOMS = [int(a) for a in os.environ.get("BENCH_ATOMS", ",".join(map(str, DEFAULT_ATOMS))).split(",")]
+BENCH_SHAPES = os.environ.get("BENCH_SHAPES", ",".join(SHAPES)).split(",")
+ITERS = int(os.environ.get("BENCH_ITERS", str(DEFAULT_ITERS)))
+BENCH_OUT = os.environ.get("BENCH_OUT", "bench_runs.jsonl")
+CLOCK_NS = clock_period_ns()
+
+def phase_of(state):
+    """S_IDLE -> None, S_ITER_START, S_BND_* (2-7), S_NB_* (8-13), S_APPLY_* (14-16)."""
+    if state == 0: return None
+    if state == 1: return 'iter_start'
+    if state <= 7: return 'bonded'
+    if state <= 13: return 'nonbonded'
+    return 'apply'
+
+
+async def load_atoms(dut, words):
+    """Writes (n, 3) Q16.16 words into atom_regfile through the load port."""
+    for i, (x, y, z) in enumerate(words.tolist()):
+        await FallingEdge(dut.clk)
+        dut.load_en.value = 1
+        dut.load_addr.value = i
+        dut.load_x.value, dut.load_y.value, dut.load_z.value = x, y, z
+    await FallingEdge(dut.clk)
+    dut.load_en.value = 0
+
+
+@cocotb.test()
+@cocotb.parametrize(num_atoms=ATOMS, shape=BENCH_SHAPES)
+async def bench_phases(dut, num_atoms, shape):
+    """Cycles per FSM phase and non_bonded_pipeline occupancy for one sweep point."""
+    cocotb.start_soon(Clock(dut.clk, CLOCK_NS, unit="ns").start())
+    dut.start_run.value = 0
+    dut.load_en.value = 0
+    dut.load_res_id.value = 0
+    dut.load_atom_idx.value = 0
+    dut.max_iters.value = ITERS
+    dut.num_atoms.value = num_atoms
+    dut.rst_n.value = 0
+    await ClockCycles(dut.clk, 10)
+    dut.rst_n.value = 1
+    await load_atoms(dut, to_q16(molecule(shape, num_atoms)))
+
+    dut.start_run.value = 1
+    await FallingEdge(dut.clk)
+    dut.start_run.value = 0 # S_IDLE restarts while start_run is high
+
+    # Sample every cycle; stamp the first cycle of every phase
+    expected = phase_schedule(num_atoms)['total'] * ITERS
+    cycles = {p: 0 for p in ('iter_start', 'bonded', 'nonbonded', 'apply')}
+    valid_in = inflight = 0
+    transitions, stamp, previous, t = [], None, None, 0
+    while True:
+        phase = phase_of(dut.state.value.to_unsigned())
+        if phase is None: break
+        if phase != previous:
+            if phase == 'iter_start':
+                stamp = {}
+                transitions.append(stamp)
+            stamp[phase] = t
+            previous = phase
+        cycles[phase] += 1
+        if phase == 'nonbonded':
+            valid_in += dut.nb_valid_in.value.to_unsigned()
+            inflight += dut.nb_inflight.value.to_unsigned()
+        await FallingEdge(dut.clk)
+        t += 1
+        assert t <= 2 * expected, f"no done after {t} cycles (expected {expected})"
+    for i, stamp in enumerate(transitions):
+        stamp['end'] = transitions[i + 1]['iter_start'] if i + 1 < len(transitions) else t
+
+    cycles.update(total=t, nb_valid_in_cycles=valid_in, nb_inflight_sum=inflight)
+    with open(BENCH_OUT, "a") as f:
+        f.write(json.dumps({'atoms': num_atoms, 'shape': shape, 'iterations': ITERS,
+                            'cycles': cycles, 'transitions': transitions}) + "\n")
+    dut._log.info(f"{num_atoms} atoms, {shape}: {t} cycles for {ITERS} iterations, {cycles}")
+
+    assert dut.done.value == 1 and len(transitions) == ITERS
+    model = phase_schedule(num_atoms)
+    for key in cycles:
+        assert cycles[key] == model[key] * ITERS, (f"{key}: {cycles[key]} cycles, schedule says "
+                                                   f"{model[key] * ITERS} (FSM throughput changed)")
@@ -0,0 +1,174 @@
+# SPDX-FileCopyrightText: © 2024 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(TEST_DIR, "..", "src")
+sys.path.insert(0, SRC_DIR)
+from golden_model import NB_LATENCY, phase_schedule  # noqa: E402
+
+# ==============================================================================
+# 1. SWEEP POINTS (Atom Counts x Molecule Shapes)
+# ==============================================================================
+# project.v hard-wires num_atoms = 10, so the benchmark drives md_system_top
+# directly. nb_i / nb_j are 6 bits and S_NB_DRAIN hangs at 63 atoms, so 62 is
+# the largest count that finishes.
+DEFAULT_ATOMS = [4, 8, 10, 16, 32, 48, 62]
+DEFAULT_ITERS = 2
+PHASES = ('iter_start', 'bonded', 'nonbonded', 'apply')
+
+def _chain(n, rng):
+    return np.column_stack([1.5 * np.arange(n), np.zeros(n), np.zeros(n)])
+
+def _zigzag(n, rng):
+    return np.column_stack([1.25 * np.arange(n), 0.85 * (np.arange(n) % 2), np.zeros(n)])
+
+def _helix(n, rng):
+    # alpha-helix-like: 100 degrees and 1.5 A rise per atom on a 2.3 A radius
+    t = np.radians(100.0) * np.arange(n)
+    return np.column_stack([2.3 * np.cos(t), 2.3 * np.sin(t), 1.5 * np.arange(n)])
+
+def _globule(n, rng):
+    # Random walk with 1.5 A steps: a compact, irregular 3-D coil
+    steps = rng.normal(size=(n, 3))
+    steps *= 1.5 / np.linalg.norm(steps, axis=1, keepdims=True)
+    steps[0] = 0.0
+    return np.cumsum(steps, axis=0)
+
+SHAPES = {'chain': _chain, 'zigzag': _zigzag, 'helix': _helix, 'globule': _globule}
+
+def molecule(shape, num_atoms, seed=0):
+    """(num_atoms, 3) Angstrom, centred on the origin."""
+    xyz = SHAPES[shape](num_atoms, np.random.default_rng(seed))
+    return xyz - xyz.mean(axis=0)
+
+# ==============================================================================
+# 2. CLOCK AND SOURCES (Shared with the Tiny Tapeout Flow)
+# ==============================================================================
+def clock_period_ns(config=os.path.join(SRC_DIR, "config.json")):
+    """CLOCK_PERIOD (ns) from the hardening config."""
+    with open(config, 'r') as f:
+        return float(json.load(f)["CLOCK_PERIOD"])
+
+def core_sources(makefile=os.path.join(TEST_DIR, "Makefile")):
+    """PROJECT_SOURCES of the cocotb Makefile without the project.v wrapper."""
+    with open(makefile, 'r') as f:
+        text = f.read().replace("\\\n", " ")
+    names = re.search(r"^PROJECT_SOURCES\s*=(.*)$", text, re.M).group(1).split()
+    return [os.path.join(SRC_DIR, name) for name in names if name != "project.v"]
+
+# ==============================================================================
+# 3. REPORT ROWS
+# ==============================================================================
+def report_row(num_atoms, shape, iterations, clock_ns, measured=None):
+    """
+    One report row. Cycle counts are per iteration; without a measurement
+    (model-only sweep) they come from golden_model.phase_schedule.
+    nb_occupancy is the fraction of S_NB_* cycles with nb_valid_in high, i.e.
+    how full non_bonded_pipeline's NB_LATENCY stages are on average;
+    nb_mean_inflight is the mean of the nb_inflight counter over S_NB_*.
+    """
+    model = phase_schedule(num_atoms)
+    totals = measured or {k: v * iterations for k, v in model.items()}
+    per_iter = {p: totals[p] / iterations for p in PHASES}
+    cycles = sum(per_iter.values())
+    row = {'atoms': num_atoms, 'shape': shape, 'iterations': iterations,
+           'source': 'rtl' if measured else 'model'}
+    row.update({f"cycles_{p}": per_iter[p] for p in PHASES})
+    row['cycles_per_iteration'] = cycles
+    row.update({f"pct_{p}": 100.0 * per_iter[p] / cycles for p in PHASES[1:]})
+    row['nb_pairs'] = model['nb_pairs']
+    row['nb_occupancy'] = totals['nb_valid_in_cycles'] / max(totals['nonbonded'], 1)
+    row['nb_mean_inflight'] = totals['nb_inflight_sum'] / max(totals['nonbonded'], 1)
+    row['us_per_iteration'] = cycles * clock_ns * 1e-3
+    row['atom_iterations_per_s'] = num_atoms / (cycles * clock_ns * 1e-9)
+    row['matches_model'] = all(totals[k] == model[k] * iterations for k in model if k != 'nb_pairs')
+    return row
+
+def write_report(rows, prefix, clock_ns, transitions=None):
+    """<prefix>.csv (one row per sweep point) and <prefix>.json (rows, clock, transition stamps)."""
+    with open(f"{prefix}.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(f"{prefix}.json", 'w') as f:
+        json.dump({'clock_period_ns': clock_ns, 'nb_latency': NB_LATENCY, 'runs': rows,
+                   'transitions': transitions or {}}, f, indent=1)
+
+def print_report(rows, clock_ns):
+    print(f"{'atoms':>5} {'shape':>8} {'src':>5} {'bonded':>8} {'nonbond':>8} {'apply':>6} {'cyc/iter':>9} "
+          f"{'nb occ':>7} {'inflight':>8} {'atom-it/s':>10}  @ {1e3 / clock_ns:g} MHz")
+    for r in rows:
+        print(f"{r['atoms']:5d} {r['shape']:>8} {r['source']:>5} {r['cycles_bonded']:8.0f} "
+              f"{r['cycles_nonbonded']:8.0f} {r['cycles_apply']:6.0f} {r['cycles_per_iteration']:9.0f} "
+              f"{r['nb_occupancy']:7.3f} {r['nb_mean_inflight']:8.2f} {r['atom_iterations_per_s']:10.0f}"
+              f"{'' if r['matches_model'] else '  (differs from golden_model schedule)'}")
+
+# ==============================================================================
+# 4. COCOTB RUNNER (Icarus by Default)
+# ==============================================================================
+def run_simulation(atoms, shapes, iterations, sim="icarus", build_dir=None, waves=False):
+    """
+    Builds md_system_top and runs the parametrized bench.py test for every
+    (atoms, shape) point. Returns the per-run records written by bench.py.
+    """
+    from cocotb_tools.runner import get_runner
+
+    build_dir = build_dir or os.path.join(TEST_DIR, "sim_build", "bench")
+    results = os.path.join(build_dir, "bench_runs.jsonl")
+    runner = get_runner(sim)
+    runner.build(sources=core_sources(), hdl_toplevel="md_system_top", build_dir=build_dir,
+                 includes=[SRC_DIR], timescale=("1ns", "1ps"), waves=waves, always=True)
+    if os.path.exists(results): os.remove(results)
+    runner.test(hdl_toplevel="md_system_top", test_module="bench", test_dir=TEST_DIR, build_dir=build_dir,
+                waves=waves, extra_env={"BENCH_ATOMS": ",".join(map(str, atoms)),
+                                        "BENCH_SHAPES": ",".join(shapes),
+                                        "BENCH_ITERS": str(iterations),
+                                        "BENCH_OUT": results})
+    with open(results, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# ==============================================================================
+# 5. COMMAND LINE
+# ==============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-phase cycle and throughput benchmark of md_system_top.")
+    parser.add_argument("--atoms", default=",".join(map(str, DEFAULT_ATOMS)), help="comma-separated num_atoms (2..62)")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"comma-separated, from {', '.join(SHAPES)}")
+    parser.add_argument("--iters", type=int, default=DEFAULT_ITERS, help="max_iters per run")
+    parser.add_argument("--sim", default="icarus", help="cocotb simulator")
+    parser.add_argument("--model", action="store_true", help="report the golden_model schedule, no simulation")
+    parser.add_argument("--waves", action="store_true")
+    parser.add_argument("-o", "--output", default="bench_report", help="report prefix (.csv and .json)")
+    args = parser.parse_args(argv)
+
+    atoms = [int(a) for a in args.atoms.split(",")]
+    shapes = args.shapes.split(",")
+    if any(not 2 <= a <= 62 for a in atoms): raise SystemExit("num_atoms must be 2..62 (63 hangs S_NB_DRAIN)")
+    if set(shapes) - set(SHAPES): raise SystemExit(f"unknown shape(s) {sorted(set(shapes) - set(SHAPES))}")
+    clock_ns = clock_period_ns()
+
+    transitions = {}
+    if args.model:
+        # The schedule is data-independent, so one row per atom count
+        rows = [report_row(a, "any", args.iters, clock_ns) for a in atoms]
+    else:
+        rows = []
+        for run in run_simulation(atoms, shapes, args.iters, args.sim, waves=args.waves):
+            rows.append(report_row(run['atoms'], run['shape'], run['iterations'], clock_ns, run['cycles']))
+            transitions[f"{run['atoms']}:{run['shape']}"] = run['transitions']
+    write_report(rows, args.output, clock_ns, transitions)
+    print_report(rows, clock_ns)
+    print(f"Wrote {args.output}.csv and {args.output}.json")
+    return rows
+
+if __name__ == "__main__":
+    main()
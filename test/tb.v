@@ -46,4 +46,39 @@ module tb ();
       .rst_n  (rst_n)     // not reset
   );
 
+`ifndef GL_TEST
+  // Optional binary trajectory: run with PLUSARGS=+TRAJ=<file> to dump the
+  // atom_regfile after every iteration in the .btrj format of src/trajectory.py
+  // (header 'BTRJ', version, num_atoms, 0; frame iter_count, step size, x/y/z words).
+  // The header is written once per file: every reset/run cycle of a test
+  // session appends its frames to the same file, iter_count restarting at 1.
+  reg [8*256-1:0] traj_file;
+  integer traj_fd = 0, traj_i;
+  reg [15:0] traj_iter = 0;
+  reg [31:0] traj_step = 0;
+
+  initial begin
+    if ($value$plusargs("TRAJ=%s", traj_file)) begin
+      traj_fd = $fopen(traj_file, "wb");
+      #1; // num_atoms is a tie-off in project.v; let it settle before reading it
+      $fwrite(traj_fd, "%u%u%u%u", 32'h4A525442, 32'd1, {26'd0, user_project.user_project.num_atoms}, 32'd0);
+      $fflush(traj_fd);
+    end
+  end
+
+  always @(posedge clk) begin
+    // Step size of the running iteration (cooled in the same cycle iter_count moves)
+    traj_step <= user_project.user_project.current_step_size;
+    traj_iter <= user_project.user_project.iter_count;
+    if (traj_fd != 0 && user_project.user_project.iter_count != traj_iter
+        && user_project.user_project.iter_count != 0) begin
+      $fwrite(traj_fd, "%u%u", {16'd0, user_project.user_project.iter_count}, traj_step);
+      for (traj_i = 0; traj_i < user_project.user_project.num_atoms; traj_i = traj_i + 1)
+        $fwrite(traj_fd, "%u%u%u", user_project.user_project.u_memory.mem_x[traj_i],
+                user_project.user_project.u_memory.mem_y[traj_i], user_project.user_project.u_memory.mem_z[traj_i]);
+      $fflush(traj_fd);
+    end
+  end
+`endif
+
 endmodule
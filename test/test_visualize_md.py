@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from visualize_md import parse_coordinates, read_trajectory  # noqa: E402
+
+SIM_OUTPUT = os.path.join(SRC_DIR, "sim_output3.txt")
+
+
+def _read_in_thread(filename, limit=10.0, **kwargs):
+    """read_trajectory(follow=True) on a worker thread, so a reader that never returns fails instead of hanging."""
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(out=read_trajectory(filename, follow=True, **kwargs)),
+                              daemon=True)
+    worker.start()
+    worker.join(limit)
+    assert not worker.is_alive(), f"follow=True reader still polling {filename} after {limit} s"
+    return result['out']
+
+
+def test_follow_finished_log():
+    """sim_output3.txt ends its FINAL block without a newline; following it must still return that frame."""
+    with open(SIM_OUTPUT, 'rb') as f:
+        assert not f.read().endswith(b"\n")
+    t0 = time.perf_counter()
+    frames, labels, _ = _read_in_thread(SIM_OUTPUT, poll=0.05)
+    assert time.perf_counter() - t0 < 5.0
+    assert [label.split()[0] for label in labels] == ["INITIAL", "FINAL"]
+    initial, final = parse_coordinates(SIM_OUTPUT)
+    np.testing.assert_array_equal(frames[0], initial)
+    np.testing.assert_array_equal(frames[1], final)
+
+
+def test_follow_growing_log(tmp_path):
+    """Frames appended while the reader polls are picked up, and reading stops at the complete FINAL block."""
+    with open(SIM_OUTPUT) as f:
+        lines = f.read().split("\n")
+    split = lines.index(next(line for line in lines if "FINAL" in line))
+    log = tmp_path / "live.txt"
+    log.write_text("\n".join(lines[:split]) + "\n")
+
+    def append_rest():
+        time.sleep(0.2)
+        with open(log, 'a') as f:
+            for line in lines[split:]:
+                f.write(line + "\n")
+                f.flush()
+                time.sleep(0.01)
+
+    writer = threading.Thread(target=append_rest)
+    writer.start()
+    frames, labels, _ = _read_in_thread(str(log), poll=0.05)
+    writer.join()
+    assert len(labels) == 2 and labels[1].startswith("FINAL")
+    assert frames.shape == (2, 10, 3)